@@ -0,0 +1,187 @@
+"""A cached index of the apps in '/apps' and '/sd/apps', for the launcher.
+
+Scanning for apps gets slow when there are many of them (especially on an SDCard),
+because every app folder has to be listed to check that it's a valid app (and to look for its icon).
+The AppIndex stores the results of the last scan in a small file on flash,
+so that the launcher can show the app list immediately, and check it for changes while it runs.
+
+Key notes on AppIndex:
+  - Each app is stored as `[name, path, icon, kind]`, where `icon` is the path to the app's 'icon.raw' (or None),
+    and `kind` is one of "py", "mpy", "cli" (a ".cli.py" or ".cli.mpy" file), or "pkg" (a module folder).
+
+  - Each app directory has a signature (its entry count, a checksum of its entry names, and its mtime).
+    The index is only rebuilt when a signature doesn't match.
+    The signature only covers the top level of each app directory. Changes inside an app's folder
+    (like adding an 'icon.raw', or an '__init__.py' to an existing folder) aren't noticed,
+    and some filesystems (like FAT on the SDCard) don't update a directory's mtime.
+    "Reload Apps" in the launcher forces a full rescan (`force=True`) to pick those up.
+
+  - `refresh` is a generator that scans one step at a time,
+    so the launcher can run it between frames without blocking the UI.
+    `scan` runs the whole thing at once.
+"""
+
+import json
+import os
+
+
+_INDEX_PATH = const("/appindex.json")
+_INDEX_VERSION = const(2)
+
+_DIR_FLAG = const(16384)
+
+# The app directories, in order of priority (apps on the SDCard replace apps on flash with the same name)
+_APP_DIRS = const(("/apps", "/sd/apps"))
+
+
+
+class AppIndex:
+    """The list of installed apps, cached on flash."""
+
+    def __init__(self, path: str = _INDEX_PATH):
+        """Create the AppIndex, loading the saved index if there is one."""
+        self.path = path
+        self.apps = []
+        self.signatures = {}
+        # set by `refresh` when the app list has changed
+        self.changed = False
+        self.loaded = self._load()
+
+
+    def _load(self) -> bool:
+        """Load the saved index. Returns False if there isn't a valid one."""
+        try:
+            with open(self.path) as f:
+                data = json.loads(f.read())
+            if data["version"] != _INDEX_VERSION:
+                return False
+            self.apps = data["apps"]
+            self.signatures = data["dirs"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        return True
+
+
+    def save(self):
+        """Save the index to flash."""
+        try:
+            with open(self.path, "w") as f:
+                f.write(json.dumps({"version": _INDEX_VERSION, "dirs": self.signatures, "apps": self.apps}))
+        except OSError as e:
+            print(f"Couldn't save the app index: {e}")
+
+
+    @staticmethod
+    def _list_app_dir(directory: str) -> list|None:
+        """List an app directory (creating it if needed). Returns None if it's on a missing SDCard."""
+        on_sd = directory.startswith("/sd")
+        if on_sd and "sd" not in os.listdir("/"):
+            return None
+
+        try:
+            return list(os.ilistdir(directory))
+        except OSError:
+            pass
+
+        # if the apps folder does not exist, create it.
+        try:
+            os.mkdir(directory)
+        except OSError as e:
+            if not on_sd:
+                raise
+            print(e)
+            print("SDCard mounted but cant be opened; assuming it's been removed. Unmounting /sd.")
+            os.umount('/sd')
+            return None
+        return []
+
+
+    @staticmethod
+    def _signature(directory: str, entries: list) -> list:
+        """Get a signature for the given directory, which changes when its contents change."""
+        checksum = 0
+        for entry in entries:
+            name_hash = 0
+            for byte in entry[0].encode():
+                name_hash = (name_hash * 31 + byte) & 0xffffff
+            # (summed, so the order of entries doesn't matter)
+            checksum = (checksum + name_hash) & 0xffffff
+
+        try:
+            mtime = os.stat(directory)[8]
+        except OSError:
+            mtime = 0
+        return [len(entries), checksum, mtime]
+
+
+    @staticmethod
+    def _read_app(directory: str, entry: tuple) -> list|None:
+        """Get the index entry for an app (from a result of `ilistdir`), or None if it's not an app."""
+        name = entry[0]
+        path = f"{directory}/{name}"
+
+        for ext, kind in ((".py", "py"), (".mpy", "mpy")):
+            if name.endswith(ext):
+                name = name[:-len(ext)]
+                if name.endswith(".cli"):
+                    return [name[:-4], path, None, "cli"]
+                return [name, path, None, kind]
+
+        if entry[1] == _DIR_FLAG:
+            # check for apps as module folders
+            try:
+                dir_content = os.listdir(path)
+            except OSError:
+                return None
+            if "__init__.py" in dir_content or "__init__.mpy" in dir_content:
+                icon = f"{path}/icon.raw" if "icon.raw" in dir_content else None
+                return [name, path, icon, "pkg"]
+
+        return None
+
+
+    def refresh(self, sd=None, *, force: bool = False):
+        """Check the app directories for changes, and rebuild the index if they've changed.
+
+        This is a generator, which yields after each slow step.
+        When it's finished, `changed` is True if the index was rebuilt.
+
+        Args:
+            sd (SDCard|None): The SDCard to mount before scanning.
+            force (bool): Rebuild the index even if the directories look unchanged.
+        """
+        self.changed = False
+        if sd is not None:
+            sd.mount()
+            yield
+
+        listings = []
+        signatures = {}
+        for directory in _APP_DIRS:
+            entries = self._list_app_dir(directory)
+            if entries is not None:
+                listings.append((directory, entries))
+                signatures[directory] = self._signature(directory, entries)
+            yield
+
+        if not force and signatures == self.signatures:
+            return
+
+        apps = []
+        for directory, entries in listings:
+            for entry in entries:
+                app = self._read_app(directory, entry)
+                if app is not None:
+                    apps.append(app)
+                yield
+
+        self.apps = apps
+        self.signatures = signatures
+        self.changed = True
+        self.save()
+
+
+    def scan(self, sd=None, *, force: bool = False):
+        """Run `refresh` to completion."""
+        for _ in self.refresh(sd, force=force):
+            pass
@@ -0,0 +1,161 @@
+"""Sync the RTC over WiFi (using NTP), as a task that runs between the launcher's frames.
+
+`sync_clock` is a generator for `lib.hydra.tasks.Tasks`. Rather than blocking while waiting
+for WiFi to connect, or for the NTP server to reply, it yields and checks again later.
+(Looking up the NTP server's address is the only step that can still block for a moment.)
+
+The result is saved in the RTC memory (with `loader.set_state`), so that returning to the launcher
+(which soft-resets the device) doesn't sync the clock again. After a failed sync,
+`should_sync` waits `_RETRY_AFTER_S` seconds before trying again.
+"""
+
+import socket
+import struct
+import time
+
+import machine
+import network
+
+from lib.hydra import loader
+
+
+_NTP_HOST = const("pool.ntp.org")
+_NTP_PORT = const(123)
+# seconds from the NTP epoch (1900) to the `time` epoch (2000 on ESP32, but 1970 on some ports)
+_NTP_DELTA_2000 = 3155673600
+_NTP_DELTA_1970 = 2208988800
+
+_CONNECT_TIMEOUT_MS = const(20_000)
+_CONNECT_POLL_MS = const(200)
+
+_NTP_ATTEMPTS = const(4)
+_NTP_TIMEOUT_MS = const(1500)
+_NTP_POLL_MS = const(50)
+# wait this long after the first failed attempt (doubling after each)
+_NTP_BACKOFF_MS = const(500)
+
+_RETRY_AFTER_S = const(600)
+
+_STATE_KEY = const("clock")
+
+
+
+def should_sync() -> bool:
+    """Check the RTC memory for a recent sync, returning False if the clock shouldn't be synced now."""
+    state = loader.get_state(_STATE_KEY)
+    if state is None:
+        return True
+    result = state.split(":", 1)
+    if result[0] == "ok":
+        return False
+    try:
+        return not 0 <= time.time() - int(result[1]) < _RETRY_AFTER_S
+    except (ValueError, IndexError):
+        return True
+
+
+def _save_result(result: str):
+    """Save the result ("ok" or "fail") and the current time in the RTC memory."""
+    loader.set_state(_STATE_KEY, f"{result}:{time.time()}")
+
+
+def _get_nic() -> network.WLAN|None:
+    """Create the WLAN object, returning None if it can't be created."""
+    # wifi loves to give unknown runtime errors, just try it twice:
+    try:
+        return network.WLAN(network.STA_IF)
+    except RuntimeError as e:
+        print(e)
+    try:
+        return network.WLAN(network.STA_IF)
+    except RuntimeError as e:
+        print("Wifi WLAN object couldnt be created. Gave this error:", e)
+    return None
+
+
+def _query_ntp():
+    """Send an NTP request, and wait for the reply (yielding while waiting).
+
+    Returns the NTP time in seconds, or None if there's no (complete) reply.
+    """
+    sock = None
+    try:
+        addr = socket.getaddrinfo(_NTP_HOST, _NTP_PORT)[0][-1]
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        query = bytearray(48)
+        query[0] = 0x1B
+        sock.sendto(query, addr)
+
+        start = time.ticks_ms()
+        while time.ticks_diff(time.ticks_ms(), start) < _NTP_TIMEOUT_MS:
+            try:
+                msg = sock.recv(48)
+            except OSError:
+                # no reply yet
+                yield _NTP_POLL_MS
+                continue
+            if len(msg) < 48:
+                print(f"NTP reply was too short ({len(msg)} bytes)")
+                return None
+            return struct.unpack("!I", msg[40:44])[0]
+    except OSError as e:
+        print("NTP request failed:", e)
+    finally:
+        if sock is not None:
+            sock.close()
+    return None
+
+
+def _set_rtc(ntp_seconds: int, timezone: int):
+    """Set the RTC from the given NTP time, applying our timezone offset."""
+    delta = _NTP_DELTA_2000 if time.gmtime(0)[0] == 2000 else _NTP_DELTA_1970
+    tm = time.gmtime(ntp_seconds - delta + timezone * 3600)
+    machine.RTC().datetime((tm[0], tm[1], tm[2], tm[6] + 1, tm[3], tm[4], tm[5], 0))
+
+
+def sync_clock(ssid: str, password: str, timezone: int):
+    """Connect to WiFi and sync the RTC (a generator for `Tasks`).
+
+    WiFi is turned off again when the task finishes (or is cancelled).
+    """
+    nic = _get_nic()
+    if nic is None:
+        _save_result("fail")
+        return
+
+    try:
+        if not nic.active():  # turn on wifi if it isn't already
+            nic.active(True)
+        if not nic.isconnected():  # try connecting
+            try:
+                nic.connect(ssid, password)
+            except OSError as e:
+                print("wifi_sync_rtc had this error when connecting:", e)
+
+        start = time.ticks_ms()
+        while not nic.isconnected():
+            if time.ticks_diff(time.ticks_ms(), start) > _CONNECT_TIMEOUT_MS:
+                print(f"Connecting to wifi aborted after {_CONNECT_TIMEOUT_MS}ms")
+                _save_result("fail")
+                return
+            yield _CONNECT_POLL_MS
+
+        backoff = _NTP_BACKOFF_MS
+        for attempt in range(1, _NTP_ATTEMPTS + 1):
+            ntp_seconds = yield from _query_ntp()
+            if ntp_seconds:
+                _set_rtc(ntp_seconds, timezone)
+                _save_result("ok")
+                print(f'RTC successfully synced to {machine.RTC().datetime()} with {attempt} attempts.')
+                return
+            if attempt < _NTP_ATTEMPTS:
+                yield backoff
+                backoff *= 2
+
+        print(f"Syncing RTC aborted after {_NTP_ATTEMPTS} attemps")
+        _save_result("fail")
+
+    finally:
+        nic.disconnect()
+        nic.active(False)  # shut off wifi
@@ -12,6 +12,7 @@ import time
 from font import vga2_16x32 as font
 from lib import sdcard, userinput
 from lib.display import Display
+from lib.display.retained import RetainedLayer
 from lib.hydra import beeper, popup, loader
 from lib.hydra.config import Config
 from lib.hydra.i18n import I18n
@@ -126,6 +127,8 @@ class ListView:
         self.dir_dict = dir_dict
         self.view_index = 0
         self.cursor_index = 0
+        # only rows that change are redrawn
+        self.layer = RetainedLayer(tft)
 
 
     @staticmethod
@@ -144,7 +147,8 @@ class ListView:
     def draw(self):
         """Draw list to display."""
         tft = self.tft
-        tft.fill(self.config.palette[2])
+        layer = self.layer
+        layer.begin_frame(self.config.palette[2])
 
         for idx in range(_ITEMS_PER_SCREEN):
             item_index = idx + self.view_index
@@ -152,49 +156,14 @@ class ListView:
             if item_index >= len(self.items):
                 break
 
-            mytext = self.items[item_index]
-
-            # style based on selected:
-            if item_index == self.cursor_index:
-                # draw selection box
-                tft.rect(
-                    0,
-                    idx*_LINE_HEIGHT + _TOP_PADDING,
-                    _SCROLLBAR_START_X,
-                    32,
-                    self.config.palette[1],
-                    fill=True,
-                    )
-                clr_idx = 8
-            else:
-                clr_idx = 6
-
-            # special stylilng on menu button
-            if mytext == "/.../":
-                self.draw_hamburger_menu(tft, idx * _LINE_HEIGHT + _TOP_PADDING, self.config.palette[clr_idx])
-                break  # hamburger menu is always last
-
-            # special styling for directories
-            if self.dir_dict[self.items[item_index]]:
-                mytext += "/"
-                clr_idx -= 1
-
-            # scroll text if too long
-            if len(mytext) > _CHARS_PER_SCREEN:
-                scroll_distance = (len(mytext) - _CHARS_PER_SCREEN) * -16
-                x = int(ping_pong_ease(time.ticks_ms(), _SCROLL_TIME) * scroll_distance)
-            else:
-                x = _LEFT_PADDING
-
-            tft.text(
-                mytext,
-                x,
-                idx * _LINE_HEIGHT + _TOP_PADDING,
-                self.config.palette[clr_idx],
-                font=font,
-                )
+            layer.begin(idx, 0, idx * _LINE_HEIGHT + _TOP_PADDING, _MH_DISPLAY_WIDTH, 32)
+            is_last = self._draw_item(idx, item_index)
+            layer.end()
+            if is_last:
+                break
 
         # draw scrollbar
+        layer.begin('scrollbar', _SCROLLBAR_START_X, 0, _SCROLLBAR_WIDTH, _MH_DISPLAY_HEIGHT)
         scrollbar_height = _MH_DISPLAY_HEIGHT // max(1, (len(self.items) - _ITEMS_PER_SCREEN_MINUS))
         scrollbar_y = int(
             (self.view_index / max(len(self.items) - _ITEMS_PER_SCREEN, 1))
@@ -208,6 +177,56 @@ class ListView:
             self.config.palette[4],
             fill=True,
             )
+        layer.end()
+
+        layer.end_frame()
+
+
+    def _draw_item(self, idx: int, item_index: int) -> bool:
+        """Draw one row of the list, returning True if it was the last row."""
+        tft = self.tft
+        mytext = self.items[item_index]
+
+        # style based on selected:
+        if item_index == self.cursor_index:
+            # draw selection box
+            tft.rect(
+                0,
+                idx*_LINE_HEIGHT + _TOP_PADDING,
+                _SCROLLBAR_START_X,
+                32,
+                self.config.palette[1],
+                fill=True,
+                )
+            clr_idx = 8
+        else:
+            clr_idx = 6
+
+        # special stylilng on menu button
+        if mytext == "/.../":
+            self.draw_hamburger_menu(tft, idx * _LINE_HEIGHT + _TOP_PADDING, self.config.palette[clr_idx])
+            return True  # hamburger menu is always last
+
+        # special styling for directories
+        if self.dir_dict[self.items[item_index]]:
+            mytext += "/"
+            clr_idx -= 1
+
+        # scroll text if too long
+        if len(mytext) > _CHARS_PER_SCREEN:
+            scroll_distance = (len(mytext) - _CHARS_PER_SCREEN) * -16
+            x = int(ping_pong_ease(time.ticks_ms(), _SCROLL_TIME) * scroll_distance)
+        else:
+            x = _LEFT_PADDING
+
+        tft.text(
+            mytext,
+            x,
+            idx * _LINE_HEIGHT + _TOP_PADDING,
+            self.config.palette[clr_idx],
+            font=font,
+            )
+        return False
 
 
     def clamp_cursor(self):
@@ -502,6 +521,8 @@ def refresh_files(view: ListView) -> tuple[list, dict]:
     view.items = file_list
     view.dir_dict = dir_dict
     view.clamp_cursor()
+    # popups may have been drawn over the list
+    view.layer.invalidate()
     return file_list, dir_dict
 
 
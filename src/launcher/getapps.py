@@ -19,7 +19,9 @@ import requests
 from lib import userinput
 from lib.device import Device
 from lib.display import Display
+from lib.display.retained import RetainedLayer
 from lib.hydra.config import Config
+from lib.hydra import loader
 from lib.hydra.i18n import I18n
 from lib.hydra.simpleterminal import SimpleTerminal
 from lib.zipextractor import ZipExtractor
@@ -86,14 +88,13 @@ def check_wifi():
         time.sleep_ms(500)
         while not INPUT.get_new_keys():
             time.sleep_ms(10)
-        machine.RTC().memory(
+        loader.launch_app(
             # mh_if frozen:
             # ".frozen/launcher/settings",
             # mh_else:
             "/launcher/settings",
             # mh_end_if
         )
-        machine.reset()
 
 
 def connect_wifi():
@@ -233,6 +234,9 @@ class CatalogDisplay:
 
         self.idx = 0
 
+        # only the parts of the display that change are redrawn
+        self.layer = RetainedLayer(DISPLAY)
+
     def move(self, val: int):
         """Move the selector index by `val`."""
         self.idx += val
@@ -272,17 +276,18 @@ class CatalogDisplay:
         return lines
 
 
-    def draw(self):
+    def draw(self, *, show_hints: bool = False):
         """Draw the selected option to the display."""
         name = self.names[self.idx]
         # separate author
         *desc, author = self.catalog[name].split(' - ')
         desc = ' - '.join(desc)
 
-        # blackout bg
-        DISPLAY.fill(CONFIG.palette[2])
+        layer = self.layer
+        layer.begin_frame(CONFIG.palette[2])
 
         # draw box around name
+        layer.begin('name', 0, _NAME_Y - 8, _MH_DISPLAY_WIDTH, 24)
         DISPLAY.rect(0, _NAME_Y - 8, _MH_DISPLAY_WIDTH, 24, CONFIG.palette[3], fill=True)
 
         # draw name
@@ -290,8 +295,10 @@ class CatalogDisplay:
         DISPLAY.text('>', _MH_DISPLAY_WIDTH - 16, _NAME_Y, CONFIG.palette[4])
         DISPLAY.text(name, _DISPLAY_WIDTH_HALF - (len(name) * 4), _NAME_Y+1, CONFIG.palette[5])
         DISPLAY.text(name, _DISPLAY_WIDTH_HALF - (len(name) * 4), _NAME_Y, CONFIG.palette[8])
+        layer.end()
 
         # draw author
+        layer.begin('author', 0, _AUTHOR_Y - 15, _MH_DISPLAY_WIDTH, 24)
         DISPLAY.text(I18N["Author:"], _DISPLAY_WIDTH_HALF - 28, _AUTHOR_Y - 14, CONFIG.palette[3])
         DISPLAY.text(
             author,
@@ -299,8 +306,10 @@ class CatalogDisplay:
             _AUTHOR_Y,
             CONFIG.palette[5],
             )
+        layer.end()
 
         # draw description
+        layer.begin('desc', 0, _DESC_Y - 15, _MH_DISPLAY_WIDTH, _MH_DISPLAY_HEIGHT - _DESC_Y + 15)
         DISPLAY.text(
             I18N["Description:"],
             _DISPLAY_WIDTH_HALF - 48,
@@ -317,6 +326,26 @@ class CatalogDisplay:
                 CONFIG.palette[6],
                 )
             desc_y += 9
+        layer.end()
+
+        if show_hints:
+            # Add usage hint
+            layer.begin('hints', 0, 0, _MH_DISPLAY_WIDTH, _MH_DISPLAY_HEIGHT)
+            DISPLAY.text(
+                I18N["Select an app to download:"],
+                _DISPLAY_WIDTH_HALF - 104,  # Center text
+                2,
+                CONFIG.palette[0],
+            )
+            DISPLAY.text(
+                I18N["Press backspace to exit"],
+                _DISPLAY_WIDTH_HALF - 92,  # Center text
+                _MH_DISPLAY_HEIGHT-10,
+                CONFIG.palette[0],
+            )
+            layer.end()
+
+        layer.end_frame()
 
 
 # --------------------------------------------------------------------------------------------------
@@ -340,21 +369,7 @@ def main_loop():
     time.sleep_ms(400)
 
     catalog_display = CatalogDisplay(catalog)
-    catalog_display.draw()
-
-    # Add usage hint
-    DISPLAY.text(
-        I18N["Select an app to download:"],
-        _DISPLAY_WIDTH_HALF - 104,  # Center text
-        2,
-        CONFIG.palette[0],
-    )
-    DISPLAY.text(
-        I18N["Press backspace to exit"],
-        _DISPLAY_WIDTH_HALF - 92,  # Center text
-        _MH_DISPLAY_HEIGHT-10,
-        CONFIG.palette[0],
-    )
+    catalog_display.draw(show_hints=True)
     DISPLAY.show()
 
     while True:
@@ -374,6 +389,8 @@ def main_loop():
                 elif key in {'G0', 'ENT', 'SPC'}:
                     fetch_app(catalog_display.names[catalog_display.idx], mpy_matches)
                     time.sleep(2)
+                    # the terminal was drawn over the catalog
+                    catalog_display.layer.invalidate()
 
                 elif key in {'ESC', 'BSPC'}:
                     NIC.active(False)
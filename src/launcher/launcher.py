@@ -32,22 +32,35 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+import machine
+
+
+# bump up our clock speed so the UI feels smoother (and so the rest of the launcher loads faster)
+# (240mhz is the max officially supported, but the default is 160mhz)
+machine.freq(240_000_000)
+
+
 import math
-import os
 import time
 
 import framebuf
-import machine
-import network
-import ntptime
 
 from font import vga2_16x32 as font
+from launcher.appindex import AppIndex
 from launcher.icons import appicons
-from lib import battlevel, display, sdcard, userinput
+from lib import display, sdcard, userinput
 from lib.display.rawbitmap import RawBitmap
-from lib.hydra import beeper, loader, statusbar
+from lib.hydra import loader, statusbar
 from lib.hydra.config import Config
 from lib.hydra.i18n import I18n
+from lib.hydra.lazyimport import LazyModule, LazyObject
+from lib.hydra.tasks import Tasks
+
+
+# These are only needed for syncing the clock, or for playing UI sounds,
+# so they're only loaded when they're first used (after the launcher is drawn)
+clocksync = LazyModule("launcher.clocksync")
+beeper = LazyModule("lib.hydra.beeper")
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ _CONSTANTS: ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -109,23 +122,8 @@ _TRANS = const("""[
 
 
 
-# bump up our clock speed so the UI feels smoother
-# (240mhz is the max officially supported, but the default is 160mhz)
-machine.freq(240_000_000)
-
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ GLOBALS: ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
-# wifi loves to give unknown runtime errors, just try it twice:
-try:
-    NIC = network.WLAN(network.STA_IF)
-except RuntimeError as e:
-    print(e)
-    try:
-        NIC = network.WLAN(network.STA_IF)
-    except RuntimeError as e:
-        NIC = None
-        print("Wifi WLAN object couldnt be created. Gave this error:", e)
-
 DISPLAY = display.Display(
     # mh_if spi_ram:
     # use_tiny_buf=False,
@@ -134,7 +132,7 @@ DISPLAY = display.Display(
     # mh_end_if
     )
 
-BEEP = beeper.Beeper()
+BEEP = LazyObject(lambda: beeper.Beeper())
 CONFIG = Config()
 KB = userinput.UserInput()
 STATUSBAR = statusbar.StatusBar()
@@ -144,12 +142,13 @@ RTC = machine.RTC()
 
 I18N = I18n(_TRANS)
 
-SYNC_NTP_ATTEMPTS = 0
-CONNECT_WIFI_ATTEMPTS = 0
-SYNCING_CLOCK = None
+# background tasks (run between frames)
+TASKS = Tasks()
 
+APP_INDEX = AppIndex()
 APP_NAMES = None
 APP_PATHS = None
+APP_ICONS = None
 APP_SELECTOR_INDEX = 0
 PREV_SELECTOR_INDEX = 0
 
@@ -157,63 +156,27 @@ PREV_SELECTOR_INDEX = 0
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Finding Apps ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-def scan_apps():
-    """Scan for apps in /apps and /sd/apps."""
-    global APP_NAMES, APP_PATHS  # noqa: PLW0603
-
-    # first we need a list of apps located on the flash or SDCard
-    SD.mount()
-    main_directory = os.listdir("/")
-
-    sd_directory = []
-    if "sd" in main_directory:
-        sd_directory = os.listdir("/sd")
-
-    # if the apps folder does not exist, create it.
-    if "apps" not in main_directory:
-        os.mkdir("/apps")
-        main_directory = os.listdir("/")
-
-    # do the same for the sdcard apps directory
-    if "apps" not in sd_directory and "sd" in main_directory:
-        os.mkdir("/sd/apps")
-        sd_directory = os.listdir("/sd")
-
-    # if everything above worked, sdcard should be mounted (if available),
-    # and both app directories should exist. now look inside to find our apps:
-    main_app_list = list(os.ilistdir("/apps"))
-    sd_app_list = []
-
-    if "sd" in main_directory:
-        try:
-            sd_app_list = list(os.ilistdir("/sd/apps"))
-        except OSError as e:
-            print(e)
-            print(
-                "SDCard mounted but cant be opened; assuming it's been removed. Unmounting /sd.")
-            os.umount('/sd')
+def scan_apps(*, force: bool = False):
+    """Scan for apps in /apps and /sd/apps (updating the app index), and use the results."""
+    APP_INDEX.scan(SD, force=force)
+    load_app_index()
+
+
+def load_app_index():
+    """Set the app names, paths, and icons from the app index."""
+    global APP_NAMES, APP_PATHS, APP_ICONS  # noqa: PLW0603
 
     # now lets collect some separate app names and locations
     app_names = []
     app_paths = {}
+    app_icons = {}
 
-    for entry in main_app_list:
-        this_name, this_path = get_app_paths(entry, "/apps/")
-        if this_name:
-            this_name = this_name.replace('.cli', '')
-            if this_name not in app_names:
-                app_names.append(this_name)
-
-            app_paths[this_name] = this_path
+    for this_name, this_path, this_icon, _ in APP_INDEX.apps:
+        if this_name not in app_names:
+            app_names.append(this_name)
 
-    for entry in sd_app_list:
-        this_name, this_path = get_app_paths(entry, "/sd/apps/")
-        if this_name:
-            this_name = this_name.replace('.cli', '')
-            if this_name not in app_names:
-                app_names.append(this_name)
-
-            app_paths[this_name] = this_path
+        app_paths[this_name] = this_path
+        app_icons[this_name] = this_icon
 
     # sort alphabetically without uppercase/lowercase discrimination:
     app_names.sort(key=lambda element: element.lower())
@@ -248,33 +211,7 @@ def scan_apps():
 
     APP_NAMES = app_names
     APP_PATHS = app_paths
-
-
-def get_app_paths(ientry: tuple, current_dir: str) -> tuple[str|None, str|None]:
-    """Get an apps name and full path.
-
-    Returns app_name, app_path
-    """
-    # process results of ilistdir to capture app paths.
-    _DIR_FLAG = const(16384)
-    _FILE_FLAG = const(32768)
-
-    entry = ientry[0]
-    is_dir = (ientry[1] == _DIR_FLAG)
-
-    if entry.endswith(".py"):
-        return entry[:-3], current_dir + entry
-
-    if entry.endswith(".mpy"):
-        return entry[:-4], current_dir + entry
-
-    if is_dir:
-        # check for apps as module folders
-        dir_content = os.listdir(current_dir + entry)
-        if "__init__.py" in dir_content or "__init__.mpy" in dir_content:
-            return entry, current_dir + entry
-
-    return None, None
+    APP_ICONS = app_icons
 
 
 
@@ -290,6 +227,15 @@ def launch_app(app_path):
     loader.launch_app(app_path)
 
 
+def beep(notes, time_ms: int = 100):
+    """Play a UI sound, if UI sounds are on.
+
+    (This checks the config before touching BEEP, so the Beeper is never created while sounds are off.)
+    """
+    if CONFIG['ui_sound']:
+        BEEP.play(notes, time_ms)
+
+
 def center_text_x(text: str) -> int:
     """Calculate the x coordinate to draw a text string, to make it horizontally centered.
 
@@ -394,6 +340,11 @@ _ICON_ERASE_WIDTH = const(_FONT_WIDTH * 3)
 _ICON_BITMAP_SIZE = const(_ICON_HEIGHT * _ICON_WIDTH)
 _ICON_BUFFER_LEN = const(_ICON_BITMAP_SIZE // 2)
 
+# Custom icons are kept in RAM for the current app and its neighbours (up to this many apps away).
+_ICON_PREFETCH_DISTANCE = const(2)
+# (1bit 32x32 icons are 128 bytes each)
+_ICON_CACHE_BUDGET = const((_ICON_BITMAP_SIZE // 8) * (_ICON_PREFETCH_DISTANCE * 2 + 3))
+
 
 class IconWidget:
     """Responsible for handling icon graphics."""
@@ -408,6 +359,9 @@ class IconWidget:
         self.scroll_start_ms = time.ticks_ms()
         self.anim_time = _SCROLL_ANIMATION_TIME
         self.anim_fac = 0.0
+        # the custom icon (for the current app) that's waiting to be loaded by `prefetch`
+        self.waiting_icon = None
+        RawBitmap.cache_budget = _ICON_CACHE_BUDGET
 
         self.force_update()
 
@@ -522,6 +476,7 @@ class IconWidget:
 
     def _choose_icon(self) -> int|str:
         current_app_text = APP_NAMES[APP_SELECTOR_INDEX]
+        self.waiting_icon = None
 
         # special menu options for settings
         if current_app_text == "UI Sound":
@@ -542,13 +497,12 @@ class IconWidget:
         if current_app_path.endswith('.cli.py'):
             return _TERMINAL_ICON_IDX
 
-        if not (current_app_path.endswith('.py') or current_app_path.endswith('.mpy')):
-            # too many ways for `os.listdir` to fail here, so just capture the error:
-            try:
-                if 'icon.raw' in os.listdir(current_app_path):
-                    return RawBitmap(f"{current_app_path}/icon.raw", 32, 32, (CONFIG.palette[2], CONFIG.palette[8]))
-            except OSError:
-                pass
+        icon_path = APP_ICONS.get(current_app_text)
+        if icon_path is not None:
+            if RawBitmap.is_cached(icon_path):
+                return RawBitmap(icon_path, 32, 32, (CONFIG.palette[2], CONFIG.palette[8]))
+            # Don't block on file IO here. The default icon is shown until `prefetch` loads this one.
+            self.waiting_icon = current_app_text
 
         # default to sd or flash storage icon
         if current_app_path.startswith("/sd"):
@@ -556,6 +510,47 @@ class IconWidget:
         return _FLASH_ICON_IDX
 
 
+    @staticmethod
+    def _load_icon(app_name: str) -> bool:
+        """Load the custom icon for an app into the icon cache. Returns False if it couldn't be loaded."""
+        try:
+            RawBitmap.load(APP_ICONS[app_name])
+        except OSError:
+            # (the icon may have been removed since the app index was built)
+            APP_ICONS[app_name] = None
+            return False
+        return True
+
+
+    def prefetch(self):
+        """Load one missing icon into the icon cache (for the current app first, then its neighbours).
+
+        This is called once per frame, so that icons are read from storage while the scroll animation runs,
+        and never while choosing the next icon.
+        """
+        if self.waiting_icon is not None:
+            self._load_icon(self.waiting_icon)
+            # replace the default icon (or keep it, if the custom icon couldn't be loaded)
+            icon = self._choose_icon()
+            if self.drawn_icon == self.next_icon:
+                self.drawn_icon = icon
+                if not self.direction:
+                    # a still icon isn't redrawn each frame, so redraw it now
+                    self.prev_x = 0
+                    self.draw()
+            self.next_icon = icon
+            return
+
+        app_count = len(APP_NAMES)
+        for distance in range(1, _ICON_PREFETCH_DISTANCE + 1):
+            for idx in (APP_SELECTOR_INDEX + distance, APP_SELECTOR_INDEX - distance):
+                name = APP_NAMES[idx % app_count]
+                icon_path = APP_ICONS.get(name)
+                if icon_path is not None and not RawBitmap.is_cached(icon_path):
+                    self._load_icon(name)
+                    return
+
+
     @staticmethod
     def _erase_icon():
         DISPLAY.rect(
@@ -605,47 +600,25 @@ def draw_app_name():
         )
 
 
-_MAX_WIFI_ATTEMPTS = const(1000)
-_MAX_NTP_ATTEMPTS = const(10)
+# time to spend on background tasks each frame (a task step can go over this)
+_TASK_BUDGET_MS = const(8)
 
 
-def try_sync_clock():
-    """Try syncing the RTC using ntptime."""
-    global SYNCING_CLOCK, SYNC_NTP_ATTEMPTS, CONNECT_WIFI_ATTEMPTS  # noqa: PLW0603
+def apply_app_refresh(icon):
+    """Use the refreshed app index, if it has changed (after the app index refresh task is done)."""
+    global APP_SELECTOR_INDEX  # noqa: PLW0603
+    if APP_INDEX.changed:
+        # keep the same app selected (if it still exists)
+        current_app = APP_NAMES[APP_SELECTOR_INDEX]
+        load_app_index()
+        APP_SELECTOR_INDEX = APP_NAMES.index(current_app) if current_app in APP_NAMES else 0
+        icon.force_update()
+        icon.draw()
 
-    if NIC.isconnected():
-        try:
-            ntptime.settime()
-        except OSError:
-            SYNC_NTP_ATTEMPTS += 1
-
-        if RTC.datetime()[0] != 2000:
-            NIC.disconnect()
-            NIC.active(False)  # shut off wifi
-            SYNCING_CLOCK = False
-            # apply our timezone offset
-            time_list = list(RTC.datetime())
-            time_list[4] += CONFIG["timezone"]
-            RTC.datetime(tuple(time_list))
-            print(
-                f'RTC successfully synced to {RTC.datetime()} with {SYNC_NTP_ATTEMPTS} attempts.')
-            # Redraw statusbar
-            display.Display.draw_overlays = True
-
-        elif SYNC_NTP_ATTEMPTS >= _MAX_NTP_ATTEMPTS:
-            NIC.disconnect()
-            NIC.active(False)  # shut off wifi
-            SYNCING_CLOCK = False
-            print(f"Syncing RTC aborted after {SYNC_NTP_ATTEMPTS} attemps")
-
-    elif CONNECT_WIFI_ATTEMPTS >= _MAX_WIFI_ATTEMPTS:
-        NIC.disconnect()
-        NIC.active(False)  # shut off wifi
-        SYNCING_CLOCK = False
-        print(
-            f"Connecting to wifi aborted after {CONNECT_WIFI_ATTEMPTS} loops")
-    else:
-        CONNECT_WIFI_ATTEMPTS += 1
+
+def clock_synced():
+    """Redraw the statusbar (after the clock sync task is done)."""
+    display.Display.draw_overlays = True
 
 
 
@@ -656,41 +629,46 @@ def try_sync_clock():
 # --------------------------------------------------------------------------------------------------
 def main_loop():
     """Run the main loop."""
-    global APP_SELECTOR_INDEX, PREV_SELECTOR_INDEX, SYNCING_CLOCK  # noqa: PLW0603
-    # scan apps asap to populate app names/paths and SD
-    scan_apps()
-
-    # sync our RTC on boot, if set in settings
-    SYNCING_CLOCK = CONFIG['sync_clock']
-
-    if (CONFIG['wifi_ssid'] == ''
-    or RTC.datetime()[0] != 2000
-    or NIC is None):
-        SYNCING_CLOCK = False
-
-    if SYNCING_CLOCK:  # enable wifi if we are syncing the clock
-        if not NIC.active():  # turn on wifi if it isn't already
-            NIC.active(True)
-        if not NIC.isconnected():  # try connecting
-            try:
-                NIC.connect(CONFIG['wifi_ssid'], CONFIG['wifi_pass'])
-            except OSError as e:
-                print("wifi_sync_rtc had this error when connecting:", e)
+    global APP_SELECTOR_INDEX, PREV_SELECTOR_INDEX  # noqa: PLW0603
+    # Show the saved app index right away, and check it for changes between frames.
+    # (Without a saved index, scan apps asap to populate app names/paths and SD)
+    if APP_INDEX.loaded:
+        load_app_index()
+    else:
+        scan_apps()
 
     new_keys = []
 
-    # starupp sound
-    BEEP.play(
-        ('C3',
-            ('C4', 'E4', 'G4'),
-            ('C4', 'E4', 'G4'),
-         ))
-
     # init diplsay
     DISPLAY.fill(CONFIG.palette[2])
 
     icon = IconWidget()
     icon.draw()
+    # show the launcher before loading wifi or the beeper
+    DISPLAY.show()
+
+    # check the saved app index for changes in the background
+    app_refresh = None
+    if APP_INDEX.loaded:
+        app_refresh = TASKS.add(APP_INDEX.refresh(SD), lambda: apply_app_refresh(icon))
+
+    # sync our RTC on boot, if set in settings
+    # (unless it's already been synced, or a sync failed recently)
+    if (CONFIG['sync_clock']
+    and CONFIG['wifi_ssid'] != ''
+    and RTC.datetime()[0] == 2000
+    and clocksync.should_sync()):
+        TASKS.add(
+            clocksync.sync_clock(CONFIG['wifi_ssid'], CONFIG['wifi_pass'], CONFIG['timezone']),
+            clock_synced,
+            )
+
+    # starupp sound
+    beep(
+        ('C3',
+            ('C4', 'E4', 'G4'),
+            ('C4', 'E4', 'G4'),
+         ))
 
 
     while True:
@@ -724,7 +702,7 @@ def main_loop():
                 # animation:
                 icon.start_scroll(1)
 
-                BEEP.play((("D3", 'F3'), "A3"), 20)
+                beep((("D3", 'F3'), "A3"), 20)
 
             elif "LEFT" in new_keys:  # left arrow
                 PREV_SELECTOR_INDEX = APP_SELECTOR_INDEX
@@ -733,7 +711,7 @@ def main_loop():
                 # animation:
                 icon.start_scroll(-1)
 
-                BEEP.play((("C3", "E3"), "G3"), 20)
+                beep((("C3", "E3"), "G3"), 20)
 
             # ~~~~~~~~~~ check if GO or ENTER are pressed ~~~~~~~~~~
             if "G0" in new_keys or "ENT" in new_keys:
@@ -744,17 +722,17 @@ def main_loop():
                     icon.force_update()
                     icon.draw()
 
-                    if CONFIG['ui_sound'] == 0:  # currently muted, then unmute
-                        BEEP.play(
-                            ("C3", "E3", "G3", ("C4", "E4", "G4"), ("C4", "E4", "G4")), 80)
+                    # (only plays if sound was just turned on)
+                    beep(("C3", "E3", "G3", ("C4", "E4", "G4"), ("C4", "E4", "G4")), 80)
 
 
                 elif APP_NAMES[APP_SELECTOR_INDEX] == "Reload Apps":
-                    scan_apps()
+                    TASKS.cancel(app_refresh)
+                    scan_apps(force=True)
                     APP_SELECTOR_INDEX = 0
                     icon.start_scroll(-1)
 
-                    BEEP.play(('C4', 'E4', 'G4'), 80)
+                    beep(('C4', 'E4', 'G4'), 80)
 
                 else:  # ~~~~~~~~~~~~~~~~~~~ LAUNCH THE APP! ~~~~~~~~~~~~~~~~~~~~
 
@@ -773,7 +751,7 @@ def main_loop():
                         except:
                             print("Tried to deinit SDCard, but failed.")
 
-                    BEEP.play(('C4', 'B4', 'C5', 'C5'), 100)
+                    beep(('C4', 'B4', 'C5', 'C5'), 100)
 
                     launch_app(APP_PATHS[APP_NAMES[APP_SELECTOR_INDEX]])
 
@@ -799,7 +777,7 @@ def main_loop():
                                 PREV_SELECTOR_INDEX = APP_SELECTOR_INDEX
                                 APP_SELECTOR_INDEX = idx
                                 icon.start_scroll(direction)
-                                BEEP.play(("G3"), 100)
+                                beep(("G3"), 100)
 
                                 break
 
@@ -809,13 +787,14 @@ def main_loop():
 
         draw_app_selector(icon)
         DISPLAY.show()
+        icon.prefetch()
 
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-        # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ WIFI and RTC: ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Background Tasks: ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
-        if SYNCING_CLOCK:
-            try_sync_clock()
+        # (refreshing the app index, and syncing the clock)
+        TASKS.run(_TASK_BUDGET_MS)
 
         # short sleep makes the animation look a little less flickery
         time.sleep_ms(5)
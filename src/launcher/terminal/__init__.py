@@ -126,8 +126,12 @@ def execute_script(path, argv):
     mod_name = strip_extension(path_split(path)[1])
     if mod_name in sys.modules:
         sys.modules.pop(mod_name)
-    with open(path) as f:
-        exec(f.read(), glbls, glbls)  # noqa: S102
+    try:
+        with open(path) as f:
+            exec(f.read(), glbls, glbls)  # noqa: S102
+    finally:
+        # the script may have drawn over the terminal
+        term.full_redraw = True
 
 
 def _is_printable(inpt:str) -> bool:
@@ -1,5 +1,6 @@
 """The commands used by the Terminal."""
 import os, machine
+from lib.hydra import bootprofile
 
 bcolors = {
     'DIM':'\033[35m',
@@ -49,6 +50,32 @@ def del_from_str(string:str, delstrings:str) -> str:
         string = string.replace(s, '')
     return string
 
+def boottrace(*args) -> str:
+    """View the last boot trace, or turn boot tracing on/off."""
+    if args and args[0] == "on":
+        bootprofile.enable()
+        return ctext("Boot tracing on. The next app launch will be traced.", 'OKGREEN')
+    if args and args[0] == "off":
+        bootprofile.disable()
+        return ctext("Boot tracing off.", 'OKGREEN')
+
+    records = bootprofile.load_trace()
+    if records is None:
+        return ctext("Boot tracing is off. Use ", 'DIM') + ctext("boottrace on", 'OKBLUE')
+    if not records:
+        return ctext("No boot trace yet (launch an app to record one).", 'DIM')
+
+    lines = [ctext("  time     took   free", 'DIM')]
+    for label, depth, time_us, duration_us, mem_free in records:
+        took = f"{duration_us / 1000:6.1f}" if duration_us else "      "
+        lines.append(
+            ctext(f"{time_us / 1000:6.1f} ", 'LIGHT')
+            + ctext(f"{took} ", 'OKBLUE')
+            + ctext(f"{mem_free // 1024:5d}K ", 'MID')
+            + "  " * depth + label
+        )
+    return "\n".join(lines)
+
 def _help(*args) -> str:
     """Get usage info."""
     global commands  # noqa: PLW0602
@@ -82,6 +109,7 @@ def get_commands(term) -> dict:
         "clear": term.clear,
         "reboot": lambda: (term.print("Goodbye!"), machine.reset()),
         "help": _help,
+        "boottrace": boottrace,
     }
     # add alternate aliases for commands
     commands.update({
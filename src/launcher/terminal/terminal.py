@@ -14,6 +14,7 @@ _PRINT_LINE_START = const(_MH_DISPLAY_HEIGHT - 12 - (_NUM_PRINT_LINES * 11))
 _USER_LINE_HEIGHT = const(12)
 _USER_LINE_Y_FILL = const(_MH_DISPLAY_HEIGHT - _USER_LINE_HEIGHT)
 _USER_LINE_Y = const(_MH_DISPLAY_HEIGHT - 11)
+_PRINT_LINE_HEIGHT = const(11)
 _MAX_TEXT_WIDTH = const(_MH_DISPLAY_WIDTH // 8)
 
 _CURSOR_BLINK_MS = const(500)
@@ -46,12 +47,15 @@ class Terminal:
         self.current_line = ''
         self.display = get_instance(Display, allow_init=False)
         self.user_input = get_instance(UserInput, allow_init=False)
-        self.lines_changed = False
+        # number of lines printed since the last draw, and whether all lines must be redrawn
+        self.new_lines = 0
+        self.full_redraw = True
 
 
     def clear(self):
         """Clear printed lines."""
         self.lines = [TermLine('')] * _NUM_PRINT_LINES
+        self.full_redraw = True
 
 
     @staticmethod
@@ -101,7 +105,7 @@ class Terminal:
         for line in lines:
             self.lines.append(TermLine(line))
             self.lines.pop(0)
-        self.lines_changed = True
+        self.new_lines += len(lines)
         self.draw()
         self.display.show()
 
@@ -165,14 +169,32 @@ class Terminal:
         return (time.ticks_ms() % _CURSOR_BLINK_MOD) < _CURSOR_BLINK_MS
 
     def draw(self):
-        """Draw all the terminal lines."""
-        # Only draw all lines if we have to
-        if self.lines_changed:
-            self.display.fill(self.display.palette[2])
+        """Draw new terminal lines, scrolling the old ones up."""
+        display = self.display
+        new_lines = self.new_lines
+        # overlays are drawn over the printed lines, so they must be redrawn to clear them.
+        if Display.draw_overlays or display.display_list is not None:
+            self.full_redraw = True
+
+        if self.full_redraw or new_lines >= _NUM_PRINT_LINES:
+            display.fill(display.palette[2])
             y = _PRINT_LINE_START
             for line in self.lines:
-                line.draw(0, y, self.display)
-                y += 11
+                line.draw(0, y, display)
+                y += _PRINT_LINE_HEIGHT
+
+        elif new_lines:
+            # Move the printed lines up (in hardware, when possible), and only draw the new ones
+            display.scroll_region(0, _USER_LINE_Y_FILL)
+            display.scroll_lines(new_lines * _PRINT_LINE_HEIGHT)
+            y = _PRINT_LINE_START + (_NUM_PRINT_LINES - new_lines) * _PRINT_LINE_HEIGHT
+            display.rect(0, y - 1, _MH_DISPLAY_WIDTH, _USER_LINE_Y_FILL - y + 1, display.palette[2], fill=True)
+            for line in self.lines[-new_lines:]:
+                line.draw(0, y, display)
+                y += _PRINT_LINE_HEIGHT
+
+        self.new_lines = 0
+        self.full_redraw = False
 
         # Draw current user line
         self._draw_user_text(f'{os.getcwd()}$ ', self.current_line)
@@ -0,0 +1,131 @@
+"""An overlay that is drawn into its own small buffer, and only redrawn when its inputs change.
+
+Overlay callbacks (in `Display.overlay_callbacks`) run whenever `Display.draw_overlays` is set,
+which can happen often (any app can set it, and it's set whenever the overlays might have been drawn over).
+A CachedOverlay keeps a pre-drawn copy of the overlay, and just copies it to the display,
+only calling its `render` function again when the value returned by its `inputs` function changes.
+
+Example:
+    def clock_inputs():
+        return time.localtime()[3:5]
+
+    def render_clock(display):
+        hour, minute = time.localtime()[3:5]
+        display.fill(display.palette[4])
+        display.text(f"{hour}:{minute:02d}", 2, 2, display.palette[7])
+
+    clock = CachedOverlay(0, 0, 48, 12, render_clock, clock_inputs)
+    Display.overlay_callbacks.append(clock.draw)
+
+Key notes on CachedOverlay:
+  - While `render` is running, the display draws into the overlay's buffer,
+    so coordinates are relative to the overlay, and `display.width`/`display.height` are the overlay's size.
+    (Dirty regions and display lists are unaffected.)
+
+  - If `key` is given, the buffer is filled with `key` before rendering,
+    and pixels of that color are left transparent when the overlay is drawn.
+
+  - The buffer uses the same format as the display's framebuffer
+    (width * height * 2 bytes for the normal buffer, or less when using the tiny or 8bit buffer).
+    It's re-rendered if the display's color format changes.
+
+  - `invalidate` forces the overlay to be re-rendered the next time it's drawn.
+"""
+
+import array
+
+import framebuf
+
+
+
+class CachedOverlay:
+    """A pre-rendered overlay, drawn to the display with a single blit."""
+
+    def __init__(self, x: int, y: int, width: int, height: int, render, inputs, *, key: int = -1):
+        """Create the CachedOverlay.
+
+        Args:
+            x (int): The overlay's position on the display.
+            y (int): The overlay's position on the display.
+            width (int): The overlay's width.
+            height (int): The overlay's height.
+            render (callable): Called with the display to draw the overlay.
+            inputs (callable): Called with no args, returning a value that changes when the overlay should be redrawn.
+            key (int): A (display) color to treat as transparent, or -1 for an opaque overlay.
+        """
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.render = render
+        self.inputs = inputs
+        self.key = key
+
+        self.fbuf = None
+        self._format = None
+        self._inputs = None
+        self._valid = False
+        self._saved_rects = None
+
+
+    def invalidate(self):
+        """Re-render the overlay next time it's drawn."""
+        self._valid = False
+
+
+    def _render(self, display):
+        """Draw the overlay into its buffer, by swapping the buffer in for the display's framebuffer."""
+        color_format = display._color_format  # noqa: SLF001
+        if self._format != color_format:
+            if display.use_tiny_buf:
+                size = (self.width + 1) // 2 * self.height
+                buf_format = framebuf.GS4_HMSB
+            elif display.use_8bit_buf:
+                size = self.width * self.height
+                buf_format = framebuf.GS8
+            else:
+                size = self.width * self.height * 2
+                buf_format = framebuf.RGB565
+            self.fbuf = framebuf.FrameBuffer(bytearray(size), self.width, self.height, buf_format)
+            self._format = color_format
+
+        # a background flush reads the display's size, so it must finish before the size is swapped.
+        display.wait_flush()
+        # drawing marks dirty regions (in overlay coordinates), so the real regions are restored after.
+        if self._saved_rects is None:
+            self._saved_rects = array.array('H', display._dirty_rects)  # noqa: SLF001
+        else:
+            self._saved_rects[:] = display._dirty_rects  # noqa: SLF001
+        dirty_count = display._dirty_count  # noqa: SLF001
+        fbuf = display.fbuf
+        width = display.width
+        height = display.height
+        display_list = display.display_list
+
+        display.fbuf = self.fbuf
+        display.width = self.width
+        display.height = self.height
+        display.display_list = None
+        try:
+            self.fbuf.fill(0 if self.key == -1 else self.key)
+            self.render(display)
+        finally:
+            display.fbuf = fbuf
+            display.width = width
+            display.height = height
+            display.display_list = display_list
+            display._dirty_rects[:] = self._saved_rects  # noqa: SLF001
+            display._dirty_count = dirty_count  # noqa: SLF001
+
+
+    def draw(self, display):
+        """Draw the overlay to the display, re-rendering it first if its inputs have changed.
+
+        This can be added to `Display.overlay_callbacks`.
+        """
+        inputs = self.inputs()
+        if not self._valid or inputs != self._inputs or self._format != display._color_format:  # noqa: SLF001
+            self._render(display)
+            self._inputs = inputs
+            self._valid = True
+        display.blit_buffer(self.fbuf, self.x, self.y, self.width, self.height, key=self.key)
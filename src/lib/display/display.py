@@ -2,7 +2,10 @@
 
 import machine
 
+from lib.hydra import bootprofile
+
 from . import st7789
+from .framescheduler import FrameScheduler
 
 
 # ~~~~~ Magic constants:
@@ -42,8 +45,12 @@ class Display(st7789.ST7789):
             self,
             *,
             use_tiny_buf=False,
+            target_fps=0,
             **kwargs):
-        """Initialize the Display."""
+        """Initialize the Display.
+
+        `target_fps` limits how often `show` sends frames (see `Display.frames`, a FrameScheduler).
+        """
         # mh_if TDECK:
         # # Enable Peripherals:
         # machine.Pin(10, machine.Pin.OUT, value=1)
@@ -51,6 +58,8 @@ class Display(st7789.ST7789):
 
         if hasattr(self, 'fbuf'):
             print("WARNING: Display re-initialized.")
+        # (the driver shows the first frame while initializing)
+        self.frames = FrameScheduler(target_fps)
         super().__init__(
             machine.SPI(
                 _MH_DISPLAY_SPI_ID,
@@ -71,6 +80,7 @@ class Display(st7789.ST7789):
             **kwargs,
             )
         Display.draw_overlays = True  # Draw all overlays once on the first show()
+        bootprofile.display_ready()
 
 
     @staticmethod
@@ -88,8 +98,20 @@ class Display(st7789.ST7789):
 
 
     def show(self):
-        """Write changes to display."""
+        """Write changes to display.
+
+        If `frames.target_fps` is set, this waits for the next frame to be due (or skips early frames).
+        """
+        if not self.frames.begin(bool(self._dirty_count) or Display.draw_overlays):
+            return
         if Display.draw_overlays:
             self._draw_overlays()
             Display.draw_overlays = False
         super().show()
+        if self._async_flush:
+            # this frame is still being written, so report the time the last one took to write
+            self.frames.end(self._flush_us)
+        else:
+            self.frames.end()
+        if bootprofile.waiting_for_show:
+            bootprofile.finish()
@@ -1,8 +1,12 @@
 """The heart of MicroHydra graphics functionality."""
 
 
+import array
 import framebuf
 from .palette import Palette
+from .displaylist import DisplayList
+from .preparedpalette import PreparedPalette
+from .textcache import TextCache
 import lib.hydra.config
 from lib.hydra.utils import get_instance
 from machine import PWM
@@ -14,6 +18,38 @@ from machine import PWM
 # mh_end_if
 
 
+# Maximum number of separate dirty regions tracked between calls to `show`.
+# When this is exceeded, the cheapest pair of regions are merged.
+_MAX_DIRTY_RECTS = const(6)
+# Two regions are merged if the combined region is at most this many pixels
+# larger than the originals. (Sending a new window to the display has a fixed cost.)
+_DIRTY_MERGE_SLACK = const(512)
+
+# Maximum number of formatted bitmap palettes to keep. (The cache is cleared when this is exceeded.)
+_PALETTE_CACHE_SIZE = const(16)
+
+# SpriteAtlas frame encodings
+_SPRITE_RAW = const(0)
+_SPRITE_RLE = const(1)
+_SPRITE_PALETTE_RUN = const(2)
+
+# Batch drawing kinds (and the number of values per item)
+_BATCH_PIXELS = const(0)  # x, y
+_BATCH_HLINES = const(1)  # x, y, length
+_BATCH_RECTS = const(2)  # x, y, width, height
+_BATCH_LINES = const(3)  # x0, y0, x1, y1
+
+# Blending uses 4 bit alpha (0 is transparent, 15 is opaque).
+_ALPHA_OPAQUE = const(15)
+_ALPHA_DOUBLE = const(_ALPHA_OPAQUE * 2)
+# In the indexed (tiny/8bit) buffers colors can't be blended, so pixels are drawn when alpha reaches this.
+_ALPHA_THRESHOLD = const(8)
+# Blend table layout: for each alpha, 32 red, 64 green, then 32 blue values
+_BLEND_ROW = const(128)
+_BLEND_GREEN = const(32)
+_BLEND_BLUE = const(96)
+
+
 
 class DisplayCore:
     """The core graphical functionality for the Display module.
@@ -32,8 +68,12 @@ class DisplayCore:
             rotation: int = 0,
             backlight = None,
             use_tiny_buf: bool = False,
+            use_8bit_buf: bool = False,
+            use_display_list: bool = False,
+            display_list_lines: int = 16,
             reserved_bytearray: bytearray|None = None,
             needs_swap: bool = True,
+            text_cache_size: int = 4096,
             **kwargs):  # noqa: ARG002
         """Create the DisplayCore.
 
@@ -46,46 +86,97 @@ class DisplayCore:
             use_tiny_buf (bool):
                 Whether or not to use a smaller, 4bit framebuffer (rather than 16 bit).
                 If True, frame is stored in 4bits and converted line-by-line when `show` is called.
+            use_8bit_buf (bool):
+                Whether or not to use an 8bit, 256 color framebuffer (rather than 16 bit).
+                If True, frame is stored as palette indices, and the palette is expanded to 256 colors.
+                Takes half the memory of the 16 bit framebuffer, with many more colors than `use_tiny_buf`.
+            use_display_list (bool):
+                Whether or not to record drawing operations rather than drawing them immediately.
+                If True, the framebuffer only holds `display_list_lines` lines,
+                and the recorded operations are redrawn into it one band at a time when `show` is called.
+            display_list_lines (int):
+                The number of lines in each band, when `use_display_list` is True.
             reserved_bytearray (bytearray|None):
                 A pre-allocated byte array to use for the framebuffer (rather than creating one on init).
             needs_swap (bool):
                 Whether or not the RGB565 bytes must be swapped to show up correctly on the display.
+            text_cache_size (int):
+                The number of bytes to use for caching pre-rendered text (or 0 to disable the text cache).
             **kwargs (Any):
                 Any other kwargs are captured and ignored.
                 This is an effort to allow any future/additional versions of this module to be more compatible.
         """
+        # height and width are swapped when rotation is 1 or 3
+        fbuf_width = height if (rotation % 2 == 1) else width
+        fbuf_height = width if (rotation % 2 == 1) else height
+        if use_display_list:
+            # only one band of lines is stored at a time
+            fbuf_height = display_list_lines
+
         #init the fbuf
         if reserved_bytearray is None:
             # use_tiny_fbuf tells us to use a smaller framebuffer (4 bits per pixel rather than 16 bits)
             if use_tiny_buf:
                 # round width up to 8 bits
-                size = (height * width) // 2 if (width % 8 == 0) else (height * (width + 1)) // 2
+                size = (fbuf_height * fbuf_width) // 2 if (fbuf_width % 8 == 0) \
+                    else (fbuf_height * (fbuf_width + 1)) // 2
                 reserved_bytearray = bytearray(size)
+            elif use_8bit_buf:
+                reserved_bytearray = bytearray(fbuf_height*fbuf_width)
             else: # full sized buffer
-                reserved_bytearray = bytearray(height*width*2)
+                reserved_bytearray = bytearray(fbuf_height*fbuf_width*2)
 
         self.fbuf = framebuf.FrameBuffer(
             reserved_bytearray,
-            # height and width are swapped when rotation is 1 or 3
-            height if (rotation % 2 == 1) else width,
-            width if (rotation % 2 == 1) else height,
+            fbuf_width,
+            fbuf_height,
             # use_tiny_fbuf uses GS4 format for less memory usage
-            framebuf.GS4_HMSB if use_tiny_buf else framebuf.RGB565,
+            framebuf.GS4_HMSB if use_tiny_buf else framebuf.GS8 if use_8bit_buf else framebuf.RGB565,
             )
         self.config = get_instance(lib.hydra.config.Config)
         self.palette = get_instance(Palette)
-        self.palette.use_tiny_buf = self.use_tiny_buf = use_tiny_buf
-
-        # keep track of min/max y vals for writing to display
-        # this speeds up drawing significantly.
-        # only y value is currently used, because framebuffer is stored in horizontal lines,
-        # making y slices much simpler than x slices.
-        self._show_y_min = width if (rotation % 2 == 1) else height
-        self._show_y_max = 0
+        self.use_tiny_buf = use_tiny_buf
+        self.use_8bit_buf = use_8bit_buf and not use_tiny_buf
+        # both indexed modes use palette indices rather than RGB565 colors
+        self.palette.use_tiny_buf = use_tiny_buf or self.use_8bit_buf
+        if self.use_8bit_buf:
+            self.palette.expand_to_256()
+
+        # keep track of the regions that have been drawn to, for writing to the display.
+        # Each region is stored as 4 values (x0, y0, x1, y1), with exclusive x1/y1.
+        # Only sending changed regions to the display speeds up drawing significantly.
+        self._dirty_rects = array.array('H', bytes(_MAX_DIRTY_RECTS * 8))
+        self._dirty_count = 0
+
+        # When using a display list, drawing methods record themselves here instead of drawing.
+        self.display_list = DisplayList() if use_display_list else None
+        self.display_list_lines = display_list_lines
 
         self.width = width
         self.height = height
         self.needs_swap = needs_swap
+        # Bitmap palettes must be formatted for the framebuffer before drawing.
+        # Formatted palettes are cached by their contents, and only valid for this color format.
+        self._color_format = (self.use_tiny_buf, self.use_8bit_buf, needs_swap)
+        self._palette_cache = {}
+        # the most recently used palette (and its formatted colors), checked before the cache
+        self._last_palette = None
+        self._last_formatted = None
+        # reused by `_bitmap` for unpacking and scaling bitmap rows
+        self._bitmap_buf = bytearray(0)
+        # decoder position for `sprite` (x, row, bits left in byte, byte)
+        self._sprite_state = array.array('i', (0, 0, 0, 0))
+        # combined bounds of the items in a batch (x0, y0, x1, y1)
+        self._batch_bounds = array.array('i', (0, 0, 0, 0))
+        # blend tables for the last color blended (allocated on first use)
+        self._blend_lut = None
+        self._blend_color = -1
+        # recently drawn text is kept as 1-bit masks, and blitted using a 2-color palette (transparent, color)
+        self.text_cache = TextCache(text_cache_size) if text_cache_size else None
+        self._text_palette = framebuf.FrameBuffer(
+            bytearray(4), 2, 1,
+            framebuf.GS4_HMSB if use_tiny_buf else framebuf.GS8 if self.use_8bit_buf else framebuf.RGB565,
+        )
         self.backlight = PWM(backlight, freq=1000, duty_u16=0) if backlight is not None else None
 
 
@@ -100,40 +191,175 @@ class DisplayCore:
 
 
     def reset_show_y(self) -> tuple[int, int]:
-        """Return and reset y boundaries."""
-        # clamp min and max
-        y_min = max(self._show_y_min, 0)
-        y_max = min(self._show_y_max, self.height)
-
-        self._show_y_min = self.height
-        self._show_y_max = 0
+        """Return and reset y boundaries.
 
+        This returns the vertical bounds of all dirty regions,
+        and is kept for compatibility with older display drivers.
+        """
+        y_min = self.height
+        y_max = 0
+        rects = self._dirty_rects
+        for i in range(0, self._dirty_count * 4, 4):
+            y_min = min(y_min, rects[i + 1])
+            y_max = max(y_max, rects[i + 3])
+        self._dirty_count = 0
         return y_min, y_max
 
 
-    @micropython.viper
     def _set_show_y(self, y0: int, y1: int):
-        """Set/store minimum and maximum Y to show next time show() is called."""
-        y_min = int(self._show_y_min)
-        y_max = int(self._show_y_max)
+        """Mark full-width rows from y0 to y1 to be shown next time show() is called."""
+        self._mark_dirty(0, y0, self.width, y1)
+
+
+    @micropython.viper
+    def _mark_dirty(self, x0: int, y0: int, x1: int, y1: int):
+        """Add the given region (with exclusive x1/y1) to the regions to show next time show() is called.
 
-        if y_min > y0:
-            y_min = y0
-        if y_max < y1:
-            y_max = y1
+        Overlapping or nearby regions are merged together,
+        and when too many regions are stored, the cheapest pair is merged.
+        """
+        width = int(self.width)
+        height = int(self.height)
+
+        # clamp region to the display
+        x0 = 0 if x0 < 0 else x0
+        y0 = 0 if y0 < 0 else y0
+        x1 = width if x1 > width else x1
+        y1 = height if y1 > height else y1
+        if x0 >= x1 or y0 >= y1:
+            return
 
-        self._show_y_min = y_min
-        self._show_y_max = y_max
+        rects = ptr16(self._dirty_rects)
+        count = int(self._dirty_count)
+
+        while True:
+            # merge with any region that is close enough to be worth combining.
+            # the new region grows each time, so we restart the search after each merge.
+            idx = 0
+            while idx < count:
+                i = idx * 4
+                rx0 = int(rects[i]); ry0 = int(rects[i + 1]); rx1 = int(rects[i + 2]); ry1 = int(rects[i + 3])
+
+                ux0 = x0 if x0 < rx0 else rx0
+                uy0 = y0 if y0 < ry0 else ry0
+                ux1 = x1 if x1 > rx1 else rx1
+                uy1 = y1 if y1 > ry1 else ry1
+
+                union_area = (ux1 - ux0) * (uy1 - uy0)
+                separate_area = (x1 - x0) * (y1 - y0) + (rx1 - rx0) * (ry1 - ry0)
+
+                if union_area <= separate_area + _DIRTY_MERGE_SLACK:
+                    x0 = ux0; y0 = uy0; x1 = ux1; y1 = uy1
+                    # remove merged region by moving the last region into its slot
+                    count -= 1
+                    last = count * 4
+                    rects[i] = rects[last]
+                    rects[i + 1] = rects[last + 1]
+                    rects[i + 2] = rects[last + 2]
+                    rects[i + 3] = rects[last + 3]
+                    idx = 0
+                else:
+                    idx += 1
+
+            if count < _MAX_DIRTY_RECTS:
+                break
+
+            # No space left. Merge into the region that grows the least.
+            best_idx = 0
+            best_cost = 0x3fffffff
+            idx = 0
+            while idx < count:
+                i = idx * 4
+                rx0 = int(rects[i]); ry0 = int(rects[i + 1]); rx1 = int(rects[i + 2]); ry1 = int(rects[i + 3])
+                ux0 = x0 if x0 < rx0 else rx0
+                uy0 = y0 if y0 < ry0 else ry0
+                ux1 = x1 if x1 > rx1 else rx1
+                uy1 = y1 if y1 > ry1 else ry1
+                cost = (ux1 - ux0) * (uy1 - uy0) - (rx1 - rx0) * (ry1 - ry0)
+                if cost < best_cost:
+                    best_cost = cost
+                    best_idx = idx
+                idx += 1
+
+            i = best_idx * 4
+            rx0 = int(rects[i]); ry0 = int(rects[i + 1]); rx1 = int(rects[i + 2]); ry1 = int(rects[i + 3])
+            x0 = x0 if x0 < rx0 else rx0
+            y0 = y0 if y0 < ry0 else ry0
+            x1 = x1 if x1 > rx1 else rx1
+            y1 = y1 if y1 > ry1 else ry1
+            count -= 1
+            last = count * 4
+            rects[i] = rects[last]
+            rects[i + 1] = rects[last + 1]
+            rects[i + 2] = rects[last + 2]
+            rects[i + 3] = rects[last + 3]
+
+        i = count * 4
+        rects[i] = x0
+        rects[i + 1] = y0
+        rects[i + 2] = x1
+        rects[i + 3] = y1
+        self._dirty_count = count + 1
+
+
+    def _render_band(self, band_y: int) -> int:
+        """Draw the display list into the framebuffer, for the band of lines starting at band_y.
+
+        Returns the number of lines in the band.
+        """
+        display_list = self.display_list
+        height = self.height
+        band_lines = min(self.display_list_lines, height - band_y)
+
+        # Drawing methods draw normally (rather than recording) while display_list is None,
+        # and clip to the band while height is set to the band height.
+        self.display_list = None
+        self.height = band_lines
+        try:
+            self.fbuf.fill(0)
+            display_list.replay(self, band_y, band_y + band_lines)
+        finally:
+            self.display_list = display_list
+            self.height = height
+        return band_lines
 
 
     @micropython.viper
     def _format_color(self, color: int) -> int:
         """Swap color bytes if needed, do nothing otherwise."""
-        if (not self.use_tiny_buf) and self.needs_swap:
+        if (not self.use_tiny_buf) and (not self.use_8bit_buf) and self.needs_swap:
             color = ((color & 0xff) << 8) | (color >> 8)
         return color
 
 
+    def _format_palette(self, colors) -> array.array:
+        """Format each color in the given palette, returning an array for use with `ptr16`."""
+        return array.array('H', [self._format_color(color) for color in colors])
+
+
+    def _prepare_palette(self, palette) -> array.array:
+        """Get the formatted colors for a bitmap palette, using the cache when possible.
+
+        Redrawing with the same palette object is checked first, without building a cache key.
+        (So a palette list that is changed in place isn't re-formatted; pass a new list instead.)
+        """
+        if palette is self._last_palette:
+            return self._last_formatted
+        if isinstance(palette, PreparedPalette):
+            return palette.prepare(self)
+
+        key = tuple(palette)
+        formatted = self._palette_cache.get(key)
+        if formatted is None:
+            if len(self._palette_cache) >= _PALETTE_CACHE_SIZE:
+                self._palette_cache.clear()
+            formatted = self._format_palette(key)
+            self._palette_cache[key] = formatted
+        self._last_palette = palette
+        self._last_formatted = formatted
+        return formatted
+
+
     def blit_buffer(
             self,
             buffer: bytearray|framebuf.FrameBuffer,
@@ -155,12 +381,15 @@ class DisplayCore:
             key (int): color to be considered transparent
             palette (framebuf): the color pallete to use for the buffer
         """
-        self._set_show_y(y, y + height)
+        self._mark_dirty(x, y, x + width, y + height)
         if not isinstance(buffer, framebuf.FrameBuffer):
             buffer = framebuf.FrameBuffer(
                 buffer, width, height,
-                framebuf.GS4_HMSB if self.use_tiny_buf else framebuf.RGB565,
+                framebuf.GS4_HMSB if self.use_tiny_buf else framebuf.GS8 if self.use_8bit_buf else framebuf.RGB565,
                 )
+        if self.display_list is not None:
+            self.display_list.blit_buffer(buffer, x, y, width, height, key, palette)
+            return
 
         self.fbuf.blit(buffer, x, y, key, palette)
 
@@ -175,7 +404,10 @@ class DisplayCore:
             color (int): 565 encoded color
         """
         # whole display must show
-        self._set_show_y(0, self.height)
+        self._mark_dirty(0, 0, self.width, self.height)
+        if self.display_list is not None:
+            self.display_list.fill(color)
+            return
         color = self._format_color(color)
         self.fbuf.fill(color)
 
@@ -188,7 +420,10 @@ class DisplayCore:
             Y (int): y coordinate
             color (int): 565 encoded color
         """
-        self._set_show_y(y, y)
+        self._mark_dirty(x, y, x + 1, y + 1)
+        if self.display_list is not None:
+            self.display_list.pixel(x, y, color)
+            return
         color = self._format_color(color)
         self.fbuf.pixel(x,y,color)
 
@@ -202,7 +437,10 @@ class DisplayCore:
             length (int): length of line
             color (int): 565 encoded color
         """
-        self._set_show_y(y, y + length)
+        self._mark_dirty(x, y, x + 1, y + length)
+        if self.display_list is not None:
+            self.display_list.vline(x, y, length, color)
+            return
         color = self._format_color(color)
         self.fbuf.vline(x, y, length, color)
 
@@ -216,7 +454,10 @@ class DisplayCore:
             length (int): length of line
             color (int): 565 encoded color
         """
-        self._set_show_y(y, y+1)
+        self._mark_dirty(x, y, x + length, y + 1)
+        if self.display_list is not None:
+            self.display_list.hline(x, y, length, color)
+            return
         color = self._format_color(color)
         self.fbuf.hline(x, y, length, color)
 
@@ -232,10 +473,15 @@ class DisplayCore:
             y1 (int): End point y coordinate
             color (int): 565 encoded color
         """
-        self._set_show_y(
-            min(y0,y1),
-            max(y0,y1),
+        self._mark_dirty(
+            min(x0, x1),
+            min(y0, y1),
+            max(x0, x1) + 1,
+            max(y0, y1) + 1,
         )
+        if self.display_list is not None:
+            self.display_list.line(x0, y0, x1, y1, color)
+            return
         color = self._format_color(color)
         self.fbuf.line(x0, y0, x1, y1, color)
 
@@ -250,7 +496,10 @@ class DisplayCore:
             height (int): Height in pixels
             color (int): 565 encoded color
         """
-        self._set_show_y(y, y + h)
+        self._mark_dirty(x, y, x + w, y + h)
+        if self.display_list is not None:
+            self.display_list.rect(x, y, w, h, color, fill)
+            return
         color = self._format_color(color)
         self.fbuf.rect(x,y,w,h,color,fill)
 
@@ -275,7 +524,10 @@ class DisplayCore:
             color (int): 565 encoded color
             fill (bool): fill in the ellipse. Default is False
         """
-        self._set_show_y(y - yr, y + yr + 1)
+        self._mark_dirty(x - xr, y - yr, x + xr + 1, y + yr + 1)
+        if self.display_list is not None:
+            self.display_list.ellipse(x, y, xr, yr, color, fill, m)
+            return
         color = self._format_color(color)
         self.fbuf.ellipse(x,y,xr,yr,color,fill,m)
 
@@ -290,9 +542,13 @@ class DisplayCore:
             color (int): Color of polygon
             fill (bool=False) : fill the polygon (or draw an outline)
         """
-        # calculate approx height so min/max can be set
-        h = max(coords)
-        self._set_show_y(y, y + h)
+        # calculate approx bounds so the dirty region can be set
+        lo = min(coords)
+        hi = max(coords) + 1
+        self._mark_dirty(x + lo, y + lo, x + hi, y + hi)
+        if self.display_list is not None:
+            self.display_list.polygon(coords, x, y, color, fill)
+            return
         color = self._format_color(color)
         self.fbuf.poly(x, y, coords, color, fill)
 
@@ -305,10 +561,400 @@ class DisplayCore:
             xstep (int): Distance to move fbuf to the right
             ystep (int): Distance to move fbuf down
         """
-        self._set_show_y(0, self.height)
+        self._mark_dirty(0, 0, self.width, self.height)
+        if self.display_list is not None:
+            self.display_list.scroll(xstep, ystep)
+            return
         self.fbuf.scroll(xstep,ystep)
 
 
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Batch Drawing: ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def pixels(self, coords, x: int, y: int, color):
+        """Draw many pixels at once.
+
+        Args:
+            coords (array('h')): x/y pairs for each pixel
+            x (int): distance to move every pixel right
+            y (int): distance to move every pixel down
+            color (int|array('H')): 565 encoded color, or an array with a color for each pixel
+        """
+        self._batch(_BATCH_PIXELS, coords, x, y, color, False)
+
+
+    def hlines(self, coords, x: int, y: int, color):
+        """Draw many horizontal lines at once.
+
+        Args:
+            coords (array('h')): x/y/length for each line
+            x (int): distance to move every line right
+            y (int): distance to move every line down
+            color (int|array('H')): 565 encoded color, or an array with a color for each line
+        """
+        self._batch(_BATCH_HLINES, coords, x, y, color, False)
+
+
+    def rects(self, coords, x: int, y: int, color, fill: bool = False):  # noqa: FBT002
+        """Draw many rectangles at once.
+
+        Args:
+            coords (array('h')): x/y/width/height for each rectangle
+            x (int): distance to move every rectangle right
+            y (int): distance to move every rectangle down
+            color (int|array('H')): 565 encoded color, or an array with a color for each rectangle
+            fill (bool=False): fill the rectangles (or draw outlines)
+        """
+        self._batch(_BATCH_RECTS, coords, x, y, color, fill)
+
+
+    def lines(self, coords, x: int, y: int, color):
+        """Draw many single pixel wide lines at once.
+
+        Args:
+            coords (array('h')): x0/y0/x1/y1 for each line
+            x (int): distance to move every line right
+            y (int): distance to move every line down
+            color (int|array('H')): 565 encoded color, or an array with a color for each line
+        """
+        self._batch(_BATCH_LINES, coords, x, y, color, False)
+
+
+    def _batch(self, kind: int, coords, x: int, y: int, color, fill: bool):
+        """Draw a batch of items, marking their combined bounds as dirty."""
+        bounds = self._batch_bounds
+        if not self._get_batch_bounds(coords, kind, bounds):
+            return
+        self._mark_dirty(bounds[0] + x, bounds[1] + y, bounds[2] + x, bounds[3] + y)
+        if self.display_list is not None:
+            self.display_list.batch(kind, coords, x, y, color, fill, bounds[1] + y, bounds[3] + y)
+            return
+
+        # per-item colors are formatted as they're drawn
+        swap = (not self.use_tiny_buf) and (not self.use_8bit_buf) and self.needs_swap
+        if isinstance(color, int):
+            colors = coords
+            use_colors = False
+            color = self._format_color(color)
+        else:
+            colors = color
+            use_colors = True
+            color = 0
+
+        if kind <= _BATCH_HLINES:
+            self._batch_spans(coords, kind == _BATCH_HLINES, x, y, color, colors, use_colors, swap)
+        else:
+            self._batch_shapes(coords, kind == _BATCH_LINES, x, y, color, colors, use_colors, swap, fill)
+
+
+    @staticmethod
+    @micropython.viper
+    def _get_batch_bounds(coords, kind: int, bounds) -> bool:
+        """Store the combined (exclusive) bounds of a batch in `bounds`. Returns False for an empty batch."""
+        src = ptr16(coords)
+        out = ptr32(bounds)
+        stride = 2 if kind == _BATCH_PIXELS else 3 if kind == _BATCH_HLINES else 4
+        end = (int(len(coords)) // stride) * stride
+        if end == 0:
+            return False
+
+        x0 = 0x7fff; y0 = 0x7fff; x1 = -0x8000; y1 = -0x8000
+        idx = 0
+        while idx < end:
+            # sign extend the (unsigned) 16 bit values
+            ax = (int(src[idx]) ^ 0x8000) - 0x8000
+            ay = (int(src[idx + 1]) ^ 0x8000) - 0x8000
+            if kind == _BATCH_PIXELS:
+                bx = ax + 1
+                by = ay + 1
+            elif kind == _BATCH_HLINES:
+                bx = ax + ((int(src[idx + 2]) ^ 0x8000) - 0x8000)
+                by = ay + 1
+            elif kind == _BATCH_RECTS:
+                bx = ax + ((int(src[idx + 2]) ^ 0x8000) - 0x8000)
+                by = ay + ((int(src[idx + 3]) ^ 0x8000) - 0x8000)
+            else:
+                bx = (int(src[idx + 2]) ^ 0x8000) - 0x8000
+                by = (int(src[idx + 3]) ^ 0x8000) - 0x8000
+                if bx < ax:
+                    tmp = ax; ax = bx; bx = tmp
+                if by < ay:
+                    tmp = ay; ay = by; by = tmp
+                bx += 1
+                by += 1
+
+            x0 = ax if ax < x0 else x0
+            y0 = ay if ay < y0 else y0
+            x1 = bx if bx > x1 else x1
+            y1 = by if by > y1 else y1
+            idx += stride
+
+        out[0] = x0
+        out[1] = y0
+        out[2] = x1
+        out[3] = y1
+        return True
+
+
+    @micropython.viper
+    def _batch_spans(self, coords, hlines: bool, x: int, y: int, color: int, colors, use_colors: bool, swap: bool):
+        """Draw a batch of pixels or horizontal lines directly into the framebuffer (clipped to the display)."""
+        self_width = int(self.width)
+        self_height = int(self.height)
+        use_tiny_fbuf = bool(self.use_tiny_buf)
+        use_8bit_fbuf = bool(self.use_8bit_buf)
+        fbuf16 = ptr16(self.fbuf)
+        fbuf8 = ptr8(self.fbuf)
+        src = ptr16(coords)
+        cols = ptr16(colors)
+        stride = 3 if hlines else 2
+        count = int(len(coords)) // stride
+        # tiny buf packs 2 pixels per byte, and each row starts on a new byte
+        tiny_stride = (self_width + 1) >> 1
+
+        item = 0
+        idx = 0
+        while item < count:
+            px = ((int(src[idx]) ^ 0x8000) - 0x8000) + x
+            py = ((int(src[idx + 1]) ^ 0x8000) - 0x8000) + y
+            end = px + (((int(src[idx + 2]) ^ 0x8000) - 0x8000) if hlines else 1)
+            clr = color
+            if use_colors:
+                clr = int(cols[item])
+                if swap:
+                    clr = ((clr & 0xff) << 8) | (clr >> 8)
+            item += 1
+            idx += stride
+
+            # clip to the display
+            if py < 0 or py >= self_height:
+                continue
+            px = 0 if px < 0 else px
+            end = self_width if end > self_width else end
+            if px >= end:
+                continue
+
+            if use_tiny_fbuf:
+                row = py * tiny_stride
+                clr_lo = clr & 0xf
+                clr_hi = clr_lo << 4
+                while px < end:
+                    byte_idx = row + (px >> 1)
+                    if px & 1:
+                        fbuf8[byte_idx] = (fbuf8[byte_idx] & 0xf0) | clr_lo
+                    else:
+                        fbuf8[byte_idx] = (fbuf8[byte_idx] & 0x0f) | clr_hi
+                    px += 1
+                continue
+
+            row = py * self_width
+            px += row
+            end += row
+            if use_8bit_fbuf:
+                while px < end:
+                    fbuf8[px] = clr
+                    px += 1
+            else:
+                while px < end:
+                    fbuf16[px] = clr
+                    px += 1
+
+
+    @micropython.viper
+    def _batch_shapes(
+            self, coords, lines: bool, x: int, y: int, color: int, colors, use_colors: bool, swap: bool, fill: bool):
+        """Draw a batch of lines or rectangles, using the framebuffer's (native) drawing methods."""
+        fbuf = self.fbuf
+        src = ptr16(coords)
+        cols = ptr16(colors)
+        count = int(len(coords)) >> 2
+
+        item = 0
+        idx = 0
+        while item < count:
+            ax = ((int(src[idx]) ^ 0x8000) - 0x8000) + x
+            ay = ((int(src[idx + 1]) ^ 0x8000) - 0x8000) + y
+            bx = (int(src[idx + 2]) ^ 0x8000) - 0x8000
+            by = (int(src[idx + 3]) ^ 0x8000) - 0x8000
+            clr = color
+            if use_colors:
+                clr = int(cols[item])
+                if swap:
+                    clr = ((clr & 0xff) << 8) | (clr >> 8)
+
+            if lines:
+                fbuf.line(ax, ay, bx + x, by + y, clr)
+            else:
+                fbuf.rect(ax, ay, bx, by, clr, fill)
+            item += 1
+            idx += 4
+
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Blending: ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def blend_rect(self, x: int, y: int, w: int, h: int, color: int, alpha: int):
+        """Blend a color over a rectangle of the display (for shadows, fades, and tinted panels).
+
+        When using the tiny or 8bit buffer, colors can't be blended,
+        so the rectangle is filled if alpha is at least 8, and skipped otherwise.
+
+        Args:
+            x (int): Top left corner x coordinate
+            y (int): Top left corner y coordinate
+            w (int): Width in pixels
+            h (int): Height in pixels
+            color (int): 565 encoded color
+            alpha (int): Opacity, from 0 (transparent) to 15 (opaque)
+        """
+        if alpha <= 0:
+            return
+        if alpha >= _ALPHA_OPAQUE:
+            self.rect(x, y, w, h, color, fill=True)
+            return
+        self._mark_dirty(x, y, x + w, y + h)
+        if self.display_list is not None:
+            self.display_list.blend_rect(x, y, w, h, color, alpha)
+            return
+        self._blend(None, x, y, w, h, color, alpha)
+
+
+    def blit_blend(self, mask, x: int, y: int, width: int, height: int, color: int):
+        """Blend a color onto the display through a 4 bit alpha mask (for anti-aliased shapes and glyphs).
+
+        The mask uses the same layout as a `framebuf.GS4_HMSB` buffer
+        (2 pixels per byte, with the left pixel in the high 4 bits, and each row starting on a new byte).
+        When using the tiny or 8bit buffer, pixels are drawn if their alpha is at least 8.
+
+        Args:
+            mask (bytearray|framebuf.FrameBuffer): Alpha values, from 0 (transparent) to 15 (opaque)
+            x (int): Top left corner x coordinate
+            y (int): Top left corner y coordinate
+            width (int): Width of the mask
+            height (int): Height of the mask
+            color (int): 565 encoded color
+        """
+        self._mark_dirty(x, y, x + width, y + height)
+        if self.display_list is not None:
+            self.display_list.blit_blend(mask, x, y, width, height, color)
+            return
+        self._blend(mask, x, y, width, height, color, 0)
+
+
+    def _blend(self, mask, x: int, y: int, width: int, height: int, color: int, alpha: int):
+        """Blend a color over the framebuffer, with a constant alpha or an alpha mask (if mask is not None)."""
+        # (indexed buffers draw the color as-is, so the blend tables aren't read)
+        lut = self.fbuf if self.use_tiny_buf or self.use_8bit_buf else self._blend_tables(color)
+        self._blend_pixels(
+            mask if mask is not None else lut, mask is not None,
+            x, y, width, height, self._format_color(color), alpha, lut,
+        )
+
+
+    def _blend_tables(self, color: int) -> bytearray:
+        """Get the blend tables for the given color (they're kept for the last color used)."""
+        if self._blend_lut is None:
+            self._blend_lut = bytearray(_BLEND_ROW * (_ALPHA_OPAQUE + 1))
+            self._blend_color = -1
+        if color != self._blend_color:
+            self._fill_blend_tables(self._blend_lut, color)
+            self._blend_color = color
+        return self._blend_lut
+
+
+    @staticmethod
+    @micropython.viper
+    def _fill_blend_tables(lut, color: int):
+        """Fill the blend tables, giving the blended value of each channel, for each alpha and display value.
+
+        For each alpha, the tables hold `round((color * alpha + value * (15 - alpha)) / 15)`
+        for each possible red (5 bit), green (6 bit), and blue (5 bit) value.
+        """
+        out = ptr8(lut)
+        src_r = (color >> 11) & 0x1f
+        src_g = (color >> 5) & 0x3f
+        src_b = color & 0x1f
+
+        alpha = 0
+        while alpha <= _ALPHA_OPAQUE:
+            row = alpha * _BLEND_ROW
+            inv = _ALPHA_OPAQUE - alpha
+            val = 0
+            while val < 64:
+                # (doubled, to round to the nearest value)
+                if val < 32:
+                    out[row + val] = ((src_r * alpha + val * inv) * 2 + _ALPHA_OPAQUE) // _ALPHA_DOUBLE
+                    out[row + _BLEND_BLUE + val] = ((src_b * alpha + val * inv) * 2 + _ALPHA_OPAQUE) // _ALPHA_DOUBLE
+                out[row + _BLEND_GREEN + val] = ((src_g * alpha + val * inv) * 2 + _ALPHA_OPAQUE) // _ALPHA_DOUBLE
+                val += 1
+            alpha += 1
+
+
+    @micropython.viper
+    def _blend_pixels(
+            self, mask, use_mask: bool, x: int, y: int, width: int, height: int, color: int, alpha: int, lut):
+        """Blend the (clipped) region, reading alpha from the mask (when use_mask is True), or using `alpha`."""
+        self_width = int(self.width)
+        self_height = int(self.height)
+        use_tiny_fbuf = bool(self.use_tiny_buf)
+        use_8bit_fbuf = bool(self.use_8bit_buf)
+        swap = bool(self.needs_swap)
+        fbuf16 = ptr16(self.fbuf)
+        fbuf8 = ptr8(self.fbuf)
+        alphas = ptr8(mask)
+        table = ptr8(lut)
+        mask_stride = (width + 1) >> 1
+        # tiny buf packs 2 pixels per byte, and each row starts on a new byte
+        tiny_stride = (self_width + 1) >> 1
+
+        # clip to the display
+        col_start = 0 if x >= 0 else -x
+        col_end = width if (x + width) <= self_width else self_width - x
+        row = 0 if y >= 0 else -y
+        row_end = height if (y + height) <= self_height else self_height - y
+        if col_start >= col_end:
+            return
+
+        clr_lo = color & 0xf
+        clr_hi = clr_lo << 4
+
+        while row < row_end:
+            col = col_start
+            px = (y + row) * self_width + x + col
+            while col < col_end:
+                if use_mask:
+                    byte = int(alphas[row * mask_stride + (col >> 1)])
+                    alpha = (byte & 0xf) if col & 1 else (byte >> 4)
+
+                if alpha == 0:
+                    pass
+                elif use_tiny_fbuf:
+                    if alpha >= _ALPHA_THRESHOLD:
+                        px_x = x + col
+                        idx = (y + row) * tiny_stride + (px_x >> 1)
+                        if px_x & 1:
+                            fbuf8[idx] = (fbuf8[idx] & 0xf0) | clr_lo
+                        else:
+                            fbuf8[idx] = (fbuf8[idx] & 0x0f) | clr_hi
+                elif use_8bit_fbuf:
+                    if alpha >= _ALPHA_THRESHOLD:
+                        fbuf8[px] = color
+                elif alpha >= _ALPHA_OPAQUE:
+                    fbuf16[px] = color
+                else:
+                    dest = int(fbuf16[px])
+                    if swap:
+                        dest = ((dest & 0xff) << 8) | (dest >> 8)
+                    lut_row = alpha * _BLEND_ROW
+                    dest = (
+                        (int(table[lut_row + (dest >> 11)]) << 11)
+                        | (int(table[lut_row + _BLEND_GREEN + ((dest >> 5) & 0x3f)]) << 5)
+                        | int(table[lut_row + _BLEND_BLUE + (dest & 0x1f)])
+                    )
+                    if swap:
+                        dest = ((dest & 0xff) << 8) | (dest >> 8)
+                    fbuf16[px] = dest
+                col += 1
+                px += 1
+            row += 1
+
+
 
 
     # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Text Drawing: ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -325,21 +971,74 @@ class DisplayCore:
             color (int): encoded color to use for text
             font (optional): bitmap font module to use
         """
+        # (utf8 glyphs are drawn starting one line above y)
+        self._mark_dirty(x, y - 1, x + self.get_total_width(text, font), y + (font.HEIGHT if font else 8))
+        if self.display_list is not None:
+            self.display_list.text(text, x, y, color, font)
+            return
+
         color = self._format_color(color)
 
+        if self.text_cache is not None:
+            mask = self.text_cache.get(self, text, font)
+            if mask is not None:
+                # any other color can be used as the transparent color
+                self._text_palette.pixel(0, 0, color ^ 1)
+                self._text_palette.pixel(1, 0, color)
+                self.fbuf.blit(mask, x, y - 1, color ^ 1, self._text_palette)
+                return
+
         if font:
-            self._set_show_y(y, y + font.HEIGHT)
             self._bitmap_text(font, text, x, y, color)
         else:
-            self._set_show_y(y, y + 8)
             self._utf8_text(text, x, y, color)
 
 
+    def _text_mask(self, text: str, font, width: int, height: int) -> framebuf.FrameBuffer:
+        """Render text into a new 1-bit mask, for the text cache.
+
+        The text is drawn into a scratch 8bit buffer (by temporarily swapping it in for the framebuffer),
+        and then packed into the mask. The mask starts one line above the text, as UTF8 glyphs do.
+        """
+        scratch = framebuf.FrameBuffer(self._bitmap_scratch((width * height + 1) // 2), width, height, framebuf.GS8)
+        scratch.fill(0)
+
+        fbuf = self.fbuf
+        self_width = self.width
+        self_height = self.height
+        use_tiny_buf = self.use_tiny_buf
+        use_8bit_buf = self.use_8bit_buf
+        self.fbuf = scratch
+        self.width = width
+        self.height = height
+        self.use_tiny_buf = False
+        self.use_8bit_buf = True
+        try:
+            if font:
+                self._bitmap_text(font, text, 0, 1, 1)
+            else:
+                self._utf8_text(text, 0, 1, 1)
+        finally:
+            self.fbuf = fbuf
+            self.width = self_width
+            self.height = self_height
+            self.use_tiny_buf = use_tiny_buf
+            self.use_8bit_buf = use_8bit_buf
+
+        mask = framebuf.FrameBuffer(bytearray(((width + 7) >> 3) * height), width, height, framebuf.MONO_HLSB)
+        mask.blit(scratch, 0, 0)
+        return mask
+
+
     @micropython.viper
     def _bitmap_text(self, font, text, x:int, y:int, color:int):
         """Quickly draw a text with a bitmap font using viper.
 
         Designed to be envoked using the 'text' method.
+
+        Each glyph is clipped to the display once, and then drawn row by row.
+        Glyphs that are fully visible (with byte-aligned rows) are read a byte at a time,
+        so that empty bytes can be skipped, and solid bytes can be written as a run.
         """
         width = int(font.WIDTH)
         height = int(font.HEIGHT)
@@ -349,7 +1048,7 @@ class DisplayCore:
         utf8_scale = height // 8
 
         # early return for text off screen
-        if y >= self_height or (y + height) < 0:
+        if y >= self_height or (y + height) <= 0:
             return
 
         glyphs = ptr8(font.FONT)
@@ -360,45 +1059,132 @@ class DisplayCore:
         last = int(font.LAST)
 
         use_tiny_fbuf = bool(self.use_tiny_buf)
+        use_8bit_fbuf = bool(self.use_8bit_buf)
         fbuf16 = ptr16(self.fbuf)
         fbuf8 = ptr8(self.fbuf)
 
+        # tiny buf packs 2 pixels per byte, so we need the color in both nibble positions:
+        color_hi = (color & 0xf) << 4
+        color_lo = color & 0xf
+        color_both = color_hi | color_lo
+        # (and each row starts on a new byte)
+        tiny_stride = (self_width + 1) >> 1
+
+        # Vertical clipping is the same for every glyph
+        row_start = 0 if y >= 0 else -y
+        row_end = height if (y + height) <= self_height else self_height - y
+
+        # When the width is a multiple of 8, each glyph row starts on a new byte
+        aligned = (width % 8) == 0
+
         for char in text:
             ch_idx = int(ord(char))
 
             # only draw chars that exist in font
             if first <= ch_idx < last:
+                # Clip glyph horizontally
+                col_start = 0 if x >= 0 else -x
+                col_end = width if (x + width) <= self_width else self_width - x
                 bit_start = (ch_idx - first) * char_px_len
 
-                px_idx = 0
-                while px_idx < char_px_len:
-                    byte_idx = (px_idx + bit_start) // 8
-                    shift_amount = 7 - ((px_idx + bit_start) % 8)
+                if aligned and col_start == 0 and col_end == width:
+                    # ~~~~~~~~ Fast path for fully visible glyphs: ~~~~~~~~
+                    byte_idx = (bit_start + row_start * width) >> 3
+                    row = row_start
+                    while row < row_end:
+                        px = (y + row) * self_width + x
+                        row_end_px = px + width
+                        # the column of px, and the start of its row in the tiny buf
+                        px_x = x
+                        tiny_row = (y + row) * tiny_stride
+                        while px < row_end_px:
+                            byte = glyphs[byte_idx]
+                            if byte == 0xff and use_8bit_fbuf:
+                                # solid run of 8 pixels, 1 byte each
+                                fbuf8[px] = color
+                                fbuf8[px + 1] = color
+                                fbuf8[px + 2] = color
+                                fbuf8[px + 3] = color
+                                fbuf8[px + 4] = color
+                                fbuf8[px + 5] = color
+                                fbuf8[px + 6] = color
+                                fbuf8[px + 7] = color
+                            elif byte == 0xff and not use_tiny_fbuf:
+                                # write a solid run of 8 pixels
+                                fbuf16[px] = color
+                                fbuf16[px + 1] = color
+                                fbuf16[px + 2] = color
+                                fbuf16[px + 3] = color
+                                fbuf16[px + 4] = color
+                                fbuf16[px + 5] = color
+                                fbuf16[px + 6] = color
+                                fbuf16[px + 7] = color
+                            elif byte == 0xff and (px_x & 1) == 0:
+                                # solid run of 8 pixels is 4 whole bytes in the tiny buf
+                                idx = tiny_row + (px_x >> 1)
+                                fbuf8[idx] = color_both
+                                fbuf8[idx + 1] = color_both
+                                fbuf8[idx + 2] = color_both
+                                fbuf8[idx + 3] = color_both
+                            elif byte:
+                                # write individual bits
+                                mask = 0x80
+                                bit_px = px
+                                if use_tiny_fbuf:
+                                    bit_x = px_x
+                                    while mask:
+                                        if byte & mask:
+                                            idx = tiny_row + (bit_x >> 1)
+                                            if bit_x & 1:
+                                                fbuf8[idx] = (fbuf8[idx] & 0xf0) | color_lo
+                                            else:
+                                                fbuf8[idx] = (fbuf8[idx] & 0x0f) | color_hi
+                                        mask >>= 1
+                                        bit_x += 1
+                                elif use_8bit_fbuf:
+                                    while mask:
+                                        if byte & mask:
+                                            fbuf8[bit_px] = color
+                                        mask >>= 1
+                                        bit_px += 1
+                                else:
+                                    while mask:
+                                        if byte & mask:
+                                            fbuf16[bit_px] = color
+                                        mask >>= 1
+                                        bit_px += 1
+
+                            byte_idx += 1
+                            px += 8
+                            px_x += 8
+                        row += 1
+
+                elif col_start < col_end:
+                    # ~~~~~~~~ Clipped (or unaligned) glyphs are read bit by bit: ~~~~~~~~
+                    row = row_start
+                    while row < row_end:
+                        bit = bit_start + row * width + col_start
+                        px = (y + row) * self_width + x + col_start
+                        row_end_px = px + (col_end - col_start)
+                        px_x = x + col_start
+                        tiny_row = (y + row) * tiny_stride
+                        while px < row_end_px:
+                            if (glyphs[bit >> 3] >> (7 - (bit & 7))) & 1:
+                                if use_tiny_fbuf:
+                                    idx = tiny_row + (px_x >> 1)
+                                    if px_x & 1:
+                                        fbuf8[idx] = (fbuf8[idx] & 0xf0) | color_lo
+                                    else:
+                                        fbuf8[idx] = (fbuf8[idx] & 0x0f) | color_hi
+                                elif use_8bit_fbuf:
+                                    fbuf8[px] = color
+                                else:
+                                    fbuf16[px] = color
+                            bit += 1
+                            px += 1
+                            px_x += 1
+                        row += 1
 
-                    target_x = x + px_idx % width
-                    target_y = y + px_idx // width
-
-                    # dont draw pixels off the screen (ptrs don't check your work!)
-                    if ((glyphs[byte_idx] >> shift_amount) & 0x1) == 1 \
-                    and 0 <= target_x < self_width \
-                    and 0 <= target_y < self_height:
-                        target_px = (target_y * self_width) + target_x
-
-                        # I tried putting this if/else before px loop,
-                        # surprisingly, there was not a noticable speed difference,
-                        # and the code was harder to read. So, I put it back.
-                        if use_tiny_fbuf:
-                            # pack 4 bits into 8 bit ptr
-                            target_idx = target_px // 2
-                            dest_shift = ((target_px + 1) % 2) * 4
-                            dest_mask = 0xf0 >> dest_shift
-                            fbuf8[target_idx] = (fbuf8[target_idx] & dest_mask) | (color << dest_shift)
-                        else:
-                            # draw to 16 bits
-                            target_idx = target_px
-                            fbuf16[target_idx] = color
-
-                    px_idx += 1
                 x += width
             else:
                 # try drawing with utf8 instead
@@ -420,21 +1206,21 @@ class DisplayCore:
 
         # set up viper variables
         use_tiny_fbuf = bool(self.use_tiny_buf)
+        use_8bit_fbuf = bool(self.use_8bit_buf)
         fbuf16 = ptr16(self.fbuf)
         fbuf8 = ptr8(self.fbuf)
         self_width = int(self.width)
         self_height = int(self.height)
-
-        # calculate the offset in the binary data
-        offset = char * 8
+        tiny_stride = (self_width + 1) >> 1
 
         # mh_if frozen:
         # # Read the font data directly from the memoryview
         # cur = ptr8(utf8)
+        # offset = int(self._utf8_glyph_offset(utf8, char))
         # mh_else:
-        # seek to offset and read 8 bytes
-        self.utf8_font.seek(offset)
-        cur = ptr8(self.utf8_font.read(8))
+        # Get the glyph from the glyph cache (this only reads from the font file on a cache miss)
+        offset = int(self.utf8_font.get(char)) * 8
+        cur = ptr8(self.utf8_font.buf)
         # mh_end_if
 
         # y axis is inverted - we start from bottom not top
@@ -446,12 +1232,8 @@ class DisplayCore:
         while px_idx < max_px_idx:
             # which byte to fetch from the ptr8,
             # and how far to shift (to get 1 bit)
-            ptr_idx = px_idx // 8
+            ptr_idx = px_idx // 8 + offset
             shft_idx = px_idx % 8
-            # mh_if frozen:
-            # # if reading from memoryview, add offset now
-            # ptr_idx += offset
-            # mh_end_if
 
             # calculate x/y position from pixel index
             target_x = x + ((px_idx % width) * scale)
@@ -469,11 +1251,14 @@ class DisplayCore:
                     if 0 <= (target_x + xsize) < self_width \
                     and 0 <= (target_y + ysize) < self_height:
                         if use_tiny_fbuf:
-                            # pack 4 bits into 8 bit ptr
-                            target_idx = target_px // 2
-                            dest_shift = ((target_px + 1) % 2) * 4
+                            # pack 4 bits into 8 bit ptr (each row starts on a new byte)
+                            target_idx = (target_y + ysize) * tiny_stride + ((target_x + xsize) >> 1)
+                            dest_shift = ((target_x + xsize + 1) % 2) * 4
                             dest_mask = 0xf0 >> dest_shift
                             fbuf8[target_idx] = (fbuf8[target_idx] & dest_mask) | (color << dest_shift)
+                        elif use_8bit_fbuf:
+                            # one palette index per byte
+                            fbuf8[target_px] = color
                         else:
                             # draw to 16 bits
                             target_idx = target_px
@@ -485,6 +1270,43 @@ class DisplayCore:
         return width * scale
 
 
+    @staticmethod
+    @micropython.viper
+    def _utf8_glyph_offset(font, char:int) -> int:
+        """Find the byte offset of a glyph in the sparse UTF8 font format.
+
+        `font` must contain (at least) the font header and range table.
+        Ranges are searched with a binary search,
+        and chars that aren't in any range use the default glyph stored in the header.
+        """
+        _RANGE_TABLE_START = const(16)
+        _DEFAULT_GLYPH_OFFSET = const(8)
+
+        font_ptr = ptr8(font)
+        range_count = font_ptr[6] | (font_ptr[7] << 8)
+
+        low = 0
+        high = int(range_count) - 1
+        while low <= high:
+            mid = (low + high) >> 1
+            entry = _RANGE_TABLE_START + mid * 8
+            first = int(font_ptr[entry] | (font_ptr[entry + 1] << 8))
+            if char < first:
+                high = mid - 1
+            elif char >= first + int(font_ptr[entry + 2] | (font_ptr[entry + 3] << 8)):
+                low = mid + 1
+            else:
+                data_start = int(
+                    font_ptr[entry + 4]
+                    | (font_ptr[entry + 5] << 8)
+                    | (font_ptr[entry + 6] << 16)
+                    | (font_ptr[entry + 7] << 24)
+                )
+                return data_start + (char - first) * 8
+
+        return _DEFAULT_GLYPH_OFFSET
+
+
     @micropython.viper
     def _utf8_text(self, text, x:int, y:int, color:int):
         """Draw text, including utf8 characters."""
@@ -559,6 +1381,7 @@ class DisplayCore:
             index (int): Optional index of bitmap to draw from multiple bitmap
                 module
             key (int): colors that match the key will be transparent.
+            palette (list|PreparedPalette): Optional colors to use instead of the bitmap's palette.
         """
         if self.width <= x or self.height <= y:
             return
@@ -566,6 +1389,13 @@ class DisplayCore:
         if palette is None:
             palette = bitmap.PALETTE
 
+        if self.display_list is not None:
+            draw_width = bitmap.WIDTH if draw_width is None else draw_width
+            draw_height = bitmap.HEIGHT if draw_height is None else draw_height
+            self._mark_dirty(x, y, x + draw_width, y + draw_height)
+            self.display_list.bitmap(bitmap, x, y, draw_width, draw_height, index, key, palette)
+            return
+
         self._bitmap(
             bitmap,
             x, y,
@@ -577,15 +1407,126 @@ class DisplayCore:
         )
 
 
+    def _bitmap_scratch(self, length: int) -> bytearray:
+        """Get a reusable buffer with room for at least `length` 16-bit values, for drawing bitmaps."""
+        if len(self._bitmap_buf) < length * 2:
+            self._bitmap_buf = bytearray(length * 2)
+        return self._bitmap_buf
+
+
+    @micropython.viper
+    def _write_color_row(self, row, row_idx:int, count:int, x:int, y:int, key:int):
+        """Write `count` formatted colors from `row` (a ptr16 buffer) to the framebuffer, skipping the key color.
+
+        The row must already be clipped to the display.
+        """
+        buf = ptr16(row)
+        fbuf8 = ptr8(self.fbuf)
+        fbuf16 = ptr16(self.fbuf)
+        self_width = int(self.width)
+        target_px = (y * self_width) + x
+        end_idx = row_idx + count
+
+        # We have to write the value differently depending on the framebuf type
+        if self.use_tiny_buf:
+            # writing 4-bit pixels (each row starts on a new byte)
+            tiny_stride = (self_width + 1) >> 1
+            tiny_row = y * tiny_stride
+            while row_idx < end_idx:
+                clr = buf[row_idx]
+                if clr != key:
+                    target_idx = tiny_row + (x >> 1)
+                    # We need these values to "erase" the old 4 bits
+                    dest_shift = ((x + 1) % 2) * 4
+                    dest_mask = 0xf0 >> dest_shift
+                    # bitwise OR the new 4 bits into the target byte
+                    fbuf8[target_idx] = (fbuf8[target_idx] & dest_mask) | (clr << dest_shift)
+                x += 1
+                row_idx += 1
+
+        elif self.use_8bit_buf:
+            # writing 8-bit palette indices
+            while row_idx < end_idx:
+                clr = buf[row_idx]
+                if clr != key:
+                    fbuf8[target_px] = clr
+                target_px += 1
+                row_idx += 1
+
+        else:
+            # writing 16-bit pixels is easy with a 16-bit pointer.
+            while row_idx < end_idx:
+                clr = buf[row_idx]
+                if clr != key:
+                    fbuf16[target_px] = clr
+                target_px += 1
+                row_idx += 1
+
+
+    @staticmethod
+    @micropython.viper
+    def _unpack_bitmap_row(bitmap, bit_idx:int, bpp:int, count:int, palette, dest, dest_idx:int):
+        """Read `count` pixels from the bitmap, starting at `bit_idx`, and write their palette colors to dest."""
+        source = ptr8(bitmap)
+        palette_ptr = ptr16(palette)
+        dest_ptr = ptr16(dest)
+        end_idx = dest_idx + count
+
+        if bpp == 8:
+            # one byte per pixel
+            byte_idx = bit_idx >> 3
+            while dest_idx < end_idx:
+                dest_ptr[dest_idx] = palette_ptr[source[byte_idx]]
+                byte_idx += 1
+                dest_idx += 1
+
+        elif bpp < 8 and (bpp & (bpp - 1)) == 0:
+            # (1, 2, or 4 bits per pixel. Viper can't test a native int with `in {1, 2, 4}`.)
+            # Pixels never cross a byte boundary, so each byte is read once and shifted through.
+            mask = (1 << bpp) - 1
+            byte_idx = bit_idx >> 3
+            byte = int(source[byte_idx])
+            shift = 8 - bpp - (bit_idx & 7)
+            while dest_idx < end_idx:
+                if shift < 0:
+                    byte_idx += 1
+                    byte = int(source[byte_idx])
+                    shift = 8 - bpp
+                dest_ptr[dest_idx] = palette_ptr[(byte >> shift) & mask]
+                shift -= bpp
+                dest_idx += 1
+
+        else:
+            # Other bit depths can span two bytes
+            mask = (1 << bpp) - 1
+            while dest_idx < end_idx:
+                byte_idx = bit_idx >> 3
+                bits_needed = (bit_idx & 7) + bpp
+                chunk = int(source[byte_idx])
+                shift = 8 - bits_needed
+                if bits_needed > 8:
+                    chunk = (chunk << 8) | int(source[byte_idx + 1])
+                    shift = 16 - bits_needed
+                dest_ptr[dest_idx] = palette_ptr[(chunk >> shift) & mask]
+                bit_idx += bpp
+                dest_idx += 1
+
+
     @micropython.viper
     def _bitmap(self, bitmap, x:int, y:int, draw_width:int, draw_height:int, index:int, key:int, palette):
+        """Draw a bitmap, scaled to the given size.
+
+        Each needed row of the bitmap is unpacked (and scaled horizontally) into a buffer of colors once,
+        and then written to every framebuffer row that uses it.
+        """
         # Update drawn pixel area:
-        self._set_show_y(y, y + draw_height)
+        self._mark_dirty(x, y, x + draw_width, y + draw_height)
+        if draw_width <= 0 or draw_height <= 0:
+            return
 
         # Get values for our display:
         display_width = int(self.width)
         display_height = int(self.height)
-        use_tiny_buf = bool(self.use_tiny_buf)
 
         # Get values for our bitmap:
         btmp_width = int(bitmap.WIDTH)
@@ -593,90 +1534,247 @@ class DisplayCore:
         bpp = int(bitmap.BPP)
         starting_bit = btmp_width * btmp_height * index * bpp
 
-        # Convert palette colors into expected value,
-        # and convert palette into a pointer (for speed!)
-        palette_len = int(len(palette))
-        palette_ptr = ptr16(bytearray(palette_len * 2))
-        for i in range(palette_len):
-            palette_ptr[i] = int(
-                self._format_color(palette[i])
-                )
+        # Get the palette colors in the expected format (cached)
+        formatted_palette = self._prepare_palette(palette)
         # also format the key color
         key = int(self._format_color(key))
 
-        # Pointers for the bitmap, and destination buffers
-        bitmap_ptr = ptr8(bitmap.BITMAP)
-        # We can't assign different types to the same variable name,
-        # so we assign two here (even though we will only use one)
-        fbuf8 = ptr8(self.fbuf)
-        fbuf16 = ptr16(self.fbuf)
-
-        # The mask needed to select the requested number of bits:
-        bitmask = ((1 << bpp) - 1)
-
         # Find starting x/y indices to draw, clamping to display bounds
-        x_idx_start = 0 if x < 0 else display_width-1 if x >= display_width else x
-        y_idx = 0 if y < 0 else display_height-1 if y >= display_height else y
+        x_idx_start = 0 if x < 0 else x
+        y_idx = 0 if y < 0 else y
 
         # Find ending x/y indices, clamped to display bounds
         x_idx_end = x + draw_width
-        x_idx_end = 0 if x_idx_end < 0 else display_width if x_idx_end > display_width else x_idx_end
+        x_idx_end = display_width if x_idx_end > display_width else x_idx_end
         y_idx_end = y + draw_height
-        y_idx_end = 0 if y_idx_end < 0 else display_height if y_idx_end > display_height else y_idx_end
+        y_idx_end = display_height if y_idx_end > display_height else y_idx_end
 
+        count = x_idx_end - x_idx_start
+        if count <= 0 or y_idx >= y_idx_end:
+            return
+
+        # The scratch buffer holds one unpacked bitmap row, followed by the scaled (visible) row,
+        # followed by a lookup table of source columns (for non-integer scales).
+        # (at 1:1, the unpacked row is used directly)
+        scratch = self._bitmap_scratch(btmp_width + count * 2)
+        buf = ptr16(scratch)
+        scaled_start = btmp_width
+        cols_start = btmp_width + count
+
+        # integer upscales (including 1:1) repeat each source pixel `scale` times.
+        scale = draw_width // btmp_width
+        if scale * btmp_width != draw_width:
+            scale = 0
+            # find the source column for each visible column, once.
+            i = 0
+            while i < count:
+                buf[cols_start + i] = (x_idx_start + i - x) * btmp_width // draw_width
+                i += 1
+
+        # where the visible part of the row is read from
+        row_start = (x_idx_start - x) if scale == 1 else scaled_start
+
+        decoded_y = -1
         # Iterate vertically over each row:
         # (Using a while loop like this is faster than using range)
         while y_idx < y_idx_end:
-            # Calculate source bitmap pixel coordinate
+            # Calculate source bitmap row
             btmp_y = (y_idx - y)*btmp_height // draw_height
 
-            # Iterate over horizontal pixels:
-            x_idx = x_idx_start
-            while x_idx < x_idx_end:
-                # calculate source bitmap pixel coordinate
-                btmp_x = (x_idx - x)*btmp_width // draw_width
+            # unpack (and scale) the source row, only when it's changed
+            if btmp_y != decoded_y:
+                decoded_y = btmp_y
+                self._unpack_bitmap_row(
+                    bitmap.BITMAP, starting_bit + btmp_y * btmp_width * bpp, bpp, btmp_width,
+                    formatted_palette, scratch, 0,
+                )
+                if scale > 1:
+                    # repeat each pixel `scale` times, starting partway through a pixel if clipped
+                    src = (x_idx_start - x) // scale
+                    rep = (x_idx_start - x) - src * scale
+                    i = 0
+                    while i < count:
+                        buf[scaled_start + i] = buf[src]
+                        rep += 1
+                        if rep == scale:
+                            rep = 0
+                            src += 1
+                        i += 1
+                elif scale == 0:
+                    i = 0
+                    while i < count:
+                        buf[scaled_start + i] = buf[buf[cols_start + i]]
+                        i += 1
+
+            self._write_color_row(scratch, row_start, count, x_idx_start, y_idx, key)
+            y_idx += 1
+
+
+    def sprite(self, atlas, frame: int, x: int, y: int, *, key: int = -1, palette=None):
+        """Draw one frame from a SpriteAtlas.
 
-                # Find the start bit for the pixel we want
-                btmp_bit_idx = starting_bit + (btmp_y*btmp_width + btmp_x) * bpp
-                # Calculate the byte our bit starts in, and the bit offset in that byte
-                btmp_byte_idx = btmp_bit_idx // 8
-                bit_offset = btmp_bit_idx % 8
+        Args:
+            atlas (SpriteAtlas): The atlas to draw from
+            frame (int): The index of the frame to draw
+            x (int): column to start drawing at
+            y (int): row to start drawing at
+            key (int): colors that match the key will be transparent.
+            palette (list|PreparedPalette): Optional colors to use instead of the atlas's palette.
+        """
+        offset, length, width, height, encoding = atlas.frame(frame)
+        self._mark_dirty(x, y, x + width, y + height)
+        if self.display_list is not None:
+            self.display_list.sprite(atlas, frame, x, y, height, key, palette)
+            return
 
-                # Number of bits that must be read for this pixel
-                bits_needed = bit_offset + bpp
-                # Number of bytes we need to read to get those bits
-                bytes_needed = 2 if bits_needed > 8 else 1
+        if x >= self.width or y >= self.height or x + width <= 0 or y + height <= 0:
+            return
 
-                # Read 1 or 2 bytes to get our data
-                chunk = bitmap_ptr[btmp_byte_idx]
-                if bytes_needed == 2:
-                    chunk = (chunk << 8) | bitmap_ptr[btmp_byte_idx + 1]
+        formatted_palette = self._prepare_palette(atlas.PALETTE if palette is None else palette)
+        key = self._format_color(key)
+        row_buf = self._bitmap_scratch(width)
+        state = self._sprite_state
+        for i in range(4):
+            state[i] = 0
+
+        if atlas.file is None:
+            self._decode_sprite(
+                atlas.data, offset, offset + length, encoding, atlas.BPP, state, formatted_palette, row_buf,
+                x, y, width, height, key,
+            )
+            return
 
-                # Shift and mask our data chunk to get just our pixel bits
-                shift = (bytes_needed * 8) - bits_needed
-                clr_idx = (chunk >> shift) & bitmask
+        # Stream the frame from the file, a chunk at a time.
+        # The decoder only consumes complete runs, so leftover bytes are moved to the start of the buffer.
+        file = atlas.file
+        buf = atlas.stream_buf
+        view = memoryview(buf)
+        file.seek(offset)
+        remaining = length
+        buffered = 0
+        while True:
+            read_len = min(len(buf) - buffered, remaining)
+            if read_len:
+                read_len = file.readinto(view[buffered:buffered + read_len])
+                remaining -= read_len
+                buffered += read_len
+
+            used = self._decode_sprite(
+                buf, 0, buffered, encoding, atlas.BPP, state, formatted_palette, row_buf,
+                x, y, width, height, key,
+            )
+            # stop when the frame is done, or it goes off the display (or the file ends)
+            if state[1] >= height or y + state[1] >= self.height or (not read_len and not used):
+                return
+            buf[:buffered - used] = buf[used:buffered]
+            buffered -= used
 
-                # Finally, use the color palette to look up the color this pixel represents.
-                clr = palette_ptr[clr_idx]
 
-                # Don't draw the keyed-out value
-                if clr != key:
-                    # convert pixel coordinate into a single target index
-                    target_px = (y_idx * display_width) + x_idx
-
-                    # We have to write the value differently depending on the framebuf type
-                    if use_tiny_buf:
-                        # writing 4-bit pixels
-                        target_idx = target_px // 2
-                        # We need these values to "erase" the old 4 bits
-                        dest_shift = ((target_px + 1) % 2) * 4
-                        dest_mask = 0xf0 >> dest_shift
-                        # bitwise OR the new 4 bits into the target byte
-                        fbuf8[target_idx] = (fbuf8[target_idx] & dest_mask) | (clr << dest_shift)
+    @micropython.viper
+    def _decode_sprite(
+            self,
+            data,
+            idx:int,
+            end:int,
+            encoding:int,
+            bpp:int,
+            state,
+            palette,
+            row_buf,
+            x:int,
+            y:int,
+            width:int,
+            height:int,
+            key:int) -> int:
+        """Decode sprite frame data from `data[idx:end]` into the framebuffer, returning the index decoding stopped at.
+
+        Pixels are collected into `row_buf` (as formatted colors), and each completed row is written to the display.
+        Decoding stops at the end of the data (or before an incomplete run), or when the frame is done.
+        Because runs can span multiple calls, the position is kept in `state`.
+        """
+        source = ptr8(data)
+        palette_ptr = ptr16(palette)
+        row = ptr16(row_buf)
+        pos = ptr32(state)
+        display_width = int(self.width)
+        display_height = int(self.height)
 
-                    else:
-                        # writing 16-bit pixels is easy with a 16-bit pointer.
-                        fbuf16[target_px] = clr
+        px = int(pos[0])
+        row_idx = int(pos[1])
+        bits_left = int(pos[2])
+        byte = int(pos[3])
+
+        # the visible columns
+        x_start = 0 if x < 0 else x
+        x_end = x + width
+        x_end = display_width if x_end > display_width else x_end
+
+        mask = (1 << bpp) - 1
+        # palette runs store the run length below the palette index
+        run_bits = 8 - bpp
+        run_mask = (1 << run_bits) - 1
+
+        literal_left = 0
+        while row_idx < height and y + row_idx < display_height:
+            # Find the next color, and how many times to repeat it:
+            if literal_left:
+                color = palette_ptr[source[idx]]
+                idx += 1
+                literal_left -= 1
+                count = 1
+
+            elif encoding == _SPRITE_RLE:
+                if idx >= end:
+                    break
+                control = int(source[idx])
+                if control & 0x80:
+                    if idx + 1 >= end:
+                        break
+                    count = (control & 0x7f) + 1
+                    color = palette_ptr[source[idx + 1]]
+                    idx += 2
+                else:
+                    # literals are only started when they're all available
+                    if idx + control + 2 > end:
+                        break
+                    literal_left = control + 1
+                    idx += 1
+                    continue
+
+            elif encoding == _SPRITE_PALETTE_RUN:
+                if idx >= end:
+                    break
+                control = int(source[idx])
+                color = palette_ptr[control >> run_bits]
+                count = (control & run_mask) + 1
+                idx += 1
 
-                x_idx += 1
-            y_idx+=1
+            else:
+                if bits_left == 0:
+                    if idx >= end:
+                        break
+                    byte = int(source[idx])
+                    idx += 1
+                    bits_left = 8
+                bits_left -= bpp
+                color = palette_ptr[(byte >> bits_left) & mask]
+                count = 1
+
+            # Add the color to the row, writing each finished row to the framebuffer
+            while count > 0:
+                row[px] = color
+                px += 1
+                count -= 1
+                if px == width:
+                    if y + row_idx >= 0 and x_end > x_start:
+                        self._write_color_row(row_buf, x_start - x, x_end - x_start, x_start, y + row_idx, key)
+                    px = 0
+                    row_idx += 1
+                    if row_idx >= height or y + row_idx >= display_height:
+                        break
+
+        pos[0] = px
+        pos[1] = row_idx
+        pos[2] = bits_left
+        pos[3] = byte
+        return idx
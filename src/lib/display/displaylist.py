@@ -0,0 +1,278 @@
+"""Record drawing operations, so that they can be replayed into a small strip buffer.
+
+When DisplayCore is initialized with `use_display_list=True`, it only allocates a framebuffer
+for a small horizontal strip of the display. Drawing methods are recorded into a DisplayList,
+and when `show` is called, the list is replayed into the strip once for each band of lines that needs to be
+written to the display. This lets apps draw a full frame using only a few KB for the framebuffer.
+
+Key notes on DisplayList:
+  - Operations are stored in an `array('h')` as an op code, the op's vertical bounds, and its arguments.
+    The vertical bounds let bands skip operations that can't touch them.
+
+  - Objects (like strings, fonts, bitmaps, and polygon coordinates) are stored by reference in a list,
+    and are referenced in the array by their index.
+
+  - `fill` covers everything before it, so it clears the list.
+    Apps that never call `fill` will keep growing the list.
+
+  - `scroll` is applied by moving the operations recorded before it.
+    Areas uncovered by scrolling show the previous fill color (rather than a copy of the old pixels).
+"""
+
+import array
+
+
+_OP_FILL = const(0)
+_OP_PIXEL = const(1)
+_OP_HLINE = const(2)
+_OP_VLINE = const(3)
+_OP_LINE = const(4)
+_OP_RECT = const(5)
+_OP_ELLIPSE = const(6)
+_OP_POLYGON = const(7)
+_OP_TEXT = const(8)
+_OP_BITMAP = const(9)
+_OP_BLIT = const(10)
+_OP_SCROLL = const(11)
+_OP_SPRITE = const(12)
+_OP_BATCH = const(13)
+_OP_BLEND_RECT = const(14)
+_OP_BLIT_BLEND = const(15)
+
+# number of args stored for each op (after the op code and the y bounds)
+_OP_SIZES = const((1, 3, 4, 4, 5, 6, 7, 5, 5, 9, 8, 2, 7, 7, 6, 6))
+
+# the op code and y bounds
+_OP_HEADER = const(3)
+
+_MIN_Y = const(-0x8000)
+_MAX_Y = const(0x7fff)
+
+
+def _s16(val: int) -> int:
+    """Wrap an int into a signed 16 bit value, so that RGB565 colors fit in the array."""
+    return ((val + 0x8000) & 0xffff) - 0x8000
+
+
+
+class DisplayList:
+    """A compact, replayable list of drawing operations."""
+
+    def __init__(self):
+        """Create an empty DisplayList."""
+        self.ops = array.array('h')
+        self.objs = []
+
+
+    def __len__(self) -> int:
+        return len(self.ops)
+
+
+    def clear(self):
+        """Remove all recorded operations."""
+        # new objects release the memory from the old ones
+        self.ops = array.array('h')
+        self.objs = []
+
+
+    def _add(self, op: int, y0: int, y1: int, *args):
+        """Record an op, with the (exclusive) vertical range it can draw to."""
+        ops = self.ops
+        ops.append(op)
+        ops.append(_s16(y0))
+        ops.append(_s16(y1))
+        for arg in args:
+            ops.append(_s16(arg))
+
+
+    def _obj(self, obj) -> int:
+        """Store an object, and return the index to record for it."""
+        if obj is None:
+            return -1
+        self.objs.append(obj)
+        return len(self.objs) - 1
+
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Recording: ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def fill(self, color: int):  # noqa: D102
+        self.clear()
+        self._add(_OP_FILL, _MIN_Y, _MAX_Y, color)
+
+    def pixel(self, x: int, y: int, color: int):  # noqa: D102
+        self._add(_OP_PIXEL, y, y + 1, x, y, color)
+
+    def hline(self, x: int, y: int, length: int, color: int):  # noqa: D102
+        self._add(_OP_HLINE, y, y + 1, x, y, length, color)
+
+    def vline(self, x: int, y: int, length: int, color: int):  # noqa: D102
+        self._add(_OP_VLINE, y, y + length, x, y, length, color)
+
+    def line(self, x0: int, y0: int, x1: int, y1: int, color: int):  # noqa: D102
+        self._add(_OP_LINE, min(y0, y1), max(y0, y1) + 1, x0, y0, x1, y1, color)
+
+    def rect(self, x: int, y: int, w: int, h: int, color: int, fill: bool):  # noqa: D102
+        self._add(_OP_RECT, y, y + h, x, y, w, h, color, fill)
+
+    def ellipse(self, x: int, y: int, xr: int, yr: int, color: int, fill: bool, m: int):  # noqa: D102
+        self._add(_OP_ELLIPSE, y - yr, y + yr + 1, x, y, xr, yr, color, fill, m)
+
+    def polygon(self, coords, x: int, y: int, color: int, fill: bool):  # noqa: D102
+        self._add(
+            _OP_POLYGON, y + min(coords), y + max(coords) + 1,
+            self._obj(coords), x, y, color, fill,
+        )
+
+    def text(self, text: str, x: int, y: int, color: int, font):  # noqa: D102
+        # (utf8 glyphs can draw one line above y)
+        height = font.HEIGHT if font else 8
+        self._add(_OP_TEXT, y - 1, y + height, self._obj(text), x, y, color, self._obj(font))
+
+    def bitmap(  # noqa: D102
+            self, bitmap, x: int, y: int, draw_width: int, draw_height: int, index: int, key: int, palette):
+        self._add(
+            _OP_BITMAP, y, y + draw_height,
+            self._obj(bitmap), x, y, draw_width, draw_height, index,
+            # key is stored separately from a flag, so that a key of 0xffff isn't confused with -1
+            key != -1, key, self._obj(palette),
+        )
+
+    def blit_buffer(self, buffer, x: int, y: int, width: int, height: int, key: int, palette):  # noqa: D102
+        self._add(
+            _OP_BLIT, y, y + height,
+            self._obj(buffer), x, y, width, height, key != -1, key, self._obj(palette),
+        )
+
+    def scroll(self, xstep: int, ystep: int):  # noqa: D102
+        self._add(_OP_SCROLL, _MIN_Y, _MAX_Y, xstep, ystep)
+
+    def sprite(self, atlas, frame: int, x: int, y: int, height: int, key: int, palette):  # noqa: D102
+        self._add(
+            _OP_SPRITE, y, y + height,
+            self._obj(atlas), frame, x, y, key != -1, key, self._obj(palette),
+        )
+
+    def batch(self, kind: int, coords, x: int, y: int, color, fill: bool, y0: int, y1: int):  # noqa: D102
+        # color can be a single color, or an array of colors (stored as an object)
+        has_colors = not isinstance(color, int)
+        self._add(
+            _OP_BATCH, y0, y1,
+            kind, self._obj(coords), x, y, has_colors, self._obj(color) if has_colors else color, fill,
+        )
+
+    def blend_rect(self, x: int, y: int, w: int, h: int, color: int, alpha: int):  # noqa: D102
+        self._add(_OP_BLEND_RECT, y, y + h, x, y, w, h, color, alpha)
+
+    def blit_blend(self, mask, x: int, y: int, width: int, height: int, color: int):  # noqa: D102
+        self._add(_OP_BLIT_BLEND, y, y + height, self._obj(mask), x, y, width, height, color)
+
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Replay: ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def replay(self, display, band_y: int, band_end: int):
+        """Draw the operations that touch the lines from band_y to band_end.
+
+        `display` must be drawing to the strip buffer (and not recording),
+        and everything is drawn shifted up by band_y.
+        """
+        ops = self.ops
+        ops_len = len(ops)
+
+        # Each op is moved by the scrolls that were recorded after it.
+        dx = 0
+        dy = 0
+        idx = 0
+        while idx < ops_len:
+            if ops[idx] == _OP_SCROLL:
+                dx += ops[idx + _OP_HEADER]
+                dy += ops[idx + _OP_HEADER + 1]
+            idx += _OP_HEADER + _OP_SIZES[ops[idx]]
+
+        idx = 0
+        while idx < ops_len:
+            op = ops[idx]
+            if op == _OP_SCROLL:
+                dx -= ops[idx + _OP_HEADER]
+                dy -= ops[idx + _OP_HEADER + 1]
+            elif ops[idx + 1] + dy < band_end and ops[idx + 2] + dy > band_y:
+                self._draw(display, op, idx + _OP_HEADER, dx, dy - band_y)
+            idx += _OP_HEADER + _OP_SIZES[op]
+
+
+    def _draw(self, display, op: int, arg: int, dx: int, dy: int):
+        """Draw one op, with its args starting at index `arg`."""
+        ops = self.ops
+        objs = self.objs
+
+        if op == _OP_FILL:
+            display.fill(ops[arg] & 0xffff)
+        elif op == _OP_PIXEL:
+            display.pixel(ops[arg] + dx, ops[arg + 1] + dy, ops[arg + 2] & 0xffff)
+        elif op == _OP_HLINE:
+            display.hline(ops[arg] + dx, ops[arg + 1] + dy, ops[arg + 2], ops[arg + 3] & 0xffff)
+        elif op == _OP_VLINE:
+            display.vline(ops[arg] + dx, ops[arg + 1] + dy, ops[arg + 2], ops[arg + 3] & 0xffff)
+        elif op == _OP_LINE:
+            display.line(
+                ops[arg] + dx, ops[arg + 1] + dy, ops[arg + 2] + dx, ops[arg + 3] + dy,
+                ops[arg + 4] & 0xffff,
+            )
+        elif op == _OP_RECT:
+            display.rect(
+                ops[arg] + dx, ops[arg + 1] + dy, ops[arg + 2], ops[arg + 3],
+                ops[arg + 4] & 0xffff, bool(ops[arg + 5]),
+            )
+        elif op == _OP_ELLIPSE:
+            display.ellipse(
+                ops[arg] + dx, ops[arg + 1] + dy, ops[arg + 2], ops[arg + 3],
+                ops[arg + 4] & 0xffff, bool(ops[arg + 5]), ops[arg + 6] & 0xf,
+            )
+        elif op == _OP_POLYGON:
+            display.polygon(
+                objs[ops[arg]], ops[arg + 1] + dx, ops[arg + 2] + dy,
+                ops[arg + 3] & 0xffff, fill=bool(ops[arg + 4]),
+            )
+        elif op == _OP_TEXT:
+            font = ops[arg + 4]
+            display.text(
+                objs[ops[arg]], ops[arg + 1] + dx, ops[arg + 2] + dy,
+                ops[arg + 3] & 0xffff, None if font == -1 else objs[font],
+            )
+        elif op == _OP_BITMAP:
+            bitmap = objs[ops[arg]]
+            x = ops[arg + 1] + dx
+            y = ops[arg + 2] + dy
+            palette = ops[arg + 8]
+            display.bitmap(
+                bitmap, x, y,
+                draw_width=ops[arg + 3], draw_height=ops[arg + 4], index=ops[arg + 5],
+                key=(ops[arg + 7] & 0xffff) if ops[arg + 6] else -1,
+                palette=None if palette == -1 else objs[palette],
+            )
+        elif op == _OP_BLIT:
+            palette = ops[arg + 7]
+            display.blit_buffer(
+                objs[ops[arg]], ops[arg + 1] + dx, ops[arg + 2] + dy, ops[arg + 3], ops[arg + 4],
+                key=(ops[arg + 6] & 0xffff) if ops[arg + 5] else -1,
+                palette=None if palette == -1 else objs[palette],
+            )
+        elif op == _OP_SPRITE:
+            palette = ops[arg + 6]
+            display.sprite(
+                objs[ops[arg]], ops[arg + 1], ops[arg + 2] + dx, ops[arg + 3] + dy,
+                key=(ops[arg + 5] & 0xffff) if ops[arg + 4] else -1,
+                palette=None if palette == -1 else objs[palette],
+            )
+        elif op == _OP_BATCH:
+            display._batch(  # noqa: SLF001
+                ops[arg], objs[ops[arg + 1]], ops[arg + 2] + dx, ops[arg + 3] + dy,
+                objs[ops[arg + 5]] if ops[arg + 4] else ops[arg + 5] & 0xffff, bool(ops[arg + 6]),
+            )
+        elif op == _OP_BLEND_RECT:
+            display.blend_rect(
+                ops[arg] + dx, ops[arg + 1] + dy, ops[arg + 2], ops[arg + 3],
+                ops[arg + 4] & 0xffff, ops[arg + 5],
+            )
+        elif op == _OP_BLIT_BLEND:
+            display.blit_blend(
+                objs[ops[arg]], ops[arg + 1] + dx, ops[arg + 2] + dy, ops[arg + 3], ops[arg + 4],
+                ops[arg + 5] & 0xffff,
+            )
@@ -6,9 +6,14 @@ while keeping the regular Display class (relatively) lightweight.
 """
 
 import array
-from math import cos, floor, pi, sin, sqrt
+from math import cos, pi, sqrt
 
 from . import Display
+from .transform import Q15_ONE, Transform, angle_steps, warp_points
+
+
+# reused for rotating and transforming polygons, so that no new transform is needed each time
+_TRANSFORM = Transform()
 
 
 def ease_in_out_sine(x: float) -> float:
@@ -27,6 +32,9 @@ def ease_in_out_circ(x: float) -> float:
 class FancyDisplay(Display):
     """An extended Display class."""
 
+    # holds transformed polygon points, and is reused while polygons have the same length
+    _poly_buf = array.array('h')
+
     @micropython.viper
     @staticmethod
     def scale_poly(points, scale_pct:int):
@@ -45,17 +53,9 @@ class FancyDisplay(Display):
     def rotate_points(points, angle=0, center_x=0, center_y=0) -> array.array:
         """Rotate all the points in the array, return resulting array."""
         if angle:
-            cos_a = cos(angle)
-            sin_a = sin(angle)
-            rotated = array.array('h')
-            for i in range(0, len(points), 2):
-                rotated.append(
-                    center_x + floor((points[i] - center_x) * cos_a - (points[i+1] - center_y) * sin_a)
-                )
-                rotated.append(
-                    center_y + floor((points[i] - center_x) * sin_a + (points[i+1] - center_y) * cos_a)
-                )
-            return rotated
+            return _TRANSFORM.set(
+                angle_steps(angle), center_x=center_x, center_y=center_y,
+            ).apply(points, array.array('h', points))
         return points
 
 
@@ -69,7 +69,10 @@ class FancyDisplay(Display):
             smallest=None,
             largest=None,
             ) -> array.array:
-        """Skew points on the y axis. Can create a faux 3d looking effect, or a kinda jelly-like effect."""
+        """Skew points on the y axis. Can create a faux 3d looking effect, or a kinda jelly-like effect.
+
+        The points are modified in place (using fixed point math from `transform.warp_points`).
+        """
         if tilt_center == 0.5 and not ease:
             return points
 
@@ -78,66 +81,7 @@ class FancyDisplay(Display):
         if largest is None:
             largest = max(points)
 
-        midpoint = (smallest + largest) / 2
-        #shift numbers so that the smallest point = 0
-        adj_largest = largest - smallest
-        adj_midpoint = adj_largest / 2
-        new_adj_midpoint = adj_largest * tilt_center
-
-        #shift largest down, (along with newmidpoint), so that newmidpoint = 0
-        #this is done so that we can interpolate between 0 and this number, then re-add the midpoint
-        temp_largest = adj_largest - new_adj_midpoint
-
-        #iterate over each point
-        # if point is less than midpoint, interpolate point between 0 and new midpoint
-        # if point is greater than midpoint, interpolate between new midpoint and largest
-        # then add the smallest value back to the result, to shift the result into the original range
-        #for index, point in enumerate(points):
-        for index in range(1,len(points),2):
-            point=points[index]
-
-            if focus_center_x:
-                #if focus_center_x, then apply the effect more strongly to points nearer to the center x
-                adj_x_val = points[index-1] - smallest
-                x_center_factor = abs(adj_x_val - adj_midpoint ) / adj_midpoint
-                x_center_factor = ease_in_out_circ(x_center_factor)
-
-            if point < midpoint:
-                #find fac between 0 and adj_midpoint,
-                #then interpolate between 0 and new midpoint
-                adj_point = point - smallest
-                factor = adj_point / adj_midpoint
-
-                #fancy easing function to round out the shape more
-                factor = ease_in_out_sine(factor)
-
-                if focus_center_x:
-                    points[index] = floor(
-                        mix(
-                            (new_adj_midpoint * factor) + smallest, points[index], x_center_factor
-                            ))
-                else:
-                    points[index] = floor((new_adj_midpoint * factor) + smallest)
-
-
-            else: # point >= midpoint:
-                #find fac between adj_midpoint and adj_largest,
-                #then interpolate between new midpoint and largest
-                adj_point = point - smallest
-                factor = (adj_point - adj_midpoint) / (adj_largest - adj_midpoint)
-
-                #fancy easing function to round out the shape more
-                factor = ease_in_out_sine(factor)
-
-                if focus_center_x:
-                    points[index] = floor(
-                        mix(
-                            (temp_largest * factor) + new_adj_midpoint + smallest,points[index],x_center_factor
-                            )
-                        )
-                else:
-                    points[index] = floor((temp_largest * factor) + new_adj_midpoint + smallest)
-
+        warp_points(points, int(tilt_center * Q15_ONE), smallest, largest, focus_center_x)
         return points
 
 
@@ -172,24 +116,20 @@ class FancyDisplay(Display):
 
         #complex polygon
         else:
-            #clone array so we don't modify original
-            points = array.array('h', points)
-
-            #scale
-            if scale != 1.0:
-                # (convert scale to integer percentage for speed)
-                self.scale_poly(points, int(scale * 100))
-
-            #rotate
-            if angle != 0:
-                if center_x is None:
-                    center_x = max(points) // 2
-                if center_y is None:
-                    center_y = max(points) // 2
-                points = self.rotate_points(points, angle, center_x, center_y)
+            # scale and rotate in one pass, into a (reused) copy so we don't modify the original
+            buf = self._poly_buf
+            if len(buf) != len(points):
+                buf = self._poly_buf = array.array('h', points)
+
+            if center_x is None:
+                center_x = int(max(points) * scale) // 2
+            if center_y is None:
+                center_y = int(max(points) * scale) // 2
+            _TRANSFORM.set(
+                angle_steps(angle), scale=int(scale * Q15_ONE), center_x=center_x, center_y=center_y,
+            ).apply(points, buf)
 
             if warp is not None:
-                self.warp_points(points, tilt_center=warp)
-
-            super().polygon(points, x, y, color, fill=fill)
+                self.warp_points(buf, tilt_center=warp)
 
+            super().polygon(buf, x, y, color, fill=fill)
@@ -0,0 +1,186 @@
+"""Frame pacing and frame timing for `Display.show`.
+
+The FrameScheduler limits how often `Display.show` sends frames to the display,
+and measures where the time in each frame goes.
+
+Every Display has one, as `Display.frames`:
+
+    display.frames.target_fps = 30
+    ...
+    while True:
+        draw_things()
+        display.show()  # waits for the next frame when called early
+        print(display.frames.stats)
+
+Key notes on FrameScheduler:
+  - A `target_fps` of 0 (the default) means frames are never limited.
+
+  - When `pace` is True (the default), calling `show` before the next frame is due sleeps until it is due.
+    When `pace` is False, an early call to `show` returns immediately without sending anything,
+    and its changes are sent by the next call to `show` that is on time.
+    In that case `pending` is True, and the app should keep calling `show` until it's False.
+
+  - Calling `show` with nothing to send returns immediately (it doesn't wait, and isn't counted as a frame).
+
+  - `wait` sleeps until the next frame is due (or for 1ms, when frames aren't limited).
+    It's intended as a replacement for `time.sleep_ms(1)` in idle main loops.
+
+  - Frame times are measured in microseconds:
+    "draw" is the time between frames (the app drawing and doing other work),
+    "flush" is the time spent sending the frame in `show`,
+    and "idle" is the time spent sleeping in `show` or `wait`.
+    With `async_flush`, "flush" is the time the background thread took to write the frame
+    (reported one frame late, once it's finished), and the time `show` spends waiting for it counts as "idle".
+    Since flushing then overlaps drawing, fps is measured from the total time, not the sum of the parts.
+"""
+
+import time
+
+
+_US_PER_SECOND = const(1_000_000)
+_IDLE_SLEEP_US = const(1000)
+
+
+
+class FrameStats:
+    """Frame timing totals, since the last reset."""
+
+    def __init__(self):
+        """Create empty FrameStats."""
+        self.reset()
+
+
+    def reset(self):
+        """Clear all the frame totals."""
+        # frames shown, and show calls combined into a later frame
+        self.frames = 0
+        self.coalesced = 0
+        # total times, in microseconds
+        self.draw_us = 0
+        self.flush_us = 0
+        self.idle_us = 0
+        # total time between the ends of frames
+        self.total_us = 0
+        # times for the most recent frame
+        self.last_draw_us = 0
+        self.last_flush_us = 0
+        self.last_idle_us = 0
+
+
+    def fps(self) -> float:
+        """Get the average frames per second."""
+        total = self.total_us
+        return self.frames * _US_PER_SECOND / total if total else 0.0
+
+
+    def __str__(self) -> str:
+        frames = self.frames or 1
+        return (
+            f"{self.fps():.1f} fps, per frame: "
+            f"draw {self.draw_us // frames}us, flush {self.flush_us // frames}us, idle {self.idle_us // frames}us "
+            f"({self.coalesced} coalesced)"
+        )
+
+
+
+class FrameScheduler:
+    """Limits the frame rate of `Display.show`, and measures frame times."""
+
+    def __init__(self, target_fps: int = 0, *, pace: bool = True):
+        """Create a FrameScheduler.
+
+        Args:
+            target_fps (int): The maximum frames per second (or 0 for no limit).
+            pace (bool): Sleep until the next frame is due (rather than skipping early frames).
+        """
+        self.stats = FrameStats()
+        self.pace = pace
+        self.pending = False
+        self.target_fps = target_fps
+
+        now = time.ticks_us()
+        # when the last frame started, and when the last call to show ended
+        self._frame_start = now
+        self._show_end = now
+        # time spent in `wait` since the last show
+        self._wait_us = 0
+
+
+    @property
+    def target_fps(self) -> int:  # noqa: D102
+        return self._target_fps
+
+    @target_fps.setter
+    def target_fps(self, fps: int):
+        self._target_fps = fps
+        self._period_us = _US_PER_SECOND // fps if fps > 0 else 0
+
+
+    def _until_next_frame(self, now: int) -> int:
+        """Get the number of microseconds until the next frame is due."""
+        if not self._period_us:
+            return 0
+        return self._period_us - time.ticks_diff(now, self._frame_start)
+
+
+    def wait(self):
+        """Sleep until the next frame is due (or for 1ms, if frames aren't limited)."""
+        now = time.ticks_us()
+        delay = self._until_next_frame(now)
+        if delay <= 0:
+            delay = _IDLE_SLEEP_US
+        time.sleep_us(delay)
+        self._wait_us += time.ticks_diff(time.ticks_us(), now)
+
+
+    def begin(self, changed: bool) -> bool:
+        """Start a frame (called by `show`). Returns False if the frame shouldn't be sent now.
+
+        `changed` should be True if there is anything to send.
+        """
+        if not changed:
+            return False
+        now = time.ticks_us()
+        delay = self._until_next_frame(now)
+        idle = self._wait_us
+        if delay > 0:
+            if not self.pace:
+                self.stats.coalesced += 1
+                self.pending = True
+                return False
+            time.sleep_us(delay)
+            start = time.ticks_us()
+            idle += time.ticks_diff(start, now)
+        else:
+            start = now
+
+        stats = self.stats
+        stats.last_draw_us = max(time.ticks_diff(now, self._show_end) - self._wait_us, 0)
+        stats.last_idle_us = idle
+        stats.draw_us += stats.last_draw_us
+        stats.idle_us += idle
+        self._wait_us = 0
+        self.pending = False
+        self._frame_start = start
+        return True
+
+
+    def end(self, flush_us: int|None = None):
+        """Finish the current frame (called by `show`, after sending it).
+
+        When the frame was written in the background, `flush_us` should be the time taken to write
+        the previous frame, and the time since `begin` (spent waiting for that write) is counted as idle.
+        """
+        now = time.ticks_us()
+        stats = self.stats
+        show_us = time.ticks_diff(now, self._frame_start)
+        if flush_us is None:
+            stats.last_flush_us = show_us
+        else:
+            stats.last_flush_us = flush_us
+            stats.last_idle_us += show_us
+            stats.idle_us += show_us
+        stats.flush_us += stats.last_flush_us
+        stats.total_us += time.ticks_diff(now, self._show_end)
+        stats.frames += 1
+        self._show_end = now
@@ -0,0 +1,131 @@
+"""A small, fixed-size cache for glyphs read from MicroHydra's UTF8 font file.
+
+When MicroHydra is not frozen, the 8x8 UTF8 font is read from a binary file as it's needed.
+Reading from the filesystem for every character drawn (every frame) is slow,
+so the most recently used glyphs are kept in RAM.
+
+The font file uses MicroHydra's sparse UTF8 font format
+(see `tools/utf8_util/pack_utf8_font.py`), and glyphs are located using `DisplayCore._utf8_glyph_offset`.
+
+Key notes on GlyphCache:
+  - All glyph data is stored in a single, preallocated bytearray.
+    Each glyph takes 8 bytes, and is accessed using the slot index returned by `get`.
+
+  - When the cache is full, the least-recently-used glyph is replaced.
+
+  - Lookups are done with Viper, and don't allocate any memory.
+"""
+
+import array
+
+from .displaycore import DisplayCore
+
+
+_GLYPH_BYTES = const(8)
+_MAGIC = const(b"MHU8")
+_HEADER_SIZE = const(16)
+_RANGE_SIZE = const(8)
+
+# indices for the _stats array:
+_TICK = const(0)
+_HITS = const(1)
+_MISSES = const(2)
+_COUNT = const(3)
+
+
+class GlyphCache:
+    """Read glyphs from a UTF8 font file, keeping recently used glyphs in RAM."""
+
+    def __init__(self, file_path: str, size: int = 128):
+        """Open the font file and allocate the cache.
+
+        Args:
+            file_path (str): Path to the UTF8 font binary.
+            size (int): Maximum number of glyphs to keep in RAM.
+        """
+        self.font_file = open(file_path, "rb", buffering=0)  # noqa: SIM115
+        # Keep the header and range table in RAM for finding glyphs
+        header = self.font_file.read(_HEADER_SIZE)
+        if header[:4] != _MAGIC:
+            msg = f"{file_path} is not a sparse UTF8 font."
+            raise ValueError(msg)
+        range_count = header[6] | (header[7] << 8)
+        self.index = header + self.font_file.read(range_count * _RANGE_SIZE)
+
+        self.size = size
+        self.buf = bytearray(size * _GLYPH_BYTES)
+        self._buf_view = memoryview(self.buf)
+        # codepoint stored in each slot, and the 'tick' that each slot was last used on.
+        self._keys = array.array('H', bytes(size * 2))
+        self._ages = array.array('I', bytes(size * 4))
+        # tick counter, hits, misses, and number of filled slots.
+        # (Stored in an array so that Viper can update them without allocating)
+        self._stats = array.array('I', bytes(16))
+
+
+    @property
+    def hits(self) -> int:
+        """The number of lookups that were served from the cache."""
+        return self._stats[_HITS]
+
+
+    @property
+    def misses(self) -> int:
+        """The number of lookups that had to read from the font file."""
+        return self._stats[_MISSES]
+
+
+    def reset_stats(self):
+        """Reset the hit/miss counters."""
+        self._stats[_HITS] = 0
+        self._stats[_MISSES] = 0
+
+
+    def clear(self):
+        """Forget all cached glyphs."""
+        self._stats[_COUNT] = 0
+
+
+    def _load(self, char: int, slot: int):
+        """Read the glyph for `char` from the font file into the given slot."""
+        start = slot * _GLYPH_BYTES
+        self.font_file.seek(DisplayCore._utf8_glyph_offset(self.index, char))
+        self.font_file.readinto(self._buf_view[start:start + _GLYPH_BYTES])
+
+
+    @micropython.viper
+    def get(self, char: int) -> int:
+        """Return the slot index for the given codepoint, loading it if needed.
+
+        The glyph data starts at `slot * 8` in `GlyphCache.buf`.
+        """
+        keys = ptr16(self._keys)
+        ages = ptr32(self._ages)
+        stats = ptr32(self._stats)
+
+        tick = int(stats[_TICK]) + 1
+        stats[_TICK] = tick
+        count = int(stats[_COUNT])
+
+        # search filled slots for the glyph, tracking the oldest slot as we go
+        oldest = 0
+        idx = 0
+        while idx < count:
+            if int(keys[idx]) == char:
+                ages[idx] = tick
+                stats[_HITS] = int(stats[_HITS]) + 1
+                return idx
+            if int(ages[idx]) < int(ages[oldest]):
+                oldest = idx
+            idx += 1
+
+        # glyph not found. Use the next empty slot, or replace the oldest glyph.
+        stats[_MISSES] = int(stats[_MISSES]) + 1
+        if count < int(self.size):
+            oldest = count
+            stats[_COUNT] = count + 1
+
+        self._load(char, oldest)
+        keys[oldest] = char
+        ages[oldest] = tick
+        return oldest
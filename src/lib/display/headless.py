@@ -0,0 +1,290 @@
+"""A headless display backend, for running MicroHydra's display code without any real hardware.
+
+This is intended for the MicroPython unix port, for benchmarking and testing the display driver off-device.
+`HeadlessDisplay` is a normal `Display` (it uses the same ST7789 driver and framebuffer code),
+but it writes to a `HeadlessSPI`, which records the SPI traffic instead of sending it.
+
+The HeadlessSPI decodes the ST7789 commands it receives into a copy of the panel's memory,
+so the frame that would actually be shown on the display can be saved as a PPM image.
+
+Example:
+    from lib.display.headless import HeadlessDisplay
+
+    display = HeadlessDisplay()
+    display.text("Hello", 10, 10, 0xffff)
+    display.show()
+    print(display.show_bytes, display.show_transactions)
+    display.save_ppm("frame.ppm")
+
+Key notes on HeadlessDisplay:
+  - Importing this module installs a fake `machine` module (with do-nothing `SPI`, `Pin`, and `PWM`)
+    when the real `machine` module has no `SPI` (as is the case on the unix port).
+    It must be imported before anything else from `lib.display`.
+
+  - `show_bytes` and `show_transactions` hold the SPI bytes and writes used by the most recent `show`.
+    When `async_flush` is used, `show` waits for the frame to be sent so that these are complete.
+
+  - The panel's contents are only updated by SPI writes, so the saved image reflects
+    what the driver actually sent (not just what's in the framebuffer).
+    Hardware vertical scrolling (VSCRDEF/VSCSAD) is applied to the panel's rows when reading them,
+    as it is on the ST7789 when the MADCTL MV and MY bits are clear.
+
+  - Since there's no filesystem root to load the UTF8 font from,
+    the font is loaded from `font_path` (relative to the current directory) instead.
+"""
+
+import sys
+import struct
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Fake hardware ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+_CASET = const(0x2a)
+_RASET = const(0x2b)
+_RAMWR = const(0x2c)
+_VSCRDEF = const(0x33)
+_VSCSAD = const(0x37)
+
+# The ST7789's RAM is 240x320
+_PANEL_WIDTH = const(320)
+_PANEL_HEIGHT = const(320)
+
+
+class HeadlessPin:
+    """A Pin that only stores its value."""
+
+    OUT = 1
+    IN = 0
+
+    def __init__(self, *args, value=0, **kwargs):  # noqa: ARG002, D107
+        self._value = value
+
+    def on(self):  # noqa: D102
+        self._value = 1
+
+    def off(self):  # noqa: D102
+        self._value = 0
+
+    def value(self, val=None):  # noqa: D102
+        if val is None:
+            return self._value
+        self._value = val
+        return None
+
+    def __call__(self, val=None):  # noqa: D102
+        return self.value(val)
+
+
+
+class HeadlessPWM:
+    """A PWM that only stores its duty."""
+
+    def __init__(self, *args, duty_u16=0, **kwargs):  # noqa: ARG002, D107
+        self._duty = duty_u16
+
+    def duty_u16(self, val=None):  # noqa: D102
+        if val is None:
+            return self._duty
+        self._duty = val
+        return None
+
+    def freq(self, *args):  # noqa: D102
+        pass
+
+    def deinit(self):  # noqa: D102
+        pass
+
+
+
+class HeadlessSPI:
+    """Record SPI writes, and decode ST7789 pixel data into a copy of the panel's memory."""
+
+    def __init__(self, *args, dc=None, **kwargs):  # noqa: ARG002
+        """Create the HeadlessSPI.
+
+        `dc` should be the data/command pin given to the display, and is used to tell commands from data.
+        """
+        self.dc = dc
+        # RGB565 (big endian, as it is sent) for every pixel in the panel's RAM
+        self.panel = bytearray(_PANEL_WIDTH * _PANEL_HEIGHT * 2)
+        self._command = 0
+        self._window = [0, 0, _PANEL_WIDTH - 1, _PANEL_HEIGHT - 1]
+        self._cursor_x = 0
+        self._cursor_y = 0
+        # vertical scroll area (first row, number of rows), and the row shown at the top of it
+        self._scroll_area = (0, _PANEL_HEIGHT)
+        self._scroll_start = 0
+        self.reset()
+
+
+    def reset(self):
+        """Reset the write counters."""
+        self.transactions = 0
+        self.bytes = 0
+
+
+    def init(self, *args, **kwargs):
+        """Do nothing."""
+
+    def deinit(self):
+        """Do nothing."""
+
+
+    def write(self, buf):
+        """Record a write, and update the panel if it contains pixels."""
+        self.transactions += 1
+        self.bytes += len(buf)
+
+        if self.dc is not None and not self.dc.value():
+            self._command = buf[0]
+            if self._command == _RAMWR:
+                self._cursor_x = self._window[0]
+                self._cursor_y = self._window[1]
+        elif self._command == _CASET:
+            self._window[0], self._window[2] = struct.unpack('>HH', buf)
+        elif self._command == _RASET:
+            self._window[1], self._window[3] = struct.unpack('>HH', buf)
+        elif self._command == _RAMWR:
+            self._write_pixels(buf)
+        elif self._command == _VSCRDEF:
+            self._scroll_area = struct.unpack('>HHH', buf)[:2]
+        elif self._command == _VSCSAD:
+            self._scroll_start = struct.unpack('>H', buf)[0]
+
+
+    def panel_row(self, line: int) -> int:
+        """Get the row of panel memory that is shown on the given line (after vertical scrolling)."""
+        first, size = self._scroll_area
+        if first <= line < first + size:
+            return first + (line - first + self._scroll_start - first) % size
+        return line
+
+
+    def _write_pixels(self, buf):
+        """Copy RGB565 data into the panel, one row of the current window at a time."""
+        x0, _, x1, y1 = self._window
+        panel = memoryview(self.panel)
+        data = memoryview(buf)
+        idx = 0
+        end = len(data) & ~1
+        while idx < end and self._cursor_y <= y1:
+            x = self._cursor_x
+            y = self._cursor_y
+            row_len = min((x1 + 1 - x) * 2, end - idx)
+            if y < _PANEL_HEIGHT and x < _PANEL_WIDTH:
+                start = (y * _PANEL_WIDTH + x) * 2
+                copy_len = min(row_len, (_PANEL_WIDTH - x) * 2)
+                panel[start:start + copy_len] = data[idx:idx + copy_len]
+            idx += row_len
+            x += row_len // 2
+            if x > x1:
+                x = x0
+                self._cursor_y += 1
+            self._cursor_x = x
+
+
+
+class _Machine:
+    """Stands in for the `machine` module."""
+
+    SPI = HeadlessSPI
+    Pin = HeadlessPin
+    PWM = HeadlessPWM
+
+
+try:
+    from machine import SPI
+except ImportError:
+    sys.modules['machine'] = _Machine
+
+
+from . import st7789
+from .display import Display
+from .framescheduler import FrameScheduler
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ HeadlessDisplay ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+class HeadlessDisplay(Display):
+    """A Display that writes to a HeadlessSPI."""
+
+    def __init__(
+            self,
+            *,
+            width: int = 135,
+            height: int = 240,
+            rotation: int = 1,
+            font_path: str = "font/utf8_8x8.bin",
+            target_fps: int = 0,
+            **kwargs):
+        """Initialize the HeadlessDisplay.
+
+        The default size and rotation match the default MicroHydra device.
+        Any other kwargs are passed to the ST7789 driver (and DisplayCore).
+        """
+        self.show_bytes = 0
+        self.show_transactions = 0
+        self.dc = HeadlessPin()
+        self.frames = FrameScheduler(target_fps)
+        st7789.ST7789.__init__(
+            self,
+            HeadlessSPI(dc=self.dc),
+            width,
+            height,
+            dc=self.dc,
+            cs=HeadlessPin(value=1),
+            rotation=rotation,
+            font_path=font_path,
+            **kwargs,
+            )
+        Display.draw_overlays = True
+
+
+    def show(self):
+        """Write changes to the (headless) display, and record the SPI traffic used."""
+        spi = self.spi
+        start_bytes = spi.bytes
+        start_transactions = spi.transactions
+
+        super().show()
+        self.wait_flush()
+
+        self.show_bytes = spi.bytes - start_bytes
+        self.show_transactions = spi.transactions - start_transactions
+
+
+    def panel_pixel(self, x: int, y: int) -> int:
+        """Get the RGB565 color that the panel is showing at the given (display) position."""
+        idx = (self.spi.panel_row(y + self.ystart) * _PANEL_WIDTH + x + self.xstart) * 2
+        panel = self.spi.panel
+        return (panel[idx] << 8) | panel[idx + 1]
+
+
+    def panel_bytes(self) -> bytearray:
+        """Get the visible part of the panel, as big endian RGB565."""
+        row_len = self.width * 2
+        out = bytearray(row_len * self.height)
+        panel = memoryview(self.spi.panel)
+        for y in range(self.height):
+            start = (self.spi.panel_row(y + self.ystart) * _PANEL_WIDTH + self.xstart) * 2
+            out[y * row_len:(y + 1) * row_len] = panel[start:start + row_len]
+        return out
+
+
+    def save_ppm(self, path: str):
+        """Save the panel's current contents as a binary (P6) PPM image."""
+        data = self.panel_bytes()
+        width = self.width
+        with open(path, 'wb') as f:
+            f.write(f"P6\n{width} {self.height}\n255\n".encode())
+            row = bytearray(width * 3)
+            for y in range(self.height):
+                idx = y * width * 2
+                for x in range(0, width * 3, 3):
+                    color = (data[idx] << 8) | data[idx + 1]
+                    red = (color >> 11) & 0x1f
+                    green = (color >> 5) & 0x3f
+                    blue = color & 0x1f
+                    row[x] = (red << 3) | (red >> 2)
+                    row[x + 1] = (green << 2) | (green >> 4)
+                    row[x + 2] = (blue << 3) | (blue >> 2)
+                    idx += 2
+                f.write(row)
@@ -9,6 +9,9 @@ Key notes on Palette:
 
   - Returns an RGB565 color when using normal framebuffer, or an index of the color if use_tiny_buf.
     (This makes it so that you can pass a `Palette[i]` to the Display class in either mode.)
+    `use_tiny_buf` is also set when the Display uses the 8-bit (256 color) framebuffer.
+
+  - Holds 16 colors by default, and is expanded to 256 colors when the 8-bit framebuffer is used.
 
   - Palette is a singleton, which is important so that different MH classes can modify and share it's data
     (without initializing the Display).
@@ -45,3 +48,27 @@ class Palette:
     def __iter__(self):
         for i in range(len(self)):
             yield self[i]
+
+    def expand_to_256(self):
+        """Expand the palette to 256 colors, for use with an 8-bit framebuffer.
+
+        The existing colors are kept, and the new colors are filled with
+        a 6x6x6 color cube (indices 16-231) followed by a 24 step grayscale ramp (indices 232-255).
+        """
+        if len(self) >= 256:
+            return
+        old_buf = self.buf
+        Palette.buf = bytearray(512)
+        self.buf[:len(old_buf)] = old_buf
+
+        levels = (0, 95, 135, 175, 215, 255)
+        idx = 16
+        for r in levels:
+            for g in levels:
+                for b in levels:
+                    self[idx] = ((r & 0xf8) << 8) | ((g & 0xfc) << 3) | (b >> 3)
+                    idx += 1
+        for i in range(24):
+            gray = 8 + i * 10
+            self[idx] = ((gray & 0xf8) << 8) | ((gray & 0xfc) << 3) | (gray >> 3)
+            idx += 1
@@ -0,0 +1,50 @@
+"""A bitmap palette that is converted for the display once, rather than every time it's drawn.
+
+`DisplayCore.bitmap` must convert each palette color into the format used by the framebuffer
+(byte-swapped RGB565, or a palette index) before it can draw.
+Normal palettes (lists or tuples of colors) are converted and cached by the display based on their contents,
+but a PreparedPalette skips even the cache lookup, and keeps its converted colors for as long as it exists.
+
+Example:
+    icon_palette = PreparedPalette([0x0000, 0xffff])
+    ...
+    display.bitmap(icons, x, y, index=2, palette=icon_palette)
+
+Key notes on PreparedPalette:
+  - The colors are fixed when the PreparedPalette is created.
+    To change them, create a new PreparedPalette.
+
+  - The converted colors are stored for the display mode they were first drawn with,
+    and are only converted again if the display's buffer mode changes.
+"""
+
+
+class PreparedPalette:
+    """A fixed list of colors, with a cached copy formatted for the display."""
+
+    def __init__(self, colors):
+        """Create a PreparedPalette from a list of colors."""
+        self.colors = tuple(colors)
+        self._formatted = None
+        self._format = None
+
+
+    def __len__(self) -> int:
+        return len(self.colors)
+
+
+    def __getitem__(self, key: int) -> int:
+        return self.colors[key]
+
+
+    def __iter__(self):
+        return iter(self.colors)
+
+
+    def prepare(self, display):
+        """Get the colors formatted for the given display (as an `array('H')`)."""
+        color_format = display._color_format  # noqa: SLF001
+        if self._format != color_format:
+            self._formatted = display._format_palette(self.colors)  # noqa: SLF001
+            self._format = color_format
+        return self._formatted
@@ -1,12 +1,22 @@
-"""Object class for loading/structuring a raw bitmap file for use with the Display driver."""
+"""Object class for loading/structuring a raw bitmap file for use with the Display driver.
+
+Recently loaded files are kept in a small cache (shared by all RawBitmaps),
+so that bitmaps which are drawn repeatedly (like app icons in the launcher) don't need to be re-read.
+When the cached files would take more than `RawBitmap.cache_budget` bytes,
+the least recently used files are removed from the cache.
+"""
 import os
 
 
 class RawBitmap:
     """Open a raw bitmap file for use with the Display core."""
 
-    cached_path = None
-    cache = None
+    # maximum number of bytes of bitmap data to keep in the cache
+    cache_budget = 1024
+    # {file_path: [buffer, last used tick]}
+    _cache = {}
+    _cache_bytes = 0
+    _tick = 0
 
     def __init__(self, file_path: str, width: int, height: int, palette: list[int, ...]):
         """Construct the bitmap from given file."""
@@ -19,23 +29,47 @@ class RawBitmap:
         while len(palette) > (1 << self.BPP):
             self.BPP += 1
 
-        if RawBitmap.cached_path == file_path:
-            # Use the cached buffer rather than reloading
-            self.size = len(RawBitmap.cache)
-            self.BITMAP = RawBitmap.cache
-        else:
-            # Load and cache a new buffer
-            self.size = os.stat(file_path)[6]
-            with open(file_path, 'rb') as f:
-                buf = bytearray(self.size)
-                f.readinto(buf)
-                self.BITMAP = memoryview(buf)
-
-            RawBitmap.cached_path = file_path
-            RawBitmap.cache = self.BITMAP
+        self.BITMAP = RawBitmap.load(file_path)
+        self.size = len(self.BITMAP)
+
+
+    @classmethod
+    def is_cached(cls, file_path: str) -> bool:
+        """Check if the given file is in the cache (and can be opened without reading from storage)."""
+        return file_path in cls._cache
+
+
+    @classmethod
+    def load(cls, file_path: str) -> memoryview:
+        """Get the contents of the given file, from the cache if possible (or load and cache it)."""
+        cls._tick += 1
+        entry = cls._cache.get(file_path)
+        if entry is not None:
+            entry[1] = cls._tick
+            return entry[0]
+
+        # Load and cache a new buffer
+        size = os.stat(file_path)[6]
+        with open(file_path, 'rb') as f:
+            buf = bytearray(size)
+            f.readinto(buf)
+        bitmap = memoryview(buf)
+
+        # remove the least recently used files to make room
+        while cls._cache and cls._cache_bytes + size > cls.cache_budget:
+            oldest = None
+            for path, (_, tick) in cls._cache.items():
+                if oldest is None or tick < cls._cache[oldest][1]:
+                    oldest = path
+            cls._cache_bytes -= len(cls._cache.pop(oldest)[0])
+
+        cls._cache[file_path] = [bitmap, cls._tick]
+        cls._cache_bytes += size
+        return bitmap
+
 
     @classmethod
     def clean(cls):
         """Clear the bitmap cache."""
-        cls.cached_path = None
-        cls.cache = None
+        cls._cache = {}
+        cls._cache_bytes = 0
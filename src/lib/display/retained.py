@@ -0,0 +1,235 @@
+"""A retained drawing layer, for redrawing only the parts of a UI that have changed.
+
+Menu-style screens usually `fill` the display and redraw everything whenever anything changes.
+With a RetainedLayer, each part of the screen (a "widget") is drawn between `begin` and `end` calls.
+The widget's drawing commands are recorded (using a DisplayList) and hashed,
+and only widgets whose commands changed since the last frame are redrawn (and sent to the display).
+
+Example:
+    layer = RetainedLayer(display)
+
+    layer.begin_frame(bg_color)
+    layer.begin('title', 0, 0, 240, 32)
+    display.text("Title", 8, 8, text_color)
+    layer.end()
+    ...
+    layer.end_frame()
+    display.show()
+
+Key notes on RetainedLayer:
+  - Everything in the frame should be drawn inside a widget.
+    Widgets should draw inside the area given to `begin`,
+    but the area actually drawn to is also tracked (using the display's dirty regions).
+
+  - A changed widget's area is cleared with the background color before it's redrawn,
+    and any widgets overlapping it are redrawn (in their original order).
+
+  - The whole frame is redrawn when widgets are added, removed, reordered, or moved,
+    when the background color changes, or after `invalidate` is called.
+    (Call `invalidate` if anything else draws over the layer, like a popup window.)
+
+  - Strings are compared by value, but other objects (bitmaps, palettes, coordinate arrays)
+    are compared by identity, so changing their contents is not detected.
+
+  - When the display is already using a display list, widgets are drawn immediately after a `fill`.
+"""
+
+import array
+
+from .displaylist import DisplayList
+
+
+
+class _Widget:
+    """The recorded state of one widget."""
+
+    def __init__(self):
+        self.area = None
+        # the given area, expanded to include everything the widget draws
+        self.bounds = None
+        # the area to clear before redrawing (the old and new bounds)
+        self.clear_bounds = None
+        self.hash = None
+        self.changed = True
+        self.display_list = DisplayList()
+
+
+
+class RetainedLayer:
+    """Record widgets each frame, and redraw only the widgets that changed."""
+
+    def __init__(self, display):
+        """Create a RetainedLayer for the given Display."""
+        self.display = display
+        self._widgets = {}
+        self._order = []
+        self._prev_order = []
+        self._bg = None
+        self._full_redraw = True
+        self._passthrough = False
+        self._current = None
+
+        # recording draws marks dirty regions; these hold the real dirty regions while recording.
+        self._saved_rects = array.array('H', display._dirty_rects)  # noqa: SLF001
+        self._saved_count = 0
+
+
+    def invalidate(self):
+        """Redraw the entire frame next time `end_frame` is called."""
+        self._full_redraw = True
+
+
+    def begin_frame(self, bg_color: int):
+        """Start a new frame, using the given background color."""
+        if bg_color != self._bg:
+            self._bg = bg_color
+            self._full_redraw = True
+        self._prev_order = self._order
+        self._order = []
+
+        # the display is already recording everything, so just draw normally.
+        self._passthrough = self.display.display_list is not None
+        if self._passthrough:
+            self.display.fill(bg_color)
+
+
+    def begin(self, key, x: int, y: int, width: int, height: int):
+        """Start recording the widget with the given key, which draws inside the given area."""
+        if self._passthrough:
+            return
+
+        widget = self._widgets.get(key)
+        if widget is None:
+            widget = _Widget()
+            self._widgets[key] = widget
+
+        area = (x, y, width, height)
+        if widget.area != area:
+            widget.area = area
+            self._full_redraw = True
+
+        # the dirty regions from recording are used to find the widget's bounds
+        display = self.display
+        self._saved_rects[:] = display._dirty_rects  # noqa: SLF001
+        self._saved_count = display._dirty_count  # noqa: SLF001
+        display._dirty_count = 0  # noqa: SLF001
+
+        widget.display_list.clear()
+        display.display_list = widget.display_list
+        self._current = widget
+        self._order.append(key)
+
+
+    def end(self):
+        """Finish recording the current widget."""
+        widget = self._current
+        if widget is None:
+            return
+        self._current = None
+
+        display = self.display
+        display.display_list = None
+
+        # find the bounds of everything drawn by the widget
+        x0, y0, width, height = widget.area
+        x1 = x0 + width
+        y1 = y0 + height
+        rects = display._dirty_rects  # noqa: SLF001
+        for i in range(0, display._dirty_count * 4, 4):  # noqa: SLF001
+            x0 = min(x0, rects[i])
+            y0 = min(y0, rects[i + 1])
+            x1 = max(x1, rects[i + 2])
+            y1 = max(y1, rects[i + 3])
+        bounds = (x0, y0, x1 - x0, y1 - y0)
+        widget.clear_bounds = bounds if widget.bounds is None else self._union(bounds, widget.bounds)
+        widget.bounds = bounds
+
+        display._dirty_rects[:] = self._saved_rects  # noqa: SLF001
+        display._dirty_count = self._saved_count  # noqa: SLF001
+
+        new_hash = self._hash(widget.display_list)
+        widget.changed = new_hash != widget.hash
+        widget.hash = new_hash
+
+
+    def end_frame(self) -> int:
+        """Draw the widgets that changed this frame.
+
+        Returns the number of widgets that were drawn.
+        """
+        if self._passthrough:
+            return 0
+
+        order = self._order
+        widgets = self._widgets
+        display = self.display
+
+        if order != self._prev_order:
+            self._full_redraw = True
+            # forget widgets that weren't drawn this frame
+            for key in list(widgets):
+                if key not in order:
+                    del widgets[key]
+
+        if self._full_redraw:
+            self._full_redraw = False
+            display.fill(self._bg)
+            for key in order:
+                self._draw_widget(widgets[key])
+            return len(order)
+
+        # clear the changed widgets
+        dirty_areas = []
+        for key in order:
+            widget = widgets[key]
+            if widget.changed:
+                x, y, width, height = widget.clear_bounds
+                display.rect(x, y, width, height, self._bg, fill=True)
+                dirty_areas.append(widget.clear_bounds)
+
+        if not dirty_areas:
+            return 0
+
+        # redraw changed widgets, and any widgets that overlap a redrawn area
+        drawn = 0
+        for key in order:
+            widget = widgets[key]
+            if not widget.changed:
+                if not self._overlaps_any(widget.bounds, dirty_areas):
+                    continue
+                dirty_areas.append(widget.bounds)
+            self._draw_widget(widget)
+            drawn += 1
+        return drawn
+
+
+    def _draw_widget(self, widget: _Widget):
+        """Draw a widget's recorded commands to the display."""
+        widget.display_list.replay(self.display, 0, self.display.height)
+
+
+    @staticmethod
+    def _union(area_a: tuple, area_b: tuple) -> tuple:
+        ax, ay, awidth, aheight = area_a
+        bx, by, bwidth, bheight = area_b
+        x0 = min(ax, bx)
+        y0 = min(ay, by)
+        return (x0, y0, max(ax + awidth, bx + bwidth) - x0, max(ay + aheight, by + bheight) - y0)
+
+
+    @staticmethod
+    def _overlaps_any(area: tuple, areas: list) -> bool:
+        x, y, width, height = area
+        for ox, oy, owidth, oheight in areas:
+            if x < ox + owidth and ox < x + width and y < oy + oheight and oy < y + height:
+                return True
+        return False
+
+
+    @staticmethod
+    def _hash(display_list: DisplayList) -> int:
+        """Hash the recorded commands (and the objects they use)."""
+        result = hash(bytes(display_list.ops))
+        for obj in display_list.objs:
+            result = (result * 31 + (hash(obj) if isinstance(obj, str) else id(obj))) & 0x3fffffff
+        return result
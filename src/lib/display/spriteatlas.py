@@ -0,0 +1,140 @@
+"""A compressed sprite atlas, for drawing animation frames and icons with `DisplayCore.sprite`.
+
+Bitmap modules store every frame as raw, packed bits, and the whole bitmap is held in RAM.
+A SpriteAtlas stores each frame compressed, and frames are decoded directly into the framebuffer as they're drawn.
+When the atlas is opened from a file with `stream=True`, only the header, palette, and frame index are kept in RAM,
+and frames are read from the file in small chunks while they're drawn.
+
+Atlases are created from a sprite sheet with `tools/bitmaps/atlas_converter.py`,
+either as a binary (.mhsa) file, or as a Python module containing an `ATLAS` bytes object
+(which stays in flash when frozen into the firmware).
+
+Example:
+    atlas = SpriteAtlas("/apps/myapp/sprites.mhsa", stream=True)
+    display.sprite(atlas, frame_idx, x, y, key=atlas.PALETTE[0])
+
+A streaming atlas keeps its file open until `close` is called,
+or it can be used as a context manager to close the file automatically:
+    with SpriteAtlas("/apps/myapp/sprites.mhsa", stream=True) as atlas:
+        ...
+
+Atlas format (all values little endian):
+    Header:
+        4s  magic (b"MHSA")
+        B   version (1)
+        B   bits per pixel (1, 2, 4, or 8)
+        H   number of palette colors
+        H   number of frames
+        2x  (reserved)
+    Palette:
+        H   RGB565 color (for each color)
+    Frame index:
+        I   frame data offset (from the start of the atlas)
+        I   frame data length
+        H   frame width
+        H   frame height
+        B   frame encoding
+        3x  (reserved)
+    Frame data.
+
+Frame encodings (pixels are stored as palette indices, in rows from top to bottom):
+    0 - Raw:
+        Packed bits, most significant bit first (like bitmap modules), with rows packed continuously.
+    1 - RLE:
+        A control byte `c`, followed by data.
+        If `c & 0x80`, the next byte is a palette index to repeat `(c & 0x7f) + 1` times,
+        otherwise `c + 1` literal palette indices (one per byte) follow.
+    2 - Palette run (for 4 or fewer bits per pixel):
+        Each byte holds a palette index in its top `bpp` bits, and a run length (minus 1) in the rest.
+
+Runs may continue from one row to the next.
+"""
+
+import struct
+
+
+_MAGIC = const(b"MHSA")
+_VERSION = const(1)
+_HEADER_FORMAT = const("<4sBBHH2x")
+_HEADER_SIZE = const(12)
+_INDEX_FORMAT = const("<IIHHB3x")
+_INDEX_SIZE = const(16)
+
+
+
+class SpriteAtlas:
+    """A set of compressed frames, sharing one palette."""
+
+    def __init__(self, source, *, stream: bool = False):
+        """Open a sprite atlas.
+
+        Args:
+            source (str|bytes):
+                The path to an atlas file, or the atlas data itself (such as the `ATLAS` from an atlas module).
+            stream (bool):
+                If True (and `source` is a path), frames are read from the file as they're drawn,
+                rather than loading the whole atlas into RAM.
+        """
+        self.file = None
+        self.data = None
+
+        if isinstance(source, str):
+            if stream:
+                # (the file stays open while streaming, and is closed by `close`)
+                self.file = open(source, 'rb')  # noqa: SIM115
+                header = self.file.read(_HEADER_SIZE)
+            else:
+                with open(source, 'rb') as f:
+                    self.data = f.read()
+                header = self.data
+        else:
+            self.data = source
+            header = source
+
+        magic, version, self.BPP, colors, self.FRAMES = struct.unpack_from(_HEADER_FORMAT, header, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self.close()
+            raise ValueError("Not a supported sprite atlas.")
+
+        # The palette and frame index are always kept in RAM.
+        table_size = colors * 2 + self.FRAMES * _INDEX_SIZE
+        if self.file:
+            table = self.file.read(table_size)
+        else:
+            table = memoryview(self.data)[_HEADER_SIZE:_HEADER_SIZE + table_size]
+        self.PALETTE = list(struct.unpack_from(f"<{colors}H", table, 0))
+        self._index = bytes(table[colors * 2:])
+
+        # holds data read from the file, while streaming
+        self.stream_buf = bytearray(256) if self.file else None
+
+
+    def __len__(self) -> int:
+        return self.FRAMES
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def frame(self, frame: int) -> tuple[int, int, int, int, int]:
+        """Get the offset, length, width, height, and encoding of the given frame."""
+        if not 0 <= frame < self.FRAMES:
+            raise IndexError("Sprite frame out of range.")
+        return struct.unpack_from(_INDEX_FORMAT, self._index, frame * _INDEX_SIZE)
+
+
+    def frame_size(self, frame: int) -> tuple[int, int]:
+        """Get the width and height of the given frame."""
+        return self.frame(frame)[2:4]
+
+
+    def close(self):
+        """Close the atlas file (if streaming)."""
+        if self.file:
+            self.file.close()
+            self.file = None
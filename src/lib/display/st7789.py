@@ -42,14 +42,19 @@ This driver supports:
 - RGB and BGR color orders
 """
 
+import array
 import struct
-from time import sleep_ms
+from time import sleep_ms, ticks_diff, ticks_us
 
 import framebuf
 
 from .palette import Palette
 from .displaycore import DisplayCore
 
+# mh_if not frozen:
+from .glyphcache import GlyphCache
+# mh_end_if
+
 
 # mh_if frozen:
 # # frozen firmware must access the font as a module,
@@ -109,6 +114,12 @@ _ENCODE_POS_16 = const("<HH")
 # must be at least 256 for 16 bit wide fonts
 _BUFFER_SIZE = const(256)
 
+# number of gate lines (rows) in the ST7789's RAM, used for the vertical scroll definition
+_PANEL_LINES = const(320)
+
+# number of lines converted and sent in each SPI write when using the tiny buf
+_DEFAULT_STRIP_LINES = const(16)
+
 _BIT7 = const(0x80)
 _BIT6 = const(0x40)
 _BIT5 = const(0x20)
@@ -195,6 +206,10 @@ class ST7789(DisplayCore):
             cs=None,
             rotation=0,
             color_order='BGR',
+            async_flush=False,
+            double_buffer=False,
+            strip_lines=_DEFAULT_STRIP_LINES,
+            font_path="/font/utf8_8x8.bin",
             **kwargs):
         """Initialize display.
 
@@ -213,11 +228,68 @@ class ST7789(DisplayCore):
             - 3-Inverted Landscape
 
             color_order (literal['RGB'|'BGR']):
+
+            async_flush (bool):
+                If True, `show` hands the changed regions to a background thread and returns immediately.
+                Use `wait_flush` to wait for the previous frame to finish.
+                (This is ignored when `use_display_list` is True,
+                and on devices where the SDCard shares the display's SPI bus.)
+            double_buffer (bool):
+                If True (and async_flush is True), a second framebuffer is allocated,
+                and changed regions are copied to it before flushing.
+                This prevents drawing on the next frame from tearing the frame being sent.
+            strip_lines (int):
+                When using the tiny buf (or 8bit buf), this many lines are converted to RGB565 for each SPI write.
+                Larger values mean fewer SPI transactions, but use more memory (width * 2 bytes per line).
+            font_path (str):
+                The path to the UTF8 font binary. (Ignored on frozen firmware, which has the font built in.)
         """
         self.rotations = self._find_rotations(width, height)
 
         super().__init__(width, height, rotation=rotation, **kwargs)
 
+        # show() can hand regions to a background thread for writing.
+        # These hold the regions (and buffer) that are currently being written.
+        self._flush_rects = array.array('H', self._dirty_rects)
+        self._flush_count = 0
+        self._flush_pending = False
+        self._flush_error = None
+        # the time taken to write the last frame in the background (in microseconds)
+        self._flush_us = 0
+        self._flush_buf = self.fbuf
+        # the display list is drawn into the framebuffer while flushing, so it can't be done in the background.
+        async_flush = async_flush and self.display_list is None
+        # mh_if shared_sdcard_spi:
+        # # The SDCard shares the display's SPI bus, and could be used while a frame is written in the background.
+        # async_flush = False
+        # mh_end_if
+        self._async_flush = async_flush
+
+        if self.use_tiny_buf or self.use_8bit_buf:
+            # Converting indexed pixels uses a lookup table of RGB565 colors.
+            # For GS4, each entry converts one byte into two pixels. For GS8, each entry is one pixel.
+            # The table is rebuilt whenever the palette changes.
+            self._color_lut = bytearray(1024 if self.use_tiny_buf else 512)
+            self._lut_palette = bytearray(len(self.palette.buf))
+            self._build_color_lut()
+            # Converted lines are collected in a strip buffer before being written to SPI
+            if self.display_list is not None:
+                # (a strip can't be taller than the band it's converted from)
+                strip_lines = min(strip_lines, self.display_list_lines)
+            self._strip_buf = bytearray(max(width, height) * 2 * max(strip_lines, 1))
+            self._strip_view = memoryview(self._strip_buf)
+
+        if async_flush:
+            import _thread
+            if double_buffer:
+                self._flush_buf = bytearray(len(memoryview(self.fbuf)))
+            # The flush thread waits on _flush_request, which `show` releases to start writing a frame.
+            # _flush_lock is held from then until the frame has been written (for `wait_flush`).
+            self._flush_request = _thread.allocate_lock()
+            self._flush_request.acquire()
+            self._flush_lock = _thread.allocate_lock()
+            _thread.start_new_thread(self._flush_worker, ())
+
         self.xstart = 0
         self.ystart = 0
         self.spi = spi
@@ -226,6 +298,14 @@ class ST7789(DisplayCore):
         self.cs = cs
         self._rotation = rotation % 4
         self.color_order = _RGB if color_order == "RGB" else _BGR
+        # The scroll region (set with `scroll_region`) is the lines from _scroll_top to _scroll_end.
+        # When scrolling in hardware, _scroll_offset is the number of lines the panel has been scrolled by,
+        # and _scroll_sent is the offset the panel is currently showing.
+        self._scroll_top = 0
+        self._scroll_end = 0
+        self._scroll_offset = 0
+        self._scroll_sent = 0
+        self._hw_scroll = False
         self.hard_reset()
         # yes, twice, once is not always enough
         self.init(_ST7789_INIT_CMDS)
@@ -237,8 +317,9 @@ class ST7789(DisplayCore):
             self.set_brightness(self.config['brightness'])
 
         # mh_if not frozen:
-        # when not frozen, the utf8 font is read as needed from a binary.
-        self.utf8_font = open("/font/utf8_8x8.bin", "rb", buffering = 0)  # noqa: SIM115
+        # when not frozen, the utf8 font is read as needed from a binary,
+        # and recently used glyphs are cached in RAM.
+        self.utf8_font = GlyphCache(font_path)
         # mh_end_if
 
 
@@ -277,12 +358,41 @@ class ST7789(DisplayCore):
 
 
     @micropython.viper
-    def _write_tiny_buf(self, y_min: int, y_max: int):
+    def _build_color_lut(self):
+        """Build the lookup table used to convert indexed framebuffer bytes into RGB565 pixels."""
+        self._lut_palette[:] = self.palette.buf
+        palette = ptr16(self._lut_palette)
+        lut = ptr16(self._color_lut)
+        needs_swap = bool(self.needs_swap)
+        palette_len = int(len(self._lut_palette)) >> 1
+
+        # swap colors in palette if needed
+        if needs_swap:
+            for i in range(palette_len):
+                palette[i] = ((palette[i] & 255) << 8) | (palette[i] >> 8)
+
+        if self.use_8bit_buf:
+            # Each byte is one pixel
+            for i in range(256):
+                lut[i] = palette[i]
+        else:
+            # Each byte holds two pixels; The high bits are the leftmost pixel.
+            for i in range(256):
+                lut[i * 2] = palette[i >> 4]
+                lut[i * 2 + 1] = palette[i & 0xf]
+
+        # store the unswapped palette for comparison later
+        if needs_swap:
+            self._lut_palette[:] = self.palette.buf
+
+
+    @micropython.viper
+    def _write_tiny_buf(self, x_min: int, y_min: int, x_max: int, y_max: int):
         """Convert tiny_buf data to RGB565 and write to SPI.
 
-        This Viper method iterates over each line from y_min to y_max,
-        converts the 4bit data to 16bit RGB565 format,
-        and sends the data over SPI.
+        This Viper method converts the 4bit data from the given region
+        to 16bit RGB565 format (two pixels at a time, using a lookup table),
+        and sends the data over SPI in strips of multiple lines.
         """
         # mh_if shared_sdcard_spi:
         # # TDeck shares SPI with SDCard
@@ -293,55 +403,160 @@ class ST7789(DisplayCore):
         self.dc.on()
 
         width = int(self.width)
-        start_y = int(y_min)
-        end_y = int(y_max)
-
-        # swap colors in palette if needed
-        if self.needs_swap:
-            palette_buf = bytearray(32)
-            target_palette_ptr = ptr16(palette_buf)
-            source_palette_ptr = ptr16(self.palette.buf)
-            for i in range(16):
-                target_palette_ptr[i] = ((source_palette_ptr[i] & 255) << 8) | (source_palette_ptr[i] >> 8)
-        else:
-            target_palette_ptr = ptr16(self.palette.buf)
+        y = y_min
+        line_width = x_max - x_min
+        # x where the last full pair of pixels ends
+        pair_end = x_max - (x_max & 1)
 
+        lut = ptr32(self._color_lut)
+        lut16 = ptr16(self._color_lut)
 
         # prepare variables for line conversion loop:
-        source_ptr = ptr8(self.fbuf)
+        source_ptr = ptr8(self._flush_buf)
         source_width = width // 2 if (width % 8 == 0) else ((width + 1) // 2)
-        output_buf = bytearray(width * 2)
-        output = ptr16(output_buf)
+
+        strip_buf = self._strip_buf
+        strip16 = ptr16(strip_buf)
+        strip32 = ptr32(strip_buf)
+        lines_per_strip = (int(len(strip_buf)) // 2) // line_width
+
+        out_idx = 0
+        strip_lines = 0
 
         # Iterate (vertically) over each horizontal line in given range:
-        while start_y < end_y:
-            source_start_idx = source_width * start_y
-            output_idx = 0
-            # Iterate over horizontal pixels:
-            while output_idx < width:
-                # Calculate source pixel location, and sample it.
-                source_idx = source_start_idx + (output_idx // 2)
-                sample = source_ptr[source_idx] >> 4 if (output_idx % 2 == 0) else source_ptr[source_idx] & 0xf
+        while y < y_max:
+            source_idx = source_width * y + (x_min >> 1)
+            x = x_min
+
+            # odd starting pixel is the low bits of the first byte
+            if x & 1:
+                strip16[out_idx] = lut16[(source_ptr[source_idx] << 1) + 1]
+                source_idx += 1
+                out_idx += 1
+                x += 1
+
+            # Convert 2 pixels at a time:
+            if out_idx & 1:
+                # output isn't 32bit aligned, so write each pixel separately
+                while x < pair_end:
+                    lut_idx = source_ptr[source_idx] << 1
+                    strip16[out_idx] = lut16[lut_idx]
+                    strip16[out_idx + 1] = lut16[lut_idx + 1]
+                    source_idx += 1
+                    out_idx += 2
+                    x += 2
+            else:
+                while x < pair_end:
+                    strip32[out_idx >> 1] = lut[source_ptr[source_idx]]
+                    source_idx += 1
+                    out_idx += 2
+                    x += 2
+
+            # odd ending pixel is the high bits of the last byte
+            if x < x_max:
+                strip16[out_idx] = lut16[source_ptr[source_idx] << 1]
+                out_idx += 1
+
+            # Write the strip to SPI once it's full
+            strip_lines += 1
+            if strip_lines >= lines_per_strip:
+                self._write_strip(out_idx * 2)
+                out_idx = 0
+                strip_lines = 0
+
+            y += 1
+
+        # Write any remaining lines
+        if out_idx:
+            self._write_strip(out_idx * 2)
+
+        if self.cs:
+            self.cs.on()
+
+
+    @micropython.viper
+    def _write_8bit_buf(self, x_min: int, y_min: int, x_max: int, y_max: int):
+        """Convert 8bit (GS8) data to RGB565 and write to SPI.
+
+        Each byte is a palette index, which is converted using the color lookup table.
+        Data is sent over SPI in strips of multiple lines, like `_write_tiny_buf`.
+        """
+        # mh_if shared_sdcard_spi:
+        # # TDeck shares SPI with SDCard
+        # self.spi.init(baudrate=_MH_DISPLAY_BAUDRATE)
+        # mh_end_if
+        if self.cs:
+            self.cs.off()
+        self.dc.on()
+
+        width = int(self.width)
+        y = y_min
+        line_width = x_max - x_min
+
+        lut = ptr16(self._color_lut)
+        source_ptr = ptr8(self._flush_buf)
+
+        strip_buf = self._strip_buf
+        strip16 = ptr16(strip_buf)
+        lines_per_strip = (int(len(strip_buf)) // 2) // line_width
+
+        out_idx = 0
+        strip_lines = 0
+
+        while y < y_max:
+            source_idx = width * y + x_min
+            source_end = source_idx + line_width
+            while source_idx < source_end:
+                strip16[out_idx] = lut[source_ptr[source_idx]]
+                source_idx += 1
+                out_idx += 1
 
-                output[output_idx] = target_palette_ptr[sample]
-                output_idx += 1
+            # Write the strip to SPI once it's full
+            strip_lines += 1
+            if strip_lines >= lines_per_strip:
+                self._write_strip(out_idx * 2)
+                out_idx = 0
+                strip_lines = 0
 
-            # Write buffer to SPI
-            self.spi.write(output_buf)
+            y += 1
 
-            start_y += 1
+        # Write any remaining lines
+        if out_idx:
+            self._write_strip(out_idx * 2)
 
         if self.cs:
             self.cs.on()
 
 
-    def _write_normal_buf(self, y_min: int, y_max: int):
-        """Write normal framebuf data, respecting show_y_min/max values."""
-        source_start_idx = y_min * self.width * 2
-        source_end_idx = y_max * self.width * 2
+    def _write_strip(self, length: int):
+        """Write the first `length` bytes of the strip buffer to SPI."""
+        self.spi.write(self._strip_view[:length])
 
-        if source_start_idx < source_end_idx:
-            self._write(None, memoryview(self.fbuf)[source_start_idx:source_end_idx])
+
+    def _write_normal_buf(self, x_min: int, y_min: int, x_max: int, y_max: int):
+        """Write normal framebuf data from the given region."""
+        width = self.width
+        fbuf = memoryview(self._flush_buf)
+
+        if x_min == 0 and x_max == width:
+            # full lines are contiguous, and can be written all at once
+            self._write(None, fbuf[y_min * width * 2:y_max * width * 2])
+            return
+
+        # mh_if shared_sdcard_spi:
+        # # TDeck shares SPI with SDCard
+        # self.spi.init(baudrate=_MH_DISPLAY_BAUDRATE)
+        # mh_end_if
+        if self.cs:
+            self.cs.off()
+        self.dc.on()
+        start_idx = (y_min * width + x_min) * 2
+        line_len = (x_max - x_min) * 2
+        for _ in range(y_max - y_min):
+            self.spi.write(fbuf[start_idx:start_idx + line_len])
+            start_idx += width * 2
+        if self.cs:
+            self.cs.on()
 
 
     def hard_reset(self):
@@ -363,6 +578,7 @@ class ST7789(DisplayCore):
 
     def soft_reset(self):
         """Soft reset display."""
+        self.wait_flush()
         self._write(_ST7789_SWRESET)
         sleep_ms(150)
 
@@ -375,6 +591,7 @@ class ST7789(DisplayCore):
             value (bool): if True enable sleep mode. if False disable sleep
             mode
         """
+        self.wait_flush()
         # mh_if shared_sdcard_spi:
         # # TDeck shares SPI with SDCard
         # self.spi.init(baudrate=_MH_DISPLAY_BAUDRATE)
@@ -393,6 +610,7 @@ class ST7789(DisplayCore):
             value (bool): if True enable inversion mode. if False disable
             inversion mode
         """
+        self.wait_flush()
         # mh_if shared_sdcard_spi:
         # # TDeck shares SPI with SDCard
         # self.spi.init(baudrate=_MH_DISPLAY_BAUDRATE)
@@ -416,6 +634,8 @@ class ST7789(DisplayCore):
 
             custom_rotations can have any number of rotations
         """
+        self.wait_flush()
+        self._disable_scroll()
         rotation %= len(self.rotations)
         self._rotation = rotation
         (
@@ -456,28 +676,398 @@ class ST7789(DisplayCore):
             self._write(_ST7789_RAMWR)
 
 
-    def show(self):
-        """Write the current framebuf to the display."""
-        # mh_if shared_sdcard_spi:
-        # # TDeck shares SPI with SDCard
-        # self.spi.init(baudrate=_MH_DISPLAY_BAUDRATE)
-        # mh_end_if
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Hardware scrolling: ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def scroll_region(self, top: int = 0, end: int|None = None):
+        """Set the lines (from `top` to `end`) that `scroll_lines` moves.
 
-        # Reset and clamp min/max vals
-        y_min, y_max = self.reset_show_y()
+        Lines outside of the region stay in place.
+        When the panel scrolls along the display's y axis (rotations without the MADCTL MV/MY bits),
+        the region is scrolled in hardware (VSCRDEF/VSCSAD), and only newly exposed lines are written.
+        Otherwise (the panel can only scroll along the display's x axis when MV is set),
+        the region is scrolled in the framebuffer, and only the parts of lines that changed are written.
 
-        if y_min >= y_max:
-            # nothing to show
+        Args:
+            top (int): The first line of the region.
+            end (int): The line after the end of the region (or the display height, if None).
+        """
+        end = self.height if end is None else min(end, self.height)
+        top = max(top, 0)
+        if top == self._scroll_top and end == self._scroll_end:
             return
+        if self.display_list is not None:
+            raise ValueError("scroll_region can't be used with a display list.")
+        if top >= end:
+            raise ValueError("scroll region must contain at least one line.")
+
+        self.wait_flush()
+        self._disable_scroll()
+        self._scroll_top = top
+        self._scroll_end = end
+        # the panel only scrolls along its own rows (and MY reverses them)
+        self._hw_scroll = not (self.rotations[self._rotation][0] & (_ST7789_MADCTL_MV | _ST7789_MADCTL_MY))
+        if self._hw_scroll:
+            first = self.ystart + top
+            size = end - top
+            self._write(_ST7789_VSCRDEF, struct.pack(">HHH", first, size, _PANEL_LINES - first - size))
+            self._write(_ST7789_VSCSAD, struct.pack(">H", first))
+
+
+    def scroll_lines(self, lines: int):
+        """Move the contents of the scroll region up by the given number of lines (or down, if negative).
+
+        The exposed lines keep their old contents, and should be drawn over.
+        If `scroll_region` hasn't been called, the region is the whole display.
+        """
+        if not self._scroll_end:
+            self.scroll_region()
+        top = self._scroll_top
+        end = self._scroll_end
+        size = end - top
+        width = self.width
+        if not lines:
+            return
+        self.wait_flush()
 
-        self._set_window(
-            0,
-            y_min,
-            self.width - 1,
-            y_max - 1,
-            )
+        # scroll only the lines in the region, using a framebuffer over those lines
+        if self.use_tiny_buf:
+            stride = (width + 1) // 2
+            buf_format = framebuf.GS4_HMSB
+        elif self.use_8bit_buf:
+            stride = width
+            buf_format = framebuf.GS8
+        else:
+            stride = width * 2
+            buf_format = framebuf.RGB565
+        if abs(lines) >= size:
+            # (the whole region is exposed)
+            self._mark_dirty(0, top, width, end)
+        elif not self._hw_scroll:
+            # (must be checked before the lines are moved)
+            self._mark_scroll_changes(top, end, lines, stride)
+
+        region = memoryview(self.fbuf)[top * stride:end * stride]
+        framebuf.FrameBuffer(region, width, size, buf_format).scroll(0, -lines)
+
+        if not self._hw_scroll or abs(lines) >= size:
+            return
 
+        self._scroll_offset = (self._scroll_offset + lines) % size
+        self._shift_dirty_rects(top, end, lines)
+        if lines > 0:
+            self._mark_dirty(0, end - lines, width, end)
+        else:
+            self._mark_dirty(0, top, width, top - lines)
+
+
+    @staticmethod
+    @micropython.viper
+    def _diff_span(buf, a: int, b: int, length: int) -> int:
+        """Compare `length` bytes of `buf` at offsets `a` and `b`.
+
+        Returns `(first << 16) | (last + 1)` for the first and last bytes that differ, or 0 if none do.
+        """
+        buf_ptr = ptr8(buf)
+        first = 0
+        while first < length and buf_ptr[a + first] == buf_ptr[b + first]:
+            first += 1
+        if first == length:
+            return 0
+        last = length - 1
+        while buf_ptr[a + last] == buf_ptr[b + last]:
+            last -= 1
+        return (first << 16) | (last + 1)
+
+
+    def _mark_scroll_changes(self, top: int, end: int, lines: int, stride: int):
+        """Mark the parts of the scroll region that will change when it's scrolled in the framebuffer.
+
+        After scrolling, each line holds the line `lines` below it, so only the columns where those two lines differ
+        need to be written. (The exposed lines keep their old contents, and are marked when they're drawn over.)
+        Existing dirty regions are left where they are, because the panel hasn't moved.
+        """
+        width = self.width
+        run_y = -1
+        run_x0 = 0
+        run_x1 = 0
+        for y in range(top, end + 1):
+            src = y + lines
+            span = self._diff_span(self.fbuf, y * stride, src * stride, stride) if y < end and top <= src < end else 0
+            if span:
+                # convert the byte span to pixels
+                first = span >> 16
+                last = span & 0xffff
+                if self.use_tiny_buf:
+                    x0, x1 = first * 2, min(last * 2, width)
+                elif self.use_8bit_buf:
+                    x0, x1 = first, last
+                else:
+                    x0, x1 = first // 2, (last + 1) // 2
+                if run_y == -1:
+                    run_y = y
+                    run_x0 = x0
+                    run_x1 = x1
+                else:
+                    run_x0 = min(run_x0, x0)
+                    run_x1 = max(run_x1, x1)
+            elif run_y != -1:
+                # mark each run of changed lines
+                self._mark_dirty(run_x0, run_y, run_x1, y)
+                run_y = -1
+
+
+    def _shift_dirty_rects(self, top: int, end: int, lines: int):
+        """Move the parts of the dirty regions inside the scroll region along with its contents."""
+        rects = self._dirty_rects
+        count = self._dirty_count * 4
+        i = 0
+        while i < count:
+            y0 = rects[i + 1]
+            y1 = rects[i + 3]
+            if y0 < end and y1 > top:
+                # the part inside the scroll region moves (and may move out of it)
+                new_y0 = max(max(y0, top) - lines, top)
+                new_y1 = min(min(y1, end) - lines, end)
+                if new_y0 >= new_y1:
+                    new_y0 = end
+                    new_y1 = top
+                # parts above or below the scroll region stay in place
+                if y0 < top:
+                    new_y0 = y0
+                    new_y1 = max(new_y1, top)
+                if y1 > end:
+                    new_y0 = min(new_y0, end)
+                    new_y1 = y1
+
+                if new_y0 >= new_y1:
+                    # the region was scrolled away; replace it with the last region
+                    count -= 4
+                    rects[i:i + 4] = rects[count:count + 4]
+                    continue
+                rects[i + 1] = new_y0
+                rects[i + 3] = new_y1
+            i += 4
+        self._dirty_count = count // 4
+
+
+    def _disable_scroll(self):
+        """Clear the scroll region, and return the panel to its normal (unscrolled) state."""
+        if self._scroll_offset or self._scroll_sent:
+            self._write(_ST7789_VSCSAD, struct.pack(">H", self.ystart + self._scroll_top))
+            self._mark_dirty(0, 0, self.width, self.height)
+        self._scroll_top = 0
+        self._scroll_end = 0
+        self._scroll_offset = 0
+        self._scroll_sent = 0
+        self._hw_scroll = False
+
+
+    def _write_area(self, x_min: int, y_min: int, x_max: int, y_max: int):
+        """Set the window for (and write) a region of the flush buffer.
+
+        Lines inside a hardware scroll region are stored in the panel starting at the scroll offset,
+        so a region that crosses the edges of the scroll region (or wraps around it) is written in pieces.
+        """
+        top = self._scroll_top
+        end = self._scroll_end
+        if self._scroll_offset and y_min < end and y_max > top:
+            if y_min < top:
+                self._write_area(x_min, y_min, x_max, top)
+                y_min = top
+            if y_max > end:
+                self._write_area(x_min, end, x_max, y_max)
+                y_max = end
+
+            size = end - top
+            panel_y = top + (y_min - top + self._scroll_offset) % size
+            lines = min(y_max - y_min, top + size - panel_y)
+            self._set_window(x_min, panel_y, x_max - 1, panel_y + lines - 1)
+            self._write_region(x_min, y_min, x_max, y_min + lines)
+            if y_min + lines < y_max:
+                # the rest wraps around to the top of the scroll region
+                self._set_window(x_min, top, x_max - 1, top + y_max - y_min - lines - 1)
+                self._write_region(x_min, y_min + lines, x_max, y_max)
+            return
+
+        self._set_window(x_min, y_min, x_max - 1, y_max - 1)
+        self._write_region(x_min, y_min, x_max, y_max)
+
+
+    @micropython.viper
+    def _copy_to_flush_buf(self):
+        """Copy the dirty regions from the framebuffer into the flush buffer."""
+        source = ptr8(self.fbuf)
+        dest = ptr8(self._flush_buf)
+        rects = ptr16(self._flush_rects)
+        count = int(self._flush_count)
+        width = int(self.width)
+        use_tiny_buf = bool(self.use_tiny_buf)
+        use_8bit_buf = bool(self.use_8bit_buf)
+
+        # bytes per line
+        if use_tiny_buf:
+            stride = width // 2 if (width % 8 == 0) else ((width + 1) // 2)
+        elif use_8bit_buf:
+            stride = width
+        else:
+            stride = width * 2
+
+        idx = 0
+        while idx < count * 4:
+            x0 = int(rects[idx]); y = int(rects[idx + 1])
+            x1 = int(rects[idx + 2]); y1 = int(rects[idx + 3])
+            # byte range of each line (GS4 pixels are rounded out to whole bytes)
+            if use_tiny_buf:
+                start = x0 // 2
+                end = (x1 + 1) // 2
+            elif use_8bit_buf:
+                start = x0
+                end = x1
+            else:
+                start = x0 * 2
+                end = x1 * 2
+
+            while y < y1:
+                i = y * stride + start
+                line_end = y * stride + end
+                while i < line_end:
+                    dest[i] = source[i]
+                    i += 1
+                y += 1
+            idx += 4
+
+
+    def _flush(self, rects, count: int):
+        """Write the given regions from the flush buffer to the display."""
+        width = self.width
+
+        # rebuild the indexed color lookup table if the palette has changed
+        indexed = self.use_tiny_buf or self.use_8bit_buf
+        if indexed and self._lut_palette != self.palette.buf:
+            self._build_color_lut()
+
+        if self.display_list is not None:
+            self._flush_display_list(rects, count)
+            return
+
+        # move the hardware scroll before writing the newly exposed lines
+        if self._scroll_sent != self._scroll_offset:
+            self._scroll_sent = self._scroll_offset
+            self._write(_ST7789_VSCSAD, struct.pack(">H", self.ystart + self._scroll_top + self._scroll_offset))
+
+        for i in range(0, count * 4, 4):
+            x_min, y_min, x_max, y_max = rects[i], rects[i + 1], rects[i + 2], rects[i + 3]
+
+            # Full lines are faster to send from the normal buffer,
+            # so slightly narrower regions are widened to the full display width.
+            if not indexed and (x_max - x_min) * 4 >= width * 3:
+                x_min = 0
+                x_max = width
+
+            self._write_area(x_min, y_min, x_max, y_max)
+
+
+    def _write_region(self, x_min: int, y_min: int, x_max: int, y_max: int):
+        """Write a region of the flush buffer, using the writer for the current framebuffer format."""
         if self.use_tiny_buf:
-            self._write_tiny_buf(y_min, y_max)
+            self._write_tiny_buf(x_min, y_min, x_max, y_max)
+        elif self.use_8bit_buf:
+            self._write_8bit_buf(x_min, y_min, x_max, y_max)
         else:
-            self._write_normal_buf(y_min, y_max)
+            self._write_normal_buf(x_min, y_min, x_max, y_max)
+
+
+    def _flush_display_list(self, rects, count: int):
+        """Draw and write the given regions one band at a time, using the display list.
+
+        Each band of lines is drawn into the (band sized) framebuffer,
+        and then the parts of the regions inside that band are written to the display.
+        """
+        # Drawing the bands changes the dirty regions, so they are copied first.
+        self._flush_rects[:] = rects
+        rects = self._flush_rects
+        count *= 4
+
+        band_y = self.height
+        y_max = 0
+        for i in range(0, count, 4):
+            band_y = min(band_y, rects[i + 1])
+            y_max = max(y_max, rects[i + 3])
+
+        while band_y < y_max:
+            band_end = min(band_y + self.display_list_lines, self.height)
+            drawn = False
+            for i in range(0, count, 4):
+                y0 = max(rects[i + 1], band_y)
+                y1 = min(rects[i + 3], band_end)
+                if y0 >= y1:
+                    continue
+                if not drawn:
+                    self._render_band(band_y)
+                    drawn = True
+                x0 = rects[i]
+                x1 = rects[i + 2]
+                self._set_window(x0, y0, x1 - 1, y1 - 1)
+                # framebuffer lines are relative to the band
+                self._write_region(x0, y0 - band_y, x1, y1 - band_y)
+            band_y = band_end
+
+
+    def _flush_worker(self):
+        """Write regions to the display in the background (runs in its own thread)."""
+        while True:
+            # (blocks until `show` requests a flush)
+            self._flush_request.acquire()
+            start = ticks_us()
+            try:
+                self._flush(self._flush_rects, self._flush_count)
+            except Exception as e:  # noqa: BLE001
+                # errors are raised again by `wait_flush`, on the main thread
+                self._flush_error = e
+            finally:
+                self._flush_us = ticks_diff(ticks_us(), start)
+                self._flush_pending = False
+                self._flush_lock.release()
+
+
+    def wait_flush(self):
+        """Block until the previous frame has been completely written to the display.
+
+        This returns immediately if `async_flush` is not enabled.
+        If writing the previous frame failed, its error is raised here.
+        """
+        if self._flush_pending:
+            self._flush_lock.acquire()
+            self._flush_lock.release()
+        if self._flush_error is not None:
+            error = self._flush_error
+            self._flush_error = None
+            raise error
+
+
+    def show(self):
+        """Write the changed regions of the current framebuf to the display.
+
+        If `async_flush` is enabled, this returns as soon as the previous frame has been sent,
+        and the current frame is written in the background.
+        """
+        # mh_if shared_sdcard_spi:
+        # # TDeck shares SPI with SDCard
+        # self.spi.init(baudrate=_MH_DISPLAY_BAUDRATE)
+        # mh_end_if
+        if not self._async_flush:
+            self._flush(self._dirty_rects, self._dirty_count)
+            self._dirty_count = 0
+            return
+
+        self.wait_flush()
+        if not self._dirty_count:
+            return
+        # hand this frame's regions over to the flush thread
+        self._flush_rects[:] = self._dirty_rects
+        self._flush_count = self._dirty_count
+        self._dirty_count = 0
+        if self._flush_buf is not self.fbuf:
+            self._copy_to_flush_buf()
+        self._flush_lock.acquire()
+        self._flush_pending = True
+        self._flush_request.release()
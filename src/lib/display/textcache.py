@@ -0,0 +1,148 @@
+"""A small LRU cache of pre-rendered text, for `DisplayCore.text`.
+
+Much of MicroHydra's UI draws the same strings over and over (menu labels, app names, status text).
+Rather than drawing these glyph by glyph every time, the TextCache keeps recently drawn strings
+as 1-bit masks, which `DisplayCore.text` copies to the framebuffer (in any color) with a single blit.
+
+Every DisplayCore has one, as `display.text_cache` (unless it was created with `text_cache_size=0`):
+
+    display.text_cache.reset_stats()
+    ...
+    print(display.text_cache)  # "TextCache: 93% hits (412 hits, 31 misses, 0 evicted), 12 texts, 2210/4096 bytes"
+
+Key notes on TextCache:
+  - Masks are keyed by the text and font. They don't depend on the text color or the framebuffer format,
+    so the same mask is reused for every color.
+
+  - Text is only cached the second time it's seen, so that text which is only drawn once
+    (or which changes every frame, like a counter) doesn't push useful masks out of the cache.
+
+  - Each mask takes `ceil(width / 8) * (font height + 1)` bytes.
+    When the masks would exceed the cache's `budget` (in bytes), the least-recently-used masks are removed.
+    Text that would take more than a quarter of the budget is never cached.
+"""
+
+import framebuf
+
+
+# indices for each cache entry
+_MASK = const(0)
+_SIZE = const(1)
+_TICK = const(2)
+
+# how many texts (seen once) to remember, while waiting to see if they're drawn again
+_SEEN_SIZE = const(32)
+
+
+
+class TextCache:
+    """Keep recently drawn text as 1-bit masks, up to a memory budget."""
+
+    def __init__(self, budget: int = 4096):
+        """Create an empty TextCache.
+
+        Args:
+            budget (int): The maximum number of bytes to use for cached masks.
+        """
+        self.budget = budget
+        self.used = 0
+        # {font: {text: [mask, size, tick]}}
+        self._fonts = {}
+        self._count = 0
+        # {text: font} for text that has been seen (but not cached) once
+        self._seen = {}
+        self._tick = 0
+        self.reset_stats()
+
+
+    def reset_stats(self):
+        """Reset the hit/miss counters."""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    def hit_rate(self) -> float:
+        """Get the fraction of lookups that were served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+    def __len__(self) -> int:
+        return self._count
+
+
+    def __str__(self) -> str:
+        return (
+            f"TextCache: {self.hit_rate() * 100:.0f}% hits "
+            f"({self.hits} hits, {self.misses} misses, {self.evictions} evicted), "
+            f"{self._count} texts, {self.used}/{self.budget} bytes"
+        )
+
+
+    def clear(self):
+        """Forget all cached text."""
+        self._fonts = {}
+        self._seen = {}
+        self._count = 0
+        self.used = 0
+
+
+    def _evict_oldest(self):
+        """Remove the least-recently-used mask."""
+        oldest = None
+        oldest_texts = None
+        oldest_text = None
+        for texts in self._fonts.values():
+            for text, entry in texts.items():
+                if oldest is None or entry[_TICK] < oldest[_TICK]:
+                    oldest = entry
+                    oldest_texts = texts
+                    oldest_text = text
+
+        del oldest_texts[oldest_text]
+        self.used -= oldest[_SIZE]
+        self._count -= 1
+        self.evictions += 1
+
+
+    def get(self, display, text: str, font) -> framebuf.FrameBuffer|None:
+        """Get the mask for the given text, rendering it (with `display`) if needed.
+
+        Returns None if the text should be drawn normally instead.
+        """
+        self._tick += 1
+        texts = self._fonts.get(font)
+        if texts is not None:
+            entry = texts.get(text)
+            if entry is not None:
+                entry[_TICK] = self._tick
+                self.hits += 1
+                return entry[_MASK]
+
+        self.misses += 1
+
+        # only cache text once it's been seen twice
+        if self._seen.get(text, self) is not font:
+            if len(self._seen) >= _SEEN_SIZE:
+                self._seen = {}
+            self._seen[text] = font
+            return None
+
+        width = display.get_total_width(text, font)
+        height = (font.HEIGHT if font else 8) + 1
+        size = ((width + 7) >> 3) * height
+        if size > self.budget >> 2 or width == 0:
+            return None
+
+        del self._seen[text]
+        while self.used + size > self.budget:
+            self._evict_oldest()
+
+        mask = display._text_mask(text, font, width, height)  # noqa: SLF001
+        if texts is None:
+            texts = self._fonts[font] = {}
+        texts[text] = [mask, size, self._tick]
+        self.used += size
+        self._count += 1
+        return mask
@@ -0,0 +1,262 @@
+"""Fixed-point (integer) transforms for polygon points.
+
+This module moves, scales, rotates, and warps the points in `array('h')` buffers using only integer math,
+so that apps can animate vector shapes every frame without any float math or heap allocation.
+
+Angles are measured in steps, with `ANGLE_STEPS` (1024) steps in a full turn,
+and sine/cosine are read from a lookup table in Q15 fixed point (where `Q15_ONE` (32768) is 1.0).
+Scale and rotation are combined into a single 2x3 matrix, so each point is only transformed once.
+
+Example:
+    shape = array('h', (0, 0, 20, 0, 10, 30))
+    drawn = array('h', shape)  # allocated once, and reused
+    transform = Transform()
+    ...
+    # each frame:
+    transform.set(angle, scale=Q15_ONE * 2, x=50, y=20, center_x=20, center_y=30)
+    transform.apply(shape, drawn)
+    display.polygon(drawn, 0, 0, color)
+
+Key notes on transforms:
+  - Points are scaled (around 0, 0), then rotated around (center_x, center_y), then moved by (x, y).
+    `center_x` and `center_y` are in scaled coordinates.
+
+  - To stay within the range of the 32 bit integer math, coordinates (before and after transforming)
+    should be within +/-2048, and the scale should be less than 16x.
+"""
+
+import array
+from math import pi, sin
+
+
+ANGLE_STEPS = const(1024)
+Q15_ONE = const(32768)
+
+_ANGLE_MASK = const(ANGLE_STEPS - 1)
+_QUARTER_TURN = const(ANGLE_STEPS // 4)
+_QUARTER_SHIFT = const(8)  # angle >> _QUARTER_SHIFT is the quadrant
+_HALF_TURN_SHIFT = const(6)  # converts a Q15 fraction into steps of a half turn (32768 >> 6 == 512)
+_HALF_TURN_FRAC = const(63)
+_Q15_SHIFT = const(15)
+_Q15_HALF = const(16384)
+_Q12_ONE = const(4096)
+# warp_points works in fixed point pixels with 4 fractional bits
+_WARP_BITS = const(4)
+
+
+# sine of the first quarter turn (inclusive), in Q15
+_SIN_TABLE = array.array(
+    'H',
+    (int(sin(i * pi / (_QUARTER_TURN * 2)) * Q15_ONE + 0.5) for i in range(_QUARTER_TURN + 1)),
+)
+
+
+
+@micropython.viper
+def sin_q15(angle: int) -> int:
+    """Get the sine of the given angle (in steps), in Q15 fixed point."""
+    table = ptr16(_SIN_TABLE)
+    angle &= _ANGLE_MASK
+    idx = angle & (_QUARTER_TURN - 1)
+    quadrant = angle >> _QUARTER_SHIFT
+    if quadrant == 0:
+        return int(table[idx])
+    if quadrant == 1:
+        return int(table[_QUARTER_TURN - idx])
+    if quadrant == 2:
+        return -int(table[idx])
+    return -int(table[_QUARTER_TURN - idx])
+
+
+@micropython.viper
+def cos_q15(angle: int) -> int:
+    """Get the cosine of the given angle (in steps), in Q15 fixed point."""
+    return int(sin_q15(angle + _QUARTER_TURN))
+
+
+def angle_steps(radians: float) -> int:
+    """Convert an angle in radians into steps (rounded to the nearest step)."""
+    return int(radians * (ANGLE_STEPS / (2 * pi)) + (0.5 if radians >= 0 else -0.5))
+
+
+
+class Transform:
+    """A combined scale, rotation, and translation, stored as a 2x3 fixed point matrix."""
+
+    def __init__(self):
+        """Create an identity Transform."""
+        # (a, b, tx, c, d, ty) in Q15, where:
+        # x' = a*x + b*y + tx
+        # y' = c*x + d*y + ty
+        self.matrix = array.array('i', (Q15_ONE, 0, 0, 0, Q15_ONE, 0))
+
+
+    def set(
+            self,
+            angle: int = 0,
+            *,
+            scale: int = Q15_ONE,
+            x: int = 0,
+            y: int = 0,
+            center_x: int = 0,
+            center_y: int = 0) -> 'Transform':
+        """Set the transform, and return it.
+
+        Args:
+            angle (int): Rotation angle, in steps (`ANGLE_STEPS` per turn).
+            scale (int): Scale factor, in Q15 fixed point (`Q15_ONE` is 1x).
+            x (int): Distance to move points right (after scaling and rotating).
+            y (int): Distance to move points down (after scaling and rotating).
+            center_x (int): X-coordinate of the rotation center (in scaled coordinates).
+            center_y (int): Y-coordinate of the rotation center (in scaled coordinates).
+        """
+        _set_matrix(self.matrix, angle, scale, x, y, center_x, center_y)
+        return self
+
+
+    def apply(self, points, dest=None):
+        """Transform the points in an `array('h')` of x/y pairs.
+
+        Transformed points are written to `dest` (which must be at least as long as `points`),
+        or back into `points` if `dest` is None. Returns the array that was written to.
+        """
+        if dest is None:
+            dest = points
+        transform_points(self.matrix, points, dest)
+        return dest
+
+
+
+@micropython.viper
+def _scale_q15(value: int, scale: int) -> int:
+    """Multiply a Q15 value by a Q15 scale, without overflowing."""
+    return value * (scale >> _Q15_SHIFT) + ((value * (scale & (Q15_ONE - 1))) >> _Q15_SHIFT)
+
+
+@micropython.viper
+def _set_matrix(matrix, angle: int, scale: int, x: int, y: int, center_x: int, center_y: int):
+    """Fill the matrix with the given scale, rotation, and translation."""
+    m = ptr32(matrix)
+    cos_a = int(cos_q15(angle))
+    sin_a = int(sin_q15(angle))
+
+    m[0] = int(_scale_q15(cos_a, scale))
+    m[1] = -int(_scale_q15(sin_a, scale))
+    m[3] = int(_scale_q15(sin_a, scale))
+    m[4] = m[0]
+    # rotate around the (scaled) center, then translate
+    m[2] = ((center_x + x) << _Q15_SHIFT) - (cos_a * center_x - sin_a * center_y)
+    m[5] = ((center_y + y) << _Q15_SHIFT) - (sin_a * center_x + cos_a * center_y)
+
+
+@micropython.viper
+def transform_points(matrix, points, dest):
+    """Transform each x/y pair in `points` by the matrix, writing the results into `dest`.
+
+    `dest` can be the same array as `points`.
+    """
+    m = ptr32(matrix)
+    a = int(m[0]); b = int(m[1]); tx = int(m[2])
+    c = int(m[3]); d = int(m[4]); ty = int(m[5])
+    src = ptr16(points)
+    out = ptr16(dest)
+    points_len = int(len(points)) & ~1
+
+    idx = 0
+    while idx < points_len:
+        # sign extend the (unsigned) 16 bit values
+        x = (int(src[idx]) ^ 0x8000) - 0x8000
+        y = (int(src[idx + 1]) ^ 0x8000) - 0x8000
+        out[idx] = (a * x + b * y + tx) >> _Q15_SHIFT
+        out[idx + 1] = (c * x + d * y + ty) >> _Q15_SHIFT
+        idx += 2
+
+
+@micropython.viper
+def _isqrt(value: int) -> int:
+    """Get the integer square root of a positive value."""
+    result = 0
+    bit = 1 << 30
+    while bit > value:
+        bit >>= 2
+    while bit:
+        if value >= result + bit:
+            value -= result + bit
+            result = (result >> 1) + bit
+        else:
+            result >>= 1
+        bit >>= 2
+    return result
+
+
+@micropython.viper
+def _ease_in_out_sine(fac: int) -> int:
+    """Apply `ease in-out sine` easing to a Q15 value."""
+    # interpolate between table entries, for smooth results over large ranges
+    angle = fac >> _HALF_TURN_SHIFT
+    cos_a = int(cos_q15(angle))
+    cos_a += ((int(cos_q15(angle + 1)) - cos_a) * (fac & _HALF_TURN_FRAC)) >> _HALF_TURN_SHIFT
+    return (Q15_ONE - cos_a) >> 1
+
+
+@micropython.viper
+def _ease_in_out_circ(fac: int) -> int:
+    """Apply `ease in-out circ` easing to a Q15 value."""
+    if fac < _Q15_HALF:
+        double = fac << 1
+        return (Q15_ONE - int(_isqrt((1 << 30) - double * double))) >> 1
+    double = (Q15_ONE - fac) << 1
+    return (int(_isqrt((1 << 30) - double * double)) + Q15_ONE) >> 1
+
+
+@micropython.viper
+def warp_points(points, tilt: int, smallest: int, largest: int, focus_center_x: bool):
+    """Skew points on the y axis, in place (a fixed point version of `FancyDisplay.warp_points`).
+
+    Args:
+        points (array('h')): x/y pairs to warp.
+        tilt (int): Where the vertical midpoint moves to, in Q15 (`Q15_ONE // 2` keeps it in place).
+        smallest (int): The smallest value in `points`.
+        largest (int): The largest value in `points`.
+        focus_center_x (bool): Apply the effect more strongly to points nearer the center x.
+    """
+    adj_largest = largest - smallest
+    if adj_largest <= 0:
+        return
+    src = ptr16(points)
+    points_len = int(len(points)) & ~1
+
+    # distances from `smallest`, in fixed point pixels
+    adj_midpoint = adj_largest << (_WARP_BITS - 1)
+    new_adj_midpoint = (adj_largest * tilt) >> (_Q15_SHIFT - _WARP_BITS)
+    temp_largest = (adj_largest << _WARP_BITS) - new_adj_midpoint
+    upper_range = (adj_largest << _WARP_BITS) - adj_midpoint
+    smallest_fixed = smallest << _WARP_BITS
+
+    idx = 1
+    while idx < points_len:
+        point = (int(src[idx]) ^ 0x8000) - 0x8000
+        adj_point = (point - smallest) << _WARP_BITS
+
+        if point * 2 < smallest + largest:
+            # interpolate between smallest and the new midpoint
+            fac = int(_ease_in_out_sine((adj_point << _Q15_SHIFT) // adj_midpoint))
+            target = ((new_adj_midpoint * (fac >> 3)) >> 12) + smallest_fixed
+        else:
+            # interpolate between the new midpoint and largest
+            fac = int(_ease_in_out_sine(((adj_point - adj_midpoint) << _Q15_SHIFT) // upper_range))
+            target = ((temp_largest * (fac >> 3)) >> 12) + new_adj_midpoint + smallest_fixed
+
+        if focus_center_x:
+            x_dist = (((int(src[idx - 1]) ^ 0x8000) - 0x8000 - smallest) << _WARP_BITS) - adj_midpoint
+            if x_dist < 0:
+                x_dist = -x_dist
+            x_fac = (x_dist << _Q15_SHIFT) // adj_midpoint
+            if x_fac > Q15_ONE:
+                x_fac = Q15_ONE
+            # mix the original and warped points (in Q12, to stay in range)
+            x_fac = int(_ease_in_out_circ(x_fac)) >> 3
+            target = ((point << _WARP_BITS) * x_fac + target * (_Q12_ONE - x_fac)) >> 12
+
+        src[idx] = target >> _WARP_BITS
+        idx += 2
@@ -0,0 +1,139 @@
+"""An optional boot timing trace, recorded by `main.py`.
+
+When the trace file ('/boottrace.json') exists, `main.py` records the time and free memory
+at key points while booting an app (including every module that gets imported), up until the first `Display.show()`.
+The trace is then written to the trace file, and can be viewed with the `boottrace` terminal command.
+(`boottrace on` creates the file to turn tracing on, and `boottrace off` removes it.)
+
+Each record is stored as `[label, depth, time_us, duration_us, mem_free]`, where:
+  - `depth` is the number of imports that were running when it was recorded (for nested imports),
+  - `time_us` is the time since `main.py` started,
+  - `duration_us` is the time taken (for imports), and
+  - `mem_free` is the result of `gc.mem_free()` after the event.
+
+Key notes on bootprofile:
+  - Imports are timed by temporarily replacing `builtins.__import__`.
+    Only imports that load a new module are recorded, and the time of each includes its nested imports.
+
+  - When tracing is off, `mark` and the hook in `Display.show` do nothing,
+    and `start` costs a single `os.stat`.
+
+  - The trace is written (and `__import__` is restored) after the first frame is shown,
+    so writing the trace doesn't affect the recorded times (but does slow down that first frame a little).
+"""
+
+import builtins
+import gc
+import os
+import sys
+import time
+
+
+TRACE_PATH = const("/boottrace.json")
+
+# recording stops at this many records, to keep memory use small
+_MAX_RECORDS = const(96)
+
+
+# True while recording
+active = False
+# True once the display is initialized, and the trace is waiting for the first frame
+waiting_for_show = False
+
+_start_us = time.ticks_us()
+_records = []
+_depth = 0
+_builtin_import = None
+
+
+def enable():
+    """Turn boot tracing on (starting with the next boot)."""
+    with open(TRACE_PATH, "w") as f:
+        f.write("")
+
+
+def disable():
+    """Turn boot tracing off (and delete the last trace)."""
+    try:
+        os.remove(TRACE_PATH)
+    except OSError:
+        pass
+
+
+def load_trace() -> list|None:
+    """Load the last trace. Returns None if tracing is off, or an empty list if no trace has been recorded."""
+    import json
+    try:
+        with open(TRACE_PATH) as f:
+            data = f.read()
+    except OSError:
+        return None
+    try:
+        return json.loads(data)
+    except ValueError:
+        return []
+
+
+def start():
+    """Start recording, if boot tracing is on."""
+    global active, _builtin_import  # noqa: PLW0603
+    try:
+        os.stat(TRACE_PATH)
+    except OSError:
+        return
+
+    active = True
+    _builtin_import = builtins.__import__
+    builtins.__import__ = _traced_import
+    mark("start")
+
+
+def mark(label: str):
+    """Record the current time and free memory, with the given label."""
+    if active and len(_records) < _MAX_RECORDS:
+        _records.append([label, _depth, time.ticks_diff(time.ticks_us(), _start_us), 0, gc.mem_free()])
+
+
+def display_ready():
+    """Record that the display has been initialized, and finish the trace on the next `Display.show()`."""
+    global waiting_for_show  # noqa: PLW0603
+    if active:
+        mark("display init")
+        waiting_for_show = True
+
+
+def _traced_import(name, *args):
+    """Import a module (replaces `builtins.__import__` while recording), recording it if it's newly loaded."""
+    global _depth  # noqa: PLW0603
+    module_count = len(sys.modules)
+    start_us = time.ticks_us()
+    _depth += 1
+    try:
+        return _builtin_import(name, *args)
+    finally:
+        _depth -= 1
+        if len(sys.modules) > module_count and len(_records) < _MAX_RECORDS:
+            now = time.ticks_us()
+            _records.append([
+                name, _depth, time.ticks_diff(start_us, _start_us), time.ticks_diff(now, start_us), gc.mem_free(),
+            ])
+
+
+def finish(label: str = "first show"):
+    """Stop recording, and write the trace to the trace file."""
+    global active, waiting_for_show  # noqa: PLW0603
+    if not active:
+        return
+    mark(label)
+    active = False
+    waiting_for_show = False
+    builtins.__import__ = _builtin_import
+
+    # nested imports are recorded when they finish (before their parents), so sort records by start time
+    _records.sort(key=lambda record: record[2])
+    import json
+    try:
+        with open(TRACE_PATH, "w") as f:
+            f.write(json.dumps(_records))
+    except OSError as e:
+        print(f"Couldn't write boot trace: {e}")
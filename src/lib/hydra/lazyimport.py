@@ -0,0 +1,92 @@
+"""Placeholders for modules (and objects) that are only loaded the first time they're used.
+
+Importing a module takes time and memory, even if the module is never used.
+A LazyModule can be created in place of an import, and imports the real module on first attribute access:
+
+    network = LazyModule("network")
+    ...
+    nic = network.WLAN(network.STA_IF)  # 'network' is imported here
+
+A LazyObject does the same for an object, calling its `factory` to create the object on first attribute access:
+
+    BEEP = LazyObject(lambda: beeper.Beeper())
+    ...
+    BEEP.play("C4")  # The Beeper (and its I2S setup) is created here
+
+Key notes on lazyimport:
+  - Attribute access on a placeholder is a little slower than on the real module/object.
+    For code that runs often, use `load()` to get the real thing.
+
+  - Only attribute access triggers loading. A placeholder can't be called, iterated, compared,
+    or passed to functions that expect the real thing (use `load()` for those).
+
+  - The import happens whenever the first attribute is accessed,
+    so it's best to avoid lazy-loading modules that are needed to draw the first frame.
+"""
+
+
+
+class LazyModule:
+    """A placeholder for a module, which imports it when it's first used."""
+
+    def __init__(self, name: str):
+        """Create the placeholder.
+
+        Args:
+            name (str): The full name of the module (e.g. "lib.hydra.beeper").
+        """
+        self._name = name
+        self._module = None
+
+
+    @property
+    def loaded(self) -> bool:
+        """Whether or not the module has been imported yet."""
+        return self._module is not None
+
+
+    def load(self) -> object:
+        """Import (if needed) and return the real module."""
+        if self._module is None:
+            # __import__ returns the top-level package, so walk down to the named module
+            module = __import__(self._name)
+            for part in self._name.split(".")[1:]:
+                module = getattr(module, part)
+            self._module = module
+        return self._module
+
+
+    def __getattr__(self, attr: str):
+        # (only called for attributes that the placeholder doesn't have)
+        return getattr(self.load(), attr)
+
+
+
+class LazyObject:
+    """A placeholder for an object, which is created when it's first used."""
+
+    def __init__(self, factory):
+        """Create the placeholder.
+
+        Args:
+            factory (callable): Called with no args to create the real object.
+        """
+        self._factory = factory
+        self._object = None
+
+
+    @property
+    def loaded(self) -> bool:
+        """Whether or not the object has been created yet."""
+        return self._object is not None
+
+
+    def load(self) -> object:
+        """Create (if needed) and return the real object."""
+        if self._object is None:
+            self._object = self._factory()
+        return self._object
+
+
+    def __getattr__(self, attr: str):
+        return getattr(self.load(), attr)
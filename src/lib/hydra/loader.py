@@ -1,10 +1,31 @@
 """Communicate with MicroHydras `main.py`.
 
 Values are stored in the RTC, so that information can be retained on soft reset.
+
+Along with the launch args, a few small values can be saved with `set_state`.
+These are kept when the args change, so they last until the device is powered off.
 """
 from machine import RTC, reset
 
 _PATH_SEP = const("|//|")
+# separates the args from the saved state
+_STATE_SEP = const("|##|")
+_STATE_SEP_LEN = const(4)
+# separates each `key=value` item in the saved state
+_ITEM_SEP = const(";")
+
+
+def _read_memory() -> tuple[str, str]:
+    """Get the args and the saved state from the RTC."""
+    memory = RTC().memory().decode()
+    idx = memory.find(_STATE_SEP)
+    if idx == -1:
+        return memory, ""
+    return memory[:idx], memory[idx + _STATE_SEP_LEN:]
+
+def _write_memory(args: str, state: str):
+    """Store the args and state in the RTC."""
+    RTC().memory(f"{args}{_STATE_SEP}{state}" if state else args)
 
 def launch_app(*args: str):
     """Set args and reboot."""
@@ -16,8 +37,26 @@ def set_args(*args: str):
 
     First arg should typically be an import path.
     """
-    RTC().memory(_PATH_SEP.join(args))
+    _write_memory(_PATH_SEP.join(args), _read_memory()[1])
 
 def get_args() -> list[str]:
     """Get the args stored in the RTC."""
-    return RTC().memory().decode().split(_PATH_SEP)
+    return _read_memory()[0].split(_PATH_SEP)
+
+def get_state(key: str) -> str|None:
+    """Get a value saved with `set_state`, or None if it isn't set."""
+    for item in _read_memory()[1].split(_ITEM_SEP):
+        if item.startswith(key + "="):
+            return item[len(key) + 1:]
+    return None
+
+def set_state(key: str, value: str|None):
+    """Save a small value in the RTC, or remove it if `value` is None.
+
+    Keys and values can't contain ';', and keys can't contain '='.
+    """
+    args, state = _read_memory()
+    items = [item for item in state.split(_ITEM_SEP) if item and not item.startswith(key + "=")]
+    if value is not None:
+        items.append(f"{key}={value}")
+    _write_memory(args, _ITEM_SEP.join(items))
@@ -9,6 +9,7 @@ import time
 
 from font import vga2_16x32 as font
 from lib.display import Display
+from lib.display.retained import RetainedLayer
 from lib.userinput import UserInput
 
 from . import beeper, color
@@ -107,6 +108,9 @@ class Menu:
 
         self.i18n = i18n
 
+        # only menu items that change are redrawn
+        self.layer = RetainedLayer(DISPLAY)
+
 
     def append(self, item):
         """Add a new item to the menu."""
@@ -131,6 +135,8 @@ class Menu:
         - False if animation complete.
         """
         if self.in_submenu:
+            # submenus draw over the menu, so it must be fully redrawn afterwards
+            self.layer.invalidate()
             return None
 
         if self.cursor_index >= self.setting_screen_index + self.per_page:
@@ -143,7 +149,8 @@ class Menu:
             self.setting_screen_index -= self.setting_screen_index - self.cursor_index
             self.scroll_start_ms = time.ticks_ms()
 
-        DISPLAY.fill(CONFIG.palette[2])
+        layer = self.layer
+        layer.begin_frame(CONFIG.palette[2])
 
         anim_y = self._get_animated_y()
 
@@ -157,9 +164,15 @@ class Menu:
             if i <= len(self.items) - 1:
                 self.items[i].selected = i == self.cursor_index
                 self.items[i].y_pos = y
+                layer.begin(i, 0, y, _MH_DISPLAY_WIDTH, _FONT_HEIGHT)
                 self.items[i].draw()
+                layer.end()
 
+        layer.begin('scrollbar', _SCROLLBAR_BUFFER_X, 0, _SCROLLBAR_BUFFER_WIDTH + _SCROLLBAR_WIDTH, _MH_DISPLAY_HEIGHT)
         self.update_scroll_bar()
+        layer.end()
+
+        layer.end_frame()
 
         # return true/false based on if animation is finished
         return anim_y != 0
@@ -201,6 +214,8 @@ class Menu:
             return True
 
         if key in ('G0', 'ENT'):
+            # items may draw their own windows when selected
+            self.layer.invalidate()
             BEEP.play(("G3","B3","D3"), time_ms=30)
             return (self.items[self.cursor_index].handle_input("G0"))
 
@@ -256,9 +271,12 @@ class Menu:
             if updating_display:
                 updating_display = self.draw()
                 DISPLAY.show()
+            elif DISPLAY.frames.pending:
+                # send changes from a frame that was skipped by the frame scheduler
+                DISPLAY.show()
 
             if not keys and not updating_display:
-                time.sleep_ms(1)
+                DISPLAY.frames.wait()
 
 
 
@@ -347,7 +365,7 @@ class BoolItem(MenuItem):
         self,
         menu:Menu,
         text:str,
-        value:bool,  # noqa: FBT001
+        value:bool,
         *,
         callback:callable|None=None,
         **kwargs):  # noqa: ARG002
@@ -4,6 +4,7 @@ import time
 
 from machine import Timer
 from lib.display import Display
+from lib.display.cachedoverlay import CachedOverlay
 from lib.hydra.config import Config
 from lib.hydra.utils import get_instance
 
@@ -26,6 +27,9 @@ _BATTERY_HEIGHT = const(10)
 _BATTERY_X = const(_MH_DISPLAY_WIDTH - 28)
 _BATTERY_Y = const((_STATUSBAR_HEIGHT - 10) // 2)
 
+# the battery level changes slowly, so the ADC is only read this often
+_BATTERY_READ_MS = const(60_000)
+
 
 
 class StatusBar:
@@ -42,9 +46,16 @@ class StatusBar:
             self.batt = battlevel.Battery()
 
         self.enable_battery = enable_battery
+        self.batt_level = 0
+        self.batt_read_ms = None
 
         self.config = get_instance(Config)
 
+        # The statusbar is rendered into its own buffer, and only re-rendered when the time or battery level changes.
+        self.overlay = CachedOverlay(
+            0, 0, _MH_DISPLAY_WIDTH, _STATUSBAR_HEIGHT + 1, self._render, self._inputs,
+        )
+
         if register_overlay:
             Display.overlay_callbacks.append(self.draw)
             # Set a timer to periodically redraw the clock
@@ -71,8 +82,33 @@ class StatusBar:
         return time_string, ampm
 
 
+    def _read_battery(self) -> int:
+        """Get the battery level, reading the ADC only if the last reading is old."""
+        now = time.ticks_ms()
+        if self.batt_read_ms is None or time.ticks_diff(now, self.batt_read_ms) >= _BATTERY_READ_MS:
+            self.batt_level = self.batt.read_level()
+            self.batt_read_ms = now
+        return self.batt_level
+
+
+    def _inputs(self) -> tuple:
+        """Get everything the statusbar's appearance depends on."""
+        palette = self.config.palette
+        return (
+            time.localtime()[3:5],
+            self.config['24h_clock'],
+            self._read_battery() if self.enable_battery else 0,
+            palette[1], palette[2], palette[4], palette[5], palette[7],
+        )
+
+
     def draw(self, display: Display):
         """Draw the status bar."""
+        self.overlay.draw(display)
+
+
+    def _render(self, display: Display):
+        """Render the status bar (into its overlay buffer)."""
 
         # Draw statusbar base
         display.fill_rect(
@@ -123,7 +159,7 @@ class StatusBar:
 
         # battery
         if self.enable_battery:
-            batt_lvl = self.batt.read_level()
+            batt_lvl = self._read_battery()
             display.bitmap(
                 battery,
                 _BATTERY_X,
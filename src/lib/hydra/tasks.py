@@ -0,0 +1,89 @@
+"""A tiny cooperative task runner, for doing slow work between frames.
+
+Each task is a generator, which does a little work each time it's resumed, and then yields:
+  - `None` (or a bare `yield`) to be resumed again on the next `run`, or
+  - an int, to sleep for that many milliseconds before being resumed.
+
+Example:
+    def blink():
+        while True:
+            led.toggle()
+            yield 500
+
+    TASKS = Tasks()
+    TASKS.add(blink())
+
+    while True:
+        ...
+        DISPLAY.show()
+        TASKS.run(8)  # resume tasks until 8ms have been used
+
+Key notes on Tasks:
+  - Tasks are resumed in turn (continuing where the last `run` stopped),
+    until the time budget is used up. At least one task step is run each time (if any are due),
+    so a slow step can go over the budget. Keep steps short.
+
+  - When a task finishes, its `on_done` callback (if given) is called with no args.
+
+  - `cancel` closes the generator, so its `finally` blocks run.
+"""
+
+import time
+
+
+
+class Tasks:
+    """Run generator-based tasks, a little at a time."""
+
+    def __init__(self):
+        """Create the Tasks with no tasks."""
+        # [[generator, wake time (ticks_ms), on_done], ...]
+        self._tasks = []
+        self._next = 0
+
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+
+    def add(self, task, on_done=None):
+        """Add a task (a generator) to be run. Returns the task."""
+        self._tasks.append([task, time.ticks_ms(), on_done])
+        return task
+
+
+    def cancel(self, task):
+        """Stop and remove the given task (if it's still running)."""
+        for idx, entry in enumerate(self._tasks):
+            if entry[0] is task:
+                self._tasks.pop(idx)
+                task.close()
+                return
+
+
+    def run(self, budget_ms: int = 0):
+        """Resume each task that is due, until `budget_ms` milliseconds have passed."""
+        start = time.ticks_ms()
+        for _ in range(len(self._tasks)):
+            if not self._tasks:
+                return
+            idx = self._next % len(self._tasks)
+            entry = self._tasks[idx]
+            self._next = idx + 1
+
+            if time.ticks_diff(entry[1], start) > 0:
+                # still sleeping
+                continue
+
+            try:
+                delay = next(entry[0])
+            except StopIteration:
+                self._tasks.pop(idx)
+                self._next = idx
+                if entry[2] is not None:
+                    entry[2]()
+            else:
+                entry[1] = time.ticks_add(time.ticks_ms(), delay) if delay else start
+
+            if time.ticks_diff(time.ticks_ms(), start) >= budget_ms:
+                return
@@ -9,7 +9,9 @@ such as key repetition, and global keyboard shortcuts.
 """
 import time
 from lib.hydra.config import Config
+from lib.hydra import loader
 from lib.display import Display
+from lib.display.cachedoverlay import CachedOverlay
 from lib.hydra.utils import get_instance
 import machine
 from . import _keys
@@ -26,6 +28,9 @@ _FONT_WIDTH = const(8)
 _FONT_HEIGHT = const(8)
 _BOX_HEIGHT = const(_FONT_HEIGHT + (_PADDING * 2) + 1)
 _RADIUS = const((_BOX_HEIGHT - 1) // 2)
+# the locked keys are rendered into a cached overlay, with white (palette[10], which they don't use) as transparent
+_OVERLAY_HEIGHT = const(_BOX_HEIGHT + 1)
+_OVERLAY_KEY_IDX = const(10)
 
 
 
@@ -79,6 +84,7 @@ class UserInput(_keys.Keys):
         self.use_sys_commands = use_sys_commands
 
         # setup locked key overlay:
+        self._locked_overlay = None
         Display.overlay_callbacks.append(self._locked_keys_overlay)
 
         # init _keys.Keys
@@ -273,7 +279,8 @@ class UserInput(_keys.Keys):
 
             if "q" in keylist:
                 self.config.save()
-                machine.RTC().memory("")
+                # (set_args keeps the state saved in the RTC memory)
+                loader.set_args("")
                 machine.reset()
 
             # mh_if kb_light:
@@ -286,6 +293,24 @@ class UserInput(_keys.Keys):
 
     def _locked_keys_overlay(self, display):
         """Draw currently locked keys to the display."""
+        if not self.locked_keys:
+            return
+        if self._locked_overlay is None:
+            self._locked_overlay = CachedOverlay(
+                0, 0, display.width, _OVERLAY_HEIGHT,
+                self._render_locked_keys, self._locked_keys_inputs,
+                key=display.palette[_OVERLAY_KEY_IDX],
+            )
+        self._locked_overlay.draw(display)
+
+
+    def _locked_keys_inputs(self) -> tuple:
+        """Get everything the locked keys overlay depends on."""
+        return tuple(self.locked_keys), bytes(self.config.palette.buf[:32])
+
+
+    def _render_locked_keys(self, display):
+        """Render the currently locked keys (into the overlay's buffer)."""
         width = display.width
 
         for key_txt in self.locked_keys:
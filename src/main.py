@@ -1,4 +1,8 @@
 """Base 'apploader' for MicroHydra."""
+# bootprofile is imported first, so that it can time the other imports
+from lib.hydra import bootprofile
+bootprofile.start()
+
 import machine
 from lib.hydra import loader
 from lib import sdcard
@@ -23,23 +27,32 @@ app = _LAUNCHER
 
 
 # if this was not a power reset, we are probably launching an app:
-if machine.reset_cause() != machine.PWRON_RESET:
+reset_cause = machine.reset_cause()
+bootprofile.mark("reset cause")
+if reset_cause != machine.PWRON_RESET:
     args = loader.get_args()
     if args:
         # pop the import path to prevent infinite boot loop
         app = args.pop(0)
         loader.set_args(*args)
+bootprofile.mark("args")
 
 # only mount the sd card if the app is on the sd card.
 if app.startswith("/sd"):
     sdcard.SDCard().mount()
+    bootprofile.mark("sd mount")
 
 # import the requested app!
+bootprofile.mark(app)
 try:
     __import__(app)
 except Exception as e:  # noqa: BLE001
+    bootprofile.finish("app error")
     with open('log.txt', 'a') as log:
         log.write(f"[{app}]\n")
         sys.print_exception(e, log)
     # reboot into launcher
     loader.launch_app(_LAUNCHER)
+else:
+    # the app returned without showing anything (the trace is normally written by the first Display.show)
+    bootprofile.finish("app returned")
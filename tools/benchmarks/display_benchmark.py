@@ -0,0 +1,312 @@
+"""Benchmark MicroHydra's drawing functions, using the headless display backend.
+
+This script must be run with the MicroPython unix port (Viper is required),
+from the MicroHydra `src` directory:
+    cd src
+    micropython ../tools/benchmarks/display_benchmark.py [options]
+
+Options:
+    --json PATH         Write the results to PATH as JSON ("-" for stdout).
+    --ppm DIR           Save the frame from each benchmark to DIR as a PPM image.
+    --compare PATH      Compare the results to a previous JSON file.
+                        Exits with status 1 if any benchmark rendered a different frame.
+    --iterations N      Draw each benchmark N times (default 50).
+    --modes A,B         Only run the given buffer modes (rgb565, gs4, gs8).
+
+Each benchmark starts from a cleared frame, draws the same thing `iterations` times, and then calls `show()`.
+The time per draw, the SPI bytes/writes used by that `show()`, and a CRC of the frame on the (headless) panel
+are recorded. The CRC is used to catch rendering changes, so the drawing here must stay deterministic.
+"""
+
+import sys
+import time
+import array
+import json
+import binascii
+
+
+sys.path.insert(0, '')
+
+
+from lib.display.headless import HeadlessDisplay
+from font import vga1_8x16, vga2_16x32
+from launcher.icons import appicons
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Settings ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+_DEFAULT_ITERATIONS = const(50)
+# Slowdowns larger than this are reported by --compare
+_SLOWDOWN_PCT = const(25)
+
+MODES = {
+    'rgb565': {},
+    'gs4': {'use_tiny_buf': True},
+    'gs8': {'use_8bit_buf': True},
+}
+
+# A fixed palette, so that the results don't depend on the user's config.
+_COLORS = const((
+    0x0000, 0x18e3, 0x2965, 0x4228, 0x632c, 0x8430, 0xa534, 0xc638,
+    0xe73c, 0xffff, 0xf800, 0x07e0, 0x001f, 0xffe0, 0xf81f, 0x07ff,
+))
+
+_STAR = array.array('h', [0, -30, 9, -9, 30, -9, 13, 5, 19, 27, 0, 13, -19, 27, -13, 5, -30, -9, -9, -9])
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Benchmarks ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# Each benchmark draws one thing, based on the iteration number `i`.
+# `colors` holds 16 colors, formatted for the current buffer mode.
+
+def bench_fill(display, colors, i):  # noqa: D103
+    display.fill(colors[i % 16])
+
+def bench_pixel(display, colors, i):  # noqa: D103
+    display.pixel((i * 37) % display.width, (i * 23) % display.height, colors[i % 16])
+
+def bench_hline(display, colors, i):  # noqa: D103
+    display.hline(i % 40, (i * 7) % display.height, display.width - 40, colors[i % 16])
+
+def bench_line(display, colors, i):  # noqa: D103
+    display.line(0, (i * 7) % display.height, display.width - 1, (i * 13) % display.height, colors[i % 16])
+
+def bench_rect(display, colors, i):  # noqa: D103
+    display.rect((i * 37) % (display.width - 40), (i * 23) % (display.height - 30), 40, 30, colors[i % 16])
+
+def bench_rect_fill(display, colors, i):  # noqa: D103
+    display.rect(
+        (i * 37) % (display.width - 40), (i * 23) % (display.height - 30), 40, 30, colors[i % 16], fill=True,
+    )
+
+def bench_ellipse(display, colors, i):  # noqa: D103
+    display.ellipse(
+        (i * 37) % display.width, (i * 23) % display.height, 20, 12, colors[i % 16], fill=True,
+    )
+
+def bench_polygon(display, colors, i):  # noqa: D103
+    display.polygon(
+        _STAR, 30 + (i * 37) % (display.width - 60), 30 + (i * 23) % (display.height - 60),
+        colors[i % 16], fill=True,
+    )
+
+def bench_text_builtin(display, colors, i):  # noqa: D103
+    display.text("Hello, MicroHydra!", (i * 11) % 100, (i * 8) % (display.height - 8), colors[i % 16])
+
+def bench_text_utf8(display, colors, i):  # noqa: D103
+    display.text("Héllo wörld ☺ ∑", (i * 11) % 100, 1 + (i * 8) % (display.height - 9), colors[i % 16])
+
+def bench_text_vga1_8x16(display, colors, i):  # noqa: D103
+    display.text(
+        "Hello, MicroHydra!", (i * 11) % 90, (i * 16) % (display.height - 16), colors[i % 16], font=vga1_8x16,
+    )
+
+def bench_text_vga2_16x32(display, colors, i):  # noqa: D103
+    display.text("Hydra!", (i * 11) % 140, (i * 32) % (display.height - 32), colors[i % 16], font=vga2_16x32)
+
+def bench_bitmap(display, colors, i):  # noqa: D103
+    display.bitmap(
+        appicons, (i * 37) % (display.width - 32), (i * 23) % (display.height - 32),
+        index=i % appicons.BITMAPS, palette=[colors[2], colors[i % 16]],
+    )
+
+def bench_bitmap_key(display, colors, i):  # noqa: D103
+    display.bitmap(
+        appicons, (i * 37) % (display.width - 32), (i * 23) % (display.height - 32),
+        index=i % appicons.BITMAPS, key=colors[2], palette=[colors[2], colors[i % 16]],
+    )
+
+def bench_bitmap_2x(display, colors, i):  # noqa: D103
+    display.bitmap(
+        appicons, (i * 37) % (display.width - 64), (i * 23) % (display.height - 64),
+        draw_width=64, draw_height=64, index=i % appicons.BITMAPS, palette=[colors[2], colors[i % 16]],
+    )
+
+def bench_bitmap_stretch(display, colors, i):  # noqa: D103
+    # (like the launcher's icon animation)
+    display.bitmap(
+        appicons, (i * 37) % (display.width - 48), (i * 23) % (display.height - 32),
+        draw_width=33 + i % 16, draw_height=32 - (i % 16) // 2,
+        index=i % appicons.BITMAPS, palette=[colors[2], colors[i % 16]],
+    )
+
+# (used for the show_partial benchmark)
+def bench_square(display, colors, i):  # noqa: D103
+    display.rect((i * 37) % (display.width - 16), (i * 23) % (display.height - 16), 16, 16, colors[i % 16], fill=True)
+
+
+DRAW_BENCHMARKS = (
+    ('fill', bench_fill),
+    ('pixel', bench_pixel),
+    ('hline', bench_hline),
+    ('line', bench_line),
+    ('rect', bench_rect),
+    ('rect_fill', bench_rect_fill),
+    ('ellipse', bench_ellipse),
+    ('polygon', bench_polygon),
+    ('text_builtin', bench_text_builtin),
+    ('text_utf8', bench_text_utf8),
+    ('text_vga1_8x16', bench_text_vga1_8x16),
+    ('text_vga2_16x32', bench_text_vga2_16x32),
+    ('bitmap', bench_bitmap),
+    ('bitmap_key', bench_bitmap_key),
+    ('bitmap_2x', bench_bitmap_2x),
+    ('bitmap_stretch', bench_bitmap_stretch),
+)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Runner ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def make_display(mode: str) -> HeadlessDisplay:
+    """Create a headless display for the given buffer mode, using the fixed palette."""
+    display = HeadlessDisplay(**MODES[mode])
+    palette = display.palette
+    for i, color in enumerate(_COLORS):
+        palette[i] = color
+    return display
+
+
+def clear(display, colors):
+    """Clear the frame (on the display too) before a benchmark."""
+    display.fill(colors[0])
+    display.show()
+
+
+def record(display, mode: str, name: str, total_us: int, iterations: int, ppm_dir: str|None) -> dict:
+    """Return the results for one benchmark, after its frame has been shown."""
+    if ppm_dir:
+        display.save_ppm(f"{ppm_dir}/{mode}_{name}.ppm")
+    return {
+        'mode': mode,
+        'name': name,
+        'us_per_op': total_us // iterations,
+        'show_bytes': display.show_bytes,
+        'show_transactions': display.show_transactions,
+        'crc': binascii.crc32(display.panel_bytes()),
+    }
+
+
+def run_mode(mode: str, iterations: int, ppm_dir: str|None) -> list:
+    """Run every benchmark for one buffer mode."""
+    display = make_display(mode)
+    colors = [display.palette[i] for i in range(16)]
+    results = []
+
+    for name, bench in DRAW_BENCHMARKS:
+        clear(display, colors)
+        start = time.ticks_us()
+        for i in range(iterations):
+            bench(display, colors, i)
+        total_us = time.ticks_diff(time.ticks_us(), start)
+        display.show()
+        results.append(record(display, mode, name, total_us, iterations, ppm_dir))
+
+    # Full frame show():
+    clear(display, colors)
+    total_us = 0
+    for i in range(iterations):
+        display.fill(colors[i % 16])
+        start = time.ticks_us()
+        display.show()
+        total_us += time.ticks_diff(time.ticks_us(), start)
+    results.append(record(display, mode, 'show_full', total_us, iterations, ppm_dir))
+
+    # Small changes (a 16x16 square each frame):
+    clear(display, colors)
+    total_us = 0
+    for i in range(iterations):
+        bench_square(display, colors, i)
+        start = time.ticks_us()
+        display.show()
+        total_us += time.ticks_diff(time.ticks_us(), start)
+    results.append(record(display, mode, 'show_partial', total_us, iterations, ppm_dir))
+
+    return results
+
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Output ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def print_table(results: list):
+    """Print the results in a readable table."""
+    print(f"{'mode':<8}{'benchmark':<18}{'us/op':>10}{'show bytes':>12}{'SPI writes':>12}{'crc':>12}")
+    for res in results:
+        print(
+            f"{res['mode']:<8}{res['name']:<18}{res['us_per_op']:>10}"
+            f"{res['show_bytes']:>12}{res['show_transactions']:>12}{res['crc']:>12x}",
+        )
+
+
+def compare(results: list, path: str) -> bool:
+    """Compare results to a previous run. Returns True if any frames were rendered differently."""
+    with open(path) as f:
+        baseline = {(res['mode'], res['name']): res for res in json.load(f)['results']}
+
+    changed = False
+    for res in results:
+        old = baseline.get((res['mode'], res['name']))
+        if old is None:
+            continue
+        label = f"{res['mode']} {res['name']}"
+        if old['crc'] != res['crc']:
+            print(f"RENDER CHANGED: {label}")
+            changed = True
+        if old['us_per_op'] and res['us_per_op'] * 100 > old['us_per_op'] * (100 + _SLOWDOWN_PCT):
+            print(f"SLOWER: {label} ({old['us_per_op']}us -> {res['us_per_op']}us)")
+        if res['show_bytes'] > old['show_bytes'] or res['show_transactions'] > old['show_transactions']:
+            print(
+                f"MORE SPI: {label} ({old['show_bytes']}B/{old['show_transactions']} writes"
+                f" -> {res['show_bytes']}B/{res['show_transactions']} writes)",
+            )
+    return changed
+
+
+def parse_args(argv: list) -> dict:
+    """Parse the command line options (argparse isn't available on MicroPython)."""
+    args = {'json': None, 'ppm': None, 'compare': None, 'iterations': _DEFAULT_ITERATIONS, 'modes': list(MODES)}
+    idx = 0
+    while idx < len(argv):
+        key = argv[idx].lstrip('-')
+        if key not in args or idx + 1 >= len(argv):
+            print(__doc__)
+            sys.exit(2)
+        val = argv[idx + 1]
+        if key == 'iterations':
+            val = int(val)
+        elif key == 'modes':
+            val = val.split(',')
+        args[key] = val
+        idx += 2
+    return args
+
+
+def main():
+    """Run the benchmarks, and output the results."""
+    args = parse_args(sys.argv[1:])
+
+    if args['ppm']:
+        import os
+        try:
+            os.mkdir(args['ppm'])
+        except OSError:
+            pass
+
+    results = []
+    for mode in args['modes']:
+        results += run_mode(mode, args['iterations'], args['ppm'])
+
+    output = {
+        'platform': sys.platform,
+        'implementation': sys.implementation.name,
+        'iterations': args['iterations'],
+        'results': results,
+    }
+    if args['json'] == '-':
+        print(json.dumps(output))
+    else:
+        print_table(results)
+        if args['json']:
+            with open(args['json'], 'w') as f:
+                json.dump(output, f)
+
+    if args['compare'] and compare(results, args['compare']):
+        sys.exit(1)
+
+
+main()
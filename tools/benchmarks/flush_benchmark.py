@@ -0,0 +1,58 @@
+"""Measure how long ST7789.show() takes, and how many SPI transactions it uses, without a real display.
+
+This script must be run with the MicroPython unix port (Viper is required),
+from the MicroHydra `src` directory:
+    cd src
+    micropython ../tools/benchmarks/flush_benchmark.py
+
+The headless display backend is used, so SPI writes are only recorded.
+The reported time is the time spent preparing data for the SPI bus (not the time to actually send it).
+"""
+
+import sys
+import time
+
+
+sys.path.insert(0, '')
+
+
+from lib.display.headless import HeadlessDisplay
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Benchmark ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+_FRAMES = const(20)
+
+
+def bench_full_frame(display) -> tuple[float, float, int]:
+    """Return average ms, SPI transactions, and bytes for a full-frame show()."""
+    display.spi.reset()
+    total_us = 0
+    for i in range(_FRAMES):
+        display.fill(i % 16 if display.use_tiny_buf else i)
+        start = time.ticks_us()
+        display.show()
+        total_us += time.ticks_diff(time.ticks_us(), start)
+
+    return (
+        total_us / _FRAMES / 1000,
+        display.spi.transactions / _FRAMES,
+        display.spi.bytes // _FRAMES,
+    )
+
+
+def main():
+    """Run the benchmark and print a results table."""
+    print(f"{'mode':<24}{'ms/frame':>10}{'SPI writes/frame':>18}{'bytes/frame':>13}")
+
+    # (Display is a singleton, so each display is created just before it's used)
+    modes = [("RGB565", {})]
+    modes += [
+        (f"GS4, strip_lines={lines}", {'use_tiny_buf': True, 'strip_lines': lines})
+        for lines in (1, 4, 8, 16, 32)
+        ]
+
+    for name, kwargs in modes:
+        ms, writes, nbytes = bench_full_frame(HeadlessDisplay(**kwargs))
+        print(f"{name:<24}{ms:>10.2f}{writes:>18.1f}{nbytes:>13}")
+
+main()
@@ -0,0 +1,173 @@
+"""Convert a sprite sheet into a compressed sprite atlas for MicroHydra's `DisplayCore.sprite`.
+
+The sprite sheet width and height should be a multiple of the sprite width and height,
+with no extra pixels between sprites. All sprites share the same palette.
+
+Each frame is stored using whichever encoding is smallest (raw packed bits, RLE, or palette runs).
+See `src/lib/display/spriteatlas.py` for a description of the format.
+
+Usage:
+    python3 atlas_converter.py sheet.png 16 16 4 -o sprites.mhsa
+    python3 atlas_converter.py sheet.png 16 16 4 -o sprites.py
+
+A `.py` output is a module containing the atlas as an `ATLAS` bytes object,
+which can be used with `SpriteAtlas(module.ATLAS)` (and stays in flash when frozen).
+"""
+
+import argparse
+import struct
+
+from PIL import Image
+
+
+# These must match `lib/display/spriteatlas.py`
+MAGIC = b"MHSA"
+VERSION = 1
+HEADER_FORMAT = "<4sBBHH2x"
+INDEX_FORMAT = "<IIHHB3x"
+INDEX_SIZE = 16
+
+ENCODING_RAW = 0
+ENCODING_RLE = 1
+ENCODING_PALETTE_RUN = 2
+
+MAX_RUN = 128
+
+
+def encode_raw(pixels: list[int], bpp: int) -> bytes:
+    """Pack pixels most significant bit first, with no padding between rows."""
+    bits = "".join(f"{pixel:0{bpp}b}" for pixel in pixels)
+    bits += "0" * (-len(bits) % 8)
+    return bytes(int(bits[i:i + 8], 2) for i in range(0, len(bits), 8))
+
+
+def encode_rle(pixels: list[int]) -> bytes:
+    """Encode pixels as runs of repeated indices, and groups of literal indices."""
+    out = bytearray()
+    literals = []
+
+    def flush_literals():
+        while literals:
+            group = literals[:MAX_RUN]
+            del literals[:MAX_RUN]
+            out.append(len(group) - 1)
+            out.extend(group)
+
+    idx = 0
+    while idx < len(pixels):
+        run = 1
+        while idx + run < len(pixels) and run < MAX_RUN and pixels[idx + run] == pixels[idx]:
+            run += 1
+        # a run of 2 costs the same as 2 literals, so it's only worth breaking up literals for longer runs
+        if run >= 3 or (run == 2 and not literals):
+            flush_literals()
+            out.append(0x80 | (run - 1))
+            out.append(pixels[idx])
+        else:
+            literals.extend(pixels[idx:idx + run])
+        idx += run
+
+    flush_literals()
+    return bytes(out)
+
+
+def encode_palette_run(pixels: list[int], bpp: int) -> bytes:
+    """Encode each run as a single byte, holding the palette index and the run length."""
+    run_bits = 8 - bpp
+    max_run = 1 << run_bits
+    out = bytearray()
+    idx = 0
+    while idx < len(pixels):
+        run = 1
+        while idx + run < len(pixels) and run < max_run and pixels[idx + run] == pixels[idx]:
+            run += 1
+        out.append((pixels[idx] << run_bits) | (run - 1))
+        idx += run
+    return bytes(out)
+
+
+def encode_frame(pixels: list[int], bpp: int) -> tuple[int, bytes]:
+    """Return the smallest encoding of the given frame."""
+    options = [
+        (ENCODING_RAW, encode_raw(pixels, bpp)),
+        (ENCODING_RLE, encode_rle(pixels)),
+    ]
+    if bpp <= 4:
+        options.append((ENCODING_PALETTE_RUN, encode_palette_run(pixels, bpp)))
+    return min(options, key=lambda option: len(option[1]))
+
+
+def build_atlas(image_file: str, sprite_width: int, sprite_height: int, bpp: int) -> bytes:
+    """Convert a sprite sheet into atlas data."""
+    img = Image.open(image_file).convert("RGB")
+    img = img.convert(mode="P", palette=Image.Palette.ADAPTIVE, colors=1 << bpp)
+
+    palette = img.getpalette()
+    colors = [
+        ((palette[i] & 0xF8) << 8) | ((palette[i + 1] & 0xFC) << 3) | ((palette[i + 2] & 0xF8) >> 3)
+        for i in range(0, min(len(palette), 3 << bpp), 3)
+    ]
+
+    frames = []
+    for y in range(0, img.height - sprite_height + 1, sprite_height):
+        for x in range(0, img.width - sprite_width + 1, sprite_width):
+            pixels = [
+                img.getpixel((xx, yy))
+                for yy in range(y, y + sprite_height)
+                for xx in range(x, x + sprite_width)
+            ]
+            frames.append(encode_frame(pixels, bpp))
+
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, bpp, len(colors), len(frames))
+    header += struct.pack(f"<{len(colors)}H", *colors)
+
+    index = b""
+    data = b""
+    offset = len(header) + len(frames) * INDEX_SIZE
+    for encoding, frame_data in frames:
+        index += struct.pack(INDEX_FORMAT, offset + len(data), len(frame_data), sprite_width, sprite_height, encoding)
+        data += frame_data
+
+    return header + index + data
+
+
+def write_module(path: str, atlas: bytes):
+    """Write the atlas as a Python module."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("ATLAS = const(\\\n")
+        for i in range(0, len(atlas), 16):
+            f.write("    b'" + "".join(f"\\x{byte:02x}" for byte in atlas[i:i + 16]) + "'\\\n")
+        f.write(")\n")
+
+
+def main():
+    """Convert a sprite sheet, and print a summary."""
+    parser = argparse.ArgumentParser(
+        description="Convert a sprite sheet into a compressed sprite atlas for use with the sprite method.",
+    )
+    parser.add_argument("image_file", help="Name of file containing the sprite sheet to convert")
+    parser.add_argument("sprite_width", type=int, help="Width of sprites in pixels")
+    parser.add_argument("sprite_height", type=int, help="Height of sprites in pixels")
+    parser.add_argument(
+        "bits_per_pixel",
+        type=int,
+        choices=(1, 2, 4, 8),
+        help="The number of bits to use per pixel (1, 2, 4, or 8)",
+    )
+    parser.add_argument("-o", "--output", required=True, help="Output file (.mhsa for binary, or .py for a module)")
+    args = parser.parse_args()
+
+    atlas = build_atlas(args.image_file, args.sprite_width, args.sprite_height, args.bits_per_pixel)
+    if args.output.endswith(".py"):
+        write_module(args.output, atlas)
+    else:
+        with open(args.output, "wb") as f:
+            f.write(atlas)
+
+    frames = struct.unpack_from(HEADER_FORMAT, atlas)[4]
+    raw_size = (args.sprite_width * args.sprite_height * args.bits_per_pixel * frames + 7) // 8
+    print(f"{frames} frames, {len(atlas)} bytes (raw bitmap data would be {raw_size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""Check the display driver's output, using the headless display backend.
+
+This script must be run with the MicroPython unix port (Viper is required),
+from the MicroHydra `src` directory:
+    cd src
+    micropython ../tools/tests/display_tests.py
+
+Each test draws something, and checks the framebuffer (or the headless panel, or the SPI traffic) against
+what it should be. Failed checks are printed, and the script exits with status 1 if any check failed.
+"""
+
+import array
+import sys
+import time
+
+
+sys.path.insert(0, '')
+
+
+from lib.display.headless import HeadlessDisplay, HeadlessSPI
+from lib.display.display import Display
+from font import vga1_8x16
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Helpers ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+MODES = {
+    'rgb565': {},
+    'gs4': {'use_tiny_buf': True},
+    'gs8': {'use_8bit_buf': True},
+}
+
+FAILURES = []
+
+
+def check(passed: bool, message: str):
+    """Record a failed check."""
+    if not passed:
+        FAILURES.append(message)
+        print(f"  FAIL: {message}")
+
+
+def white(display) -> int:
+    """Get a light color (formatted for the display's buffer mode)."""
+    return 9 if display.use_tiny_buf or display.use_8bit_buf else 0xffff
+
+
+class SlowSPI(HeadlessSPI):
+    """A HeadlessSPI that takes as long to write as a slow (2MHz) SPI bus would."""
+
+    def write(self, buf):
+        """Record the write, then sleep for 4us per byte."""
+        super().write(buf)
+        time.sleep_us(len(buf) * 4)
+
+
+def odd_width_display(kwargs: dict) -> HeadlessDisplay:
+    """Create a display with an odd width (135px, in portrait rotation)."""
+    display = HeadlessDisplay(rotation=0, **kwargs)
+    display.fill(0)
+    return display
+
+
+class SolidBitmap:
+    """A 1-bit bitmap (in the format of the bitmap modules) with every pixel set."""
+
+    WIDTH = 15
+    HEIGHT = 20
+    BPP = 1
+    BITMAP = b'\xff' * ((15 * 20 + 7) // 8)
+
+
+def framebuffer_bytes(display) -> bytes:
+    """Get a copy of the display's framebuffer."""
+    return bytes(memoryview(display.fbuf))
+
+
+def check_panel(display, name: str):
+    """Check that the headless panel shows exactly what's in the framebuffer."""
+    shown = bytes(display.panel_bytes())
+    # rewrite the whole display, to see what should have been shown
+    display._mark_dirty(0, 0, display.width, display.height)  # noqa: SLF001
+    display.show()
+    check(shown == bytes(display.panel_bytes()), f"{name}: panel doesn't match the framebuffer")
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Tests ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def test_scroll_lines(mode: str, kwargs: dict):
+    """Scrolling terminal-like text sends less than a full frame.
+
+    (Rotation 1 is used, which can't use hardware scrolling.)
+    """
+    display = HeadlessDisplay(rotation=1, **kwargs)
+    width = display.width
+    height = display.height
+    display.fill(0)
+    for i in range(height // 10):
+        display.text(f"line {i}", 0, i * 10, white(display))
+    display.show()
+    display.scroll_region(0, height)
+
+    full_bytes = width * height * 2
+    for i in range(5):
+        display.scroll_lines(10)
+        display.rect(0, height - 10, width, 10, 0, fill=True)
+        display.text(f"new line {i}", 0, height - 10, white(display))
+        display.show()
+        check(
+            display.show_bytes < full_bytes // 2,
+            f"{mode} scroll_lines: sent {display.show_bytes} bytes (a full frame is {full_bytes})",
+        )
+    check_panel(display, f"{mode} scroll_lines")
+
+
+def test_batch_odd_width(mode: str, kwargs: dict):
+    """Batch drawing matches drawing each item separately, when each framebuffer row isn't a whole number of bytes."""
+    display = odd_width_display(kwargs)
+    width = display.width
+    # items spread over every row, touching both edges (and clipped past them)
+    hlines = array.array('h')
+    pixels = array.array('h')
+    for y in range(-2, display.height + 2):
+        hlines.extend((y * 7 % width - 20, y, y % 50 + 1))
+        pixels.extend((width - 1 - y % 3, y))
+
+    display.hlines(hlines, 0, 0, white(display))
+    display.pixels(pixels, 0, 0, white(display))
+    batched = framebuffer_bytes(display)
+
+    display.fill(0)
+    for i in range(0, len(hlines), 3):
+        display.hline(hlines[i], hlines[i + 1], hlines[i + 2], white(display))
+    for i in range(0, len(pixels), 2):
+        display.pixel(pixels[i], pixels[i + 1], white(display))
+    check(batched == framebuffer_bytes(display), f"{mode} batch (width {width}): doesn't match separate drawing")
+
+
+def test_blend_odd_width(mode: str, kwargs: dict):
+    """Opaque blends match filled rectangles, when each framebuffer row isn't a whole number of bytes."""
+    display = odd_width_display(kwargs)
+    width = display.width
+    height = display.height
+    # an opaque mask (alpha 15 for every pixel), 15 pixels wide
+    mask = bytearray(b'\xff' * (8 * 20))
+    # covering both edges (and clipped past them)
+    areas = ((-3, 5, 15, 20), (width - 10, 40, 15, 20), (61, height - 12, 15, 20))
+
+    # (indexed buffers draw the color when alpha is at least 8, so alpha 14 is exact there)
+    alpha = 15 if mode == 'rgb565' else 14
+    for x, y, w, h in areas:
+        display.blend_rect(x, y + 30, w, h, white(display), alpha)
+        display.blit_blend(mask, x, y, w, h, white(display))
+    blended = framebuffer_bytes(display)
+
+    display.fill(0)
+    for x, y, w, h in areas:
+        display.rect(x, y + 30, w, h, white(display), fill=True)
+        display.rect(x, y, w, h, white(display), fill=True)
+    check(blended == framebuffer_bytes(display), f"{mode} blend (width {width}): doesn't match filled rectangles")
+
+
+def test_text_odd_width(mode: str, kwargs: dict):
+    """Drawn text matches cached text (which is blitted), when each framebuffer row isn't a whole number of bytes."""
+    display = odd_width_display(kwargs)
+    width = display.width
+    # odd and even positions, clipped past both edges (including UTF8 glyphs, drawn one pixel at a time)
+    texts = (
+        ("Hello, odd width!", -3, 20, vga1_8x16),
+        ("Hello, odd width!", width - 60, 41, vga1_8x16),
+        ("ab\u00e9\u6f22c", 1, 80, None),
+        ("ab\u00e9\u6f22c", width - 21, 101, vga1_8x16),
+        )
+
+    text_cache = display.text_cache
+    display.text_cache = None
+    for text, x, y, font in texts:
+        display.text(text, x, y, white(display), font)
+    drawn = framebuffer_bytes(display)
+
+    # (text is only cached after it's been seen twice)
+    display.text_cache = text_cache
+    for text, _, _, font in texts:
+        text_cache.get(display, text, font)
+        check(text_cache.get(display, text, font) is not None, f"{mode} text: {text!r} wasn't cached")
+    display.fill(0)
+    for text, x, y, font in texts:
+        display.text(text, x, y, white(display), font)
+    check(drawn == framebuffer_bytes(display), f"{mode} text (width {width}): doesn't match cached text")
+
+
+def test_bitmap_odd_width(mode: str, kwargs: dict):
+    """Solid bitmaps match filled rectangles, when each framebuffer row isn't a whole number of bytes."""
+    display = odd_width_display(kwargs)
+    width = display.width
+    palette = [white(display), white(display)]
+    # 1:1 and scaled, at odd and even positions, clipped past both edges
+    areas = ((-3, 5, 15, 20), (width - 10, 40, 15, 20), (61, 80, 30, 40), (width - 21, 130, 23, 31))
+
+    for x, y, w, h in areas:
+        display.bitmap(SolidBitmap, x, y, draw_width=w, draw_height=h, palette=palette)
+    drawn = framebuffer_bytes(display)
+
+    display.fill(0)
+    for x, y, w, h in areas:
+        display.rect(x, y, w, h, white(display), fill=True)
+    check(drawn == framebuffer_bytes(display), f"{mode} bitmap (width {width}): doesn't match filled rectangles")
+
+
+def test_async_flush(mode: str, kwargs: dict):
+    """With async_flush, show returns while the frame is written, and the next frame is drawn during the write."""
+    display = HeadlessDisplay(async_flush=True, double_buffer=True, **kwargs)
+    display.spi = SlowSPI(dc=display.dc)
+    width = display.width
+    height = display.height
+    # writing a full frame takes 4us per byte
+    write_us = width * height * 2 * 4
+
+    display.fill(white(display))
+    start = time.ticks_us()
+    # (HeadlessDisplay.show waits for the flush, so use Display.show)
+    Display.show(display)
+    show_us = time.ticks_diff(time.ticks_us(), start)
+    check(show_us < write_us, f"{mode} async_flush: show took {show_us}us (the write takes {write_us}us)")
+
+    # draw the next frame while the first one is written
+    display.text("next frame", 0, 0, 0)
+    check(display._flush_pending, f"{mode} async_flush: the flush finished before drawing did")  # noqa: SLF001
+
+    # the time taken to write the first frame is reported by the next frame
+    # (even when show doesn't have to wait for it)
+    display.wait_flush()
+    Display.show(display)
+    flush_us = display.frames.stats.last_flush_us
+    check(flush_us >= write_us, f"{mode} async_flush: flush_us is {flush_us}us (the write takes {write_us}us)")
+    display.wait_flush()
+    check_panel(display, f"{mode} async_flush")
+
+
+def main():
+    """Run each test in each buffer mode."""
+    # (Display is a singleton, so each display is created just before it's used)
+    tests = (
+        test_scroll_lines,
+        test_batch_odd_width,
+        test_blend_odd_width,
+        test_text_odd_width,
+        test_bitmap_odd_width,
+        test_async_flush,
+        )
+    for test in tests:
+        for mode, kwargs in MODES.items():
+            print(f"{test.__name__} ({mode})")
+            test(mode, kwargs)
+
+    print(f"{len(FAILURES)} failed checks.")
+    if FAILURES:
+        sys.exit(1)
+
+main()
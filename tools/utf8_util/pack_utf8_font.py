@@ -0,0 +1,96 @@
+"""Pack a dense UTF8 font bin (as output by merge_font_bins.py) into MicroHydra's sparse font format.
+
+The dense format stores 8 bytes for every code point from U+0000 to U+FFFF,
+but thousands of those code points just contain the font's "missing glyph" placeholder.
+The sparse format only stores runs of real glyphs, and stores the placeholder once.
+
+Sparse format (all values little-endian):
+    header (16 bytes):
+        4s  magic: b"MHU8"
+        H   format version
+        H   number of ranges in the range table
+        8s  default glyph (drawn for code points not in any range)
+    range table (8 bytes per range, sorted by first code point):
+        H   first code point in range
+        H   number of glyphs in range
+        I   byte offset of the range's first glyph (from the start of the file)
+    glyph data:
+        8 bytes per glyph, in the same layout as the dense format.
+
+DisplayCore finds glyphs in this format using a binary search over the range table.
+"""
+
+import struct
+from collections import Counter
+
+
+source_file = "tools/utf8_util/utf8_8x8.bin"
+output_file = "tools/utf8_util/utf8_8x8_sparse.bin"
+
+_MAGIC = b"MHU8"
+_VERSION = 1
+_HEADER_FORMAT = "<4sHH8s"
+_RANGE_FORMAT = "<HHI"
+_HEADER_SIZE = struct.calcsize(_HEADER_FORMAT)
+_RANGE_SIZE = struct.calcsize(_RANGE_FORMAT)
+_GLYPH_SIZE = 8
+
+# A run of skipped glyphs shorter than this is stored anyway,
+# because a new range entry costs as much as storing one glyph.
+_MIN_GAP = 2
+
+
+def find_ranges(glyphs: list[bytes], default_glyph: bytes) -> list[tuple[int, int]]:
+    """Return a list of (first, count) for each run of glyphs that must be stored."""
+    ranges = []
+    start = None
+    gap = 0
+    for codepoint, glyph in enumerate(glyphs):
+        if glyph == default_glyph:
+            gap += 1
+            if start is not None and gap >= _MIN_GAP:
+                ranges.append((start, codepoint - gap + 1 - start))
+                start = None
+        else:
+            if start is None:
+                start = codepoint
+            gap = 0
+    if start is not None:
+        ranges.append((start, len(glyphs) - gap - start))
+    return ranges
+
+
+def pack_font(dense: bytes) -> bytes:
+    """Convert dense font data into the sparse format."""
+    glyphs = [dense[i:i + _GLYPH_SIZE] for i in range(0, len(dense), _GLYPH_SIZE)]
+
+    # The most common glyph is the font's placeholder for missing characters
+    default_glyph = Counter(glyphs).most_common(1)[0][0]
+
+    ranges = find_ranges(glyphs, default_glyph)
+
+    header = struct.pack(_HEADER_FORMAT, _MAGIC, _VERSION, len(ranges), default_glyph)
+    table = bytearray()
+    data = bytearray()
+    data_start = _HEADER_SIZE + _RANGE_SIZE * len(ranges)
+    for first, count in ranges:
+        table += struct.pack(_RANGE_FORMAT, first, count, data_start + len(data))
+        data += b"".join(glyphs[first:first + count])
+
+    return header + table + data
+
+
+if __name__ == "__main__":
+    with open(source_file, 'rb') as source:
+        dense_data = source.read()
+
+    sparse_data = pack_font(dense_data)
+
+    with open(output_file, 'wb') as output:
+        output.write(sparse_data)
+
+    range_count = struct.unpack_from(_HEADER_FORMAT, sparse_data)[2]
+    print(f"""\
+Packed {len(dense_data)} bytes into {len(sparse_data)} bytes ({range_count} ranges).
+Wrote {output_file}.
+""")
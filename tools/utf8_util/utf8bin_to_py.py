@@ -1,5 +1,5 @@
 """
-Simple script to convert the output of `generate_utf8_font.py` 
+Simple script to convert the output of `pack_utf8_font.py`
 into a .py file that can be frozen in MicroPython firmware.
 """
 
@@ -7,11 +7,11 @@ import os
 
 
 # decide on working in the current, or in the './tools/utf8_util' directory
-if os.path.exists(os.path.join('tools','utf8_util','utf8_8x8.bin')):
-    source_file = os.path.join('tools','utf8_util','utf8_8x8.bin')
+if os.path.exists(os.path.join('tools','utf8_util','utf8_8x8_sparse.bin')):
+    source_file = os.path.join('tools','utf8_util','utf8_8x8_sparse.bin')
     dest_file = os.path.join('tools','utf8_util','utf8_8x8.py')
 else:
-    source_file = 'utf8_8x8.bin'
+    source_file = 'utf8_8x8_sparse.bin'
     dest_file = 'utf8_8x8.py'
 
 